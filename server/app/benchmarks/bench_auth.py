@@ -0,0 +1,127 @@
+# benchmarks/bench_auth.py
+"""
+Logins per second and catalog latency under a mixed load: a burst of
+/login requests (one bcrypt check each) runs alongside a steady stream of
+/products/fetch_product requests. bcrypt is either run inline on the
+event loop (the old behaviour) or on the password pool, so the catalog
+latency column shows how much a login burst stalls unrelated endpoints.
+
+Run from server/app:  python -m benchmarks.bench_auth [--rounds N] [--logins N] [--latency MS]
+"""
+import argparse
+import asyncio
+import os
+import statistics
+import sys
+import time
+from types import SimpleNamespace
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from core import ratings, security  # noqa: E402
+from core.cache import catalog_cache  # noqa: E402
+from core.config import settings  # noqa: E402
+from routes import auth, fetch_products  # noqa: E402
+from schemas.user import UserLogin  # noqa: E402
+
+CATALOG_CONCURRENCY = 8
+
+
+class SlowQuery:
+    """
+    Accepts any postgrest builder chain; execute() sleeps for the simulated
+    round trip and returns a plausible row for the table.
+    """
+
+    request = None  # not a real builder, so reads are never coalesced
+
+    def __init__(self, table, latency, user):
+        self.table = table
+        self.latency = latency
+        self.user = user
+
+    def __getattr__(self, name):
+        return lambda *args, **kwargs: self
+
+    def execute(self):
+        time.sleep(self.latency)
+        if self.table == "products":
+            return SimpleNamespace(data={"id": 1, "name": "Basi Wine", "price_min": 250.0, "price_max": 450.0})
+        if self.table == "users":
+            return SimpleNamespace(data=[self.user])
+        return SimpleNamespace(data=[])
+
+
+class SlowClient:
+    def __init__(self, latency, user):
+        self.latency = latency
+        self.user = user
+
+    def table(self, name):
+        return SlowQuery(name, self.latency, self.user)
+
+
+async def check_inline(password, password_hash):
+    return security.check_password(password, password_hash)
+
+
+async def drive(logins, login_concurrency):
+    semaphore = asyncio.Semaphore(login_concurrency)
+    done = asyncio.Event()
+    latencies = []
+
+    async def login():
+        async with semaphore:
+            await auth.login_user(UserLogin(email="bench@example.com", password="bench-password"))
+
+    async def catalog_worker(worker):
+        i = 0
+        while not done.is_set():
+            catalog_cache.invalidate()
+            started = time.perf_counter()
+            await fetch_products.fetch_product(str(worker * 100000 + i))
+            latencies.append(time.perf_counter() - started)
+            i += 1
+
+    workers = [asyncio.create_task(catalog_worker(w)) for w in range(CATALOG_CONCURRENCY)]
+    started = time.perf_counter()
+    await asyncio.gather(*(login() for _ in range(logins)))
+    elapsed = time.perf_counter() - started
+    done.set()
+    await asyncio.gather(*workers)
+
+    latencies.sort()
+    p95 = latencies[int(len(latencies) * 0.95) - 1] if latencies else 0.0
+    return logins / elapsed, statistics.median(latencies) * 1000, p95 * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rounds", type=int, default=settings.BCRYPT_ROUNDS, help="bcrypt work factor")
+    parser.add_argument("--logins", type=int, default=40)
+    parser.add_argument("--latency", type=float, default=20, help="simulated upstream round trip in ms")
+    args = parser.parse_args()
+
+    settings.BCRYPT_ROUNDS = args.rounds
+    settings.SECRET_KEY = settings.SECRET_KEY or "bench-only-secret-key-not-for-production"
+    user = {
+        "id": "bench-user", "email": "bench@example.com", "is_verified": True,
+        "password_hash": security.hash_password("bench-password"),
+    }
+    client = SlowClient(args.latency / 1000, user)
+    auth.supabase_client = client
+    fetch_products.supabase_client = client
+    ratings.supabase_client = client
+    pooled = auth.check_password_async
+
+    print(f"bcrypt cost {args.rounds}, {args.logins} logins, {CATALOG_CONCURRENCY} catalog clients")
+    print(f"{'logins in flight':<18}{'mode':<8}{'logins/s':>10}{'catalog p50 ms':>16}{'catalog p95 ms':>16}")
+    for concurrency in (1, 4, 16):
+        for mode, checker in (("inline", check_inline), ("pooled", pooled)):
+            auth.check_password_async = checker
+            rate, p50, p95 = asyncio.run(drive(args.logins, concurrency))
+            print(f"{concurrency:<18}{mode:<8}{rate:>10.1f}{p50:>16.1f}{p95:>16.1f}")
+
+
+if __name__ == "__main__":
+    main()
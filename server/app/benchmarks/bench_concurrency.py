@@ -0,0 +1,94 @@
+# benchmarks/bench_concurrency.py
+"""
+Throughput of an async endpoint against a slow upstream as the number of
+in-flight requests grows: supabase calls made inline on the event loop
+(the old behaviour) vs run on the bounded database pool. Each request is
+a cache miss for /products/fetch_product, i.e. a product query plus a
+rating lookup, each taking --latency ms.
+
+Run from server/app:  python -m benchmarks.bench_concurrency [--latency MS] [--requests N]
+"""
+import argparse
+import asyncio
+import os
+import sys
+import time
+from types import SimpleNamespace
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from core import ratings  # noqa: E402
+from core.cache import catalog_cache  # noqa: E402
+from routes import fetch_products  # noqa: E402
+
+
+class SlowQuery:
+    """
+    Accepts any postgrest builder chain; execute() sleeps for the simulated
+    round trip and returns a plausible row for the table.
+    """
+
+    request = None  # not a real builder, so reads are never coalesced
+
+    def __init__(self, table, latency):
+        self.table = table
+        self.latency = latency
+
+    def __getattr__(self, name):
+        return lambda *args, **kwargs: self
+
+    def execute(self):
+        time.sleep(self.latency)
+        if self.table == "products":
+            return SimpleNamespace(data={"id": 1, "name": "Basi Wine", "price_min": 250.0, "price_max": 450.0})
+        return SimpleNamespace(data=[])
+
+
+class SlowClient:
+    def __init__(self, latency):
+        self.latency = latency
+
+    def table(self, name):
+        return SlowQuery(name, self.latency)
+
+
+async def run_inline(fn, *args, **kwargs):
+    return fn(*args, **kwargs)
+
+
+async def drive(concurrency, requests):
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def one(i):
+        async with semaphore:
+            await fetch_products.fetch_product(str(i))
+
+    started = time.perf_counter()
+    await asyncio.gather(*(one(i) for i in range(requests)))
+    return requests / (time.perf_counter() - started)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--latency", type=float, default=20, help="simulated upstream round trip in ms")
+    parser.add_argument("--requests", type=int, default=200)
+    args = parser.parse_args()
+
+    client = SlowClient(args.latency / 1000)
+    fetch_products.supabase_client = client
+    ratings.supabase_client = client
+    pooled = fetch_products.run_blocking
+
+    print(f"{'in flight':<12}{'inline req/s':>14}{'pooled req/s':>14}{'speedup':>9}")
+    for concurrency in (1, 4, 16, 64):
+        results = []
+        for runner in (run_inline, pooled):
+            fetch_products.run_blocking = runner
+            catalog_cache.invalidate()
+            results.append(asyncio.run(drive(concurrency, args.requests)))
+        inline, pool = results
+        print(f"{concurrency:<12}{inline:>14.1f}{pool:>14.1f}{pool / inline:>8.1f}x")
+
+
+if __name__ == "__main__":
+    main()
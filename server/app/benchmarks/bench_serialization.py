@@ -0,0 +1,95 @@
+# benchmarks/bench_serialization.py
+"""
+Compare response encoding for the catalog endpoints: FastAPI's default
+JSONResponse vs FastJSONResponse (orjson), and wire size uncompressed,
+gzip and brotli. Payloads are synthetic but shaped like the real
+responses (nested stores objects, image_urls arrays, Filipino text).
+
+Run from server/app:  python -m benchmarks.bench_serialization [--products N]
+"""
+import argparse
+import os
+import sys
+import timeit
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from fastapi.responses import JSONResponse  # noqa: E402
+
+from core.compression import brotli, compress  # noqa: E402
+from core.responses import FastJSONResponse  # noqa: E402
+
+
+def make_store(i):
+    return {
+        "store_id": f"5f0c2b9e-1d3a-4c6b-9e8f-{i:012d}",
+        "name": f"Tindahan ni Aling Nena #{i}",
+        "description": "Pasalubong center offering local delicacies, handwoven inabel and burnay jars. " * 2,
+        "latitude": 16.6159 + i * 1e-4,
+        "longitude": 120.3209 - i * 1e-4,
+        "rating": 4.5,
+        "store_image": f"https://cdn.example.com/stores/{i}.jpg",
+        "type": "Pasalubong",
+        "operating_hours": "8:00 AM - 7:00 PM",
+        "phone": "+63 917 000 0000",
+        "town": "San Fernando",
+    }
+
+
+def make_product(i):
+    store = make_store(i % 50)
+    return {
+        "id": i,
+        "name": f"Basi Wine Reserva {i}",
+        "description": "Traditional Ilocano sugarcane wine fermented with samak bark in burnay jars. " * 3,
+        "category": "Beverage",
+        "price_min": 250.0,
+        "price_max": 450.0,
+        "ar_asset_url": f"https://cdn.example.com/ar/{i}.glb",
+        "image_urls": [f"https://cdn.example.com/products/{i}/{n}.jpg" for n in range(4)],
+        "address": "Brgy. Poro, San Fernando City, La Union",
+        "in_stock": True,
+        "store_id": store["store_id"],
+        "stores": {key: store[key] for key in ("name", "store_id", "latitude", "longitude", "store_image", "type", "rating", "town")},
+        "average_rating": "4.6",
+        "total_reviews": 37,
+    }
+
+
+def payloads(product_count):
+    return {
+        "fetch_products": {"products": [make_product(i) for i in range(product_count)], "next_cursor": None},
+        "fetch_stores": [make_store(i) for i in range(max(product_count // 10, 1))],
+        "fetch_municipalities": [
+            {"id": str(i), "name": f"Town {i}", "description": "Coastal municipality of La Union. " * 4,
+             "image_url": f"https://cdn.example.com/towns/{i}.jpg", "created_at": "2025-01-01T00:00:00"}
+            for i in range(20)
+        ],
+    }
+
+
+def best_of(fn, repeat=5):
+    number = max(1, int(0.2 / max(timeit.timeit(fn, number=1), 1e-6)))
+    return min(timeit.repeat(fn, number=number, repeat=repeat)) / number
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--products", type=int, default=1000)
+    args = parser.parse_args()
+
+    print(f"{'endpoint':<22}{'json ms':>10}{'orjson ms':>11}{'speedup':>9}{'raw KB':>10}{'gzip KB':>10}{'br KB':>9}")
+    for name, content in payloads(args.products).items():
+        json_time = best_of(lambda: JSONResponse(content).body)
+        orjson_time = best_of(lambda: FastJSONResponse(content).body)
+        body = FastJSONResponse(content).body
+        gzip_size = len(compress(body, "gzip"))
+        br_size = f"{len(compress(body, 'br')) / 1024:>9.1f}" if brotli else f"{'n/a':>9}"
+        print(
+            f"{name:<22}{json_time * 1e3:>10.2f}{orjson_time * 1e3:>11.2f}{json_time / orjson_time:>8.1f}x"
+            f"{len(body) / 1024:>10.1f}{gzip_size / 1024:>10.1f}{br_size}"
+        )
+
+
+if __name__ == "__main__":
+    main()
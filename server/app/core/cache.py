@@ -0,0 +1,135 @@
+#core/cache.py
+import threading
+import time
+from collections import Counter, OrderedDict
+from core.singleflight import SingleFlight
+
+# Seconds a cached result stays fresh, per upstream table. A result built
+# from several tables expires with the shortest of their TTLs.
+TABLE_TTLS = {
+    "products": 300,
+    "reviews": 300,
+    "product_neighbors": 1800,
+    "stores": 600,
+    "municipalities": 3600,
+    "events": 600,
+    "festival_highlights": 600,
+}
+DEFAULT_TTL = 300
+MAX_ENTRIES = 1024
+
+
+class QueryCache:
+    """
+    In-process read-through cache keyed by query shape. Entries are tagged
+    with the tables they were built from so write paths can drop exactly
+    the results they make stale. Least recently used entries are evicted
+    once max_entries is reached. Every invalidation bumps a per-table
+    generation, so a load that was already running when its tables were
+    invalidated does not store its (possibly stale) result.
+    """
+
+    def __init__(self, max_entries: int = MAX_ENTRIES, ttls: dict = None, clock=time.monotonic):
+        self.max_entries = max_entries
+        self.ttls = dict(TABLE_TTLS if ttls is None else ttls)
+        self.clock = clock
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self._generations = Counter()
+        self._epoch = 0
+        self.flights = SingleFlight()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def ttl_for(self, tables) -> float:
+        return min((self.ttls.get(table, DEFAULT_TTL) for table in tables), default=DEFAULT_TTL)
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry[0] <= self.clock():
+                if entry is not None:
+                    del self._entries[key]
+                self.misses += 1
+                return None, False
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[2], True
+
+    def _generation(self, tables) -> tuple:
+        return (self._epoch,) + tuple(self._generations[table] for table in sorted(tables))
+
+    def generation(self, tables) -> tuple:
+        with self._lock:
+            return self._generation(tables)
+
+    def set(self, tables, key, value, generation: tuple = None):
+        """
+        Store value for key. When `generation` (taken before the value was
+        built) no longer matches, the tables were invalidated meanwhile and
+        the value is not stored.
+        """
+        tables = frozenset(tables)
+        with self._lock:
+            if generation is not None and generation != self._generation(tables):
+                return
+            self._entries[key] = (self.clock() + self.ttl_for(tables), tables, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def get_or_load(self, tables, key, loader):
+        """
+        Return the cached value for key, calling loader() to fill it on a
+        miss. Concurrent misses for the same key share one loader() call.
+        Exceptions from loader are not cached, and neither are results of
+        loads overtaken by an invalidation of their tables.
+        """
+        value, found = self.get(key)
+        if found:
+            return value
+        generation = self.generation(tables)
+
+        def load():
+            value = loader()
+            self.set(tables, key, value, generation)
+            return value
+
+        # Callers arriving after an invalidation start a fresh load rather
+        # than joining one that may read pre-invalidation data
+        return self.flights.do((key, generation), load)
+
+    def invalidate(self, *tables) -> int:
+        """
+        Drop every entry built from any of the given tables, or everything
+        when no table is given. Returns the number of entries removed.
+        """
+        with self._lock:
+            if not tables:
+                self._epoch += 1
+                removed = len(self._entries)
+                self._entries.clear()
+                return removed
+            self._generations.update(tables)
+            stale = [key for key, entry in self._entries.items() if entry[1].intersection(tables)]
+            for key in stale:
+                del self._entries[key]
+            return len(stale)
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "max_entries": self.max_entries,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+                "coalesced_loads": self.flights.coalesced,
+            }
+
+
+catalog_cache = QueryCache()
@@ -1,7 +1,7 @@
 # cleanup.py
 from datetime import datetime, timedelta
 import logging
-from db.database import supabase_client
+from db.database import execute, supabase_client
 
 logger = logging.getLogger(__name__)
 
@@ -14,7 +14,7 @@ async def cleanup_unverified_users():
         cutoff_date = (datetime.utcnow() - timedelta(days=7)).isoformat()
         
         # Get unverified users created before cutoff date
-        response = supabase_client.table("users").select("email").eq("is_verified", False).lt("created_at", cutoff_date).execute()
+        response = await execute(supabase_client.table("users").select("email").eq("is_verified", False).lt("created_at", cutoff_date))
         
         if not response.data or len(response.data) == 0:
             logger.info("No unverified users to clean up")
@@ -25,10 +25,10 @@ async def cleanup_unverified_users():
         logger.info(f"Cleaning up {len(emails)} unverified users")
         
         # Delete verification codes
-        supabase_client.table("email_verification").delete().in_("email", emails).execute()
+        await execute(supabase_client.table("email_verification").delete().in_("email", emails))
         
         # Delete users
-        supabase_client.table("users").delete().in_("email", emails).execute()
+        await execute(supabase_client.table("users").delete().in_("email", emails))
         
         logger.info(f"Successfully cleaned up {len(emails)} unverified users")
     except Exception as e:
@@ -0,0 +1,75 @@
+#core/conditional.py
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+import orjson
+from email.utils import formatdate, parsedate_to_datetime
+from fastapi import Response
+from core.responses import ORJSON_OPTIONS
+
+# Headers a 304 must repeat so clients can keep revalidating / paging
+VALIDATOR_HEADERS = ("ETag", "Last-Modified", "Cache-Control")
+MAX_TRACKED_ETAGS = 4096
+
+# ETag -> when that content was first loaded, so a TTL reload of unchanged
+# data keeps its Last-Modified and If-Modified-Since clients stay current
+_first_seen = OrderedDict()
+_first_seen_lock = threading.Lock()
+
+
+def first_seen(etag: str, now: float) -> float:
+    with _first_seen_lock:
+        modified_at = _first_seen.setdefault(etag, now)
+        _first_seen.move_to_end(etag)
+        while len(_first_seen) > MAX_TRACKED_ETAGS:
+            _first_seen.popitem(last=False)
+        return modified_at
+
+
+def with_validators(loader):
+    """
+    Wrap a cache loader so the cached value carries a strong ETag (content
+    hash) and the time that content was first loaded. The hash is computed
+    once per load, so conditional hits never serialize the body.
+    """
+    def load():
+        value = loader()
+        body = orjson.dumps(value, default=str, option=ORJSON_OPTIONS | orjson.OPT_SORT_KEYS)
+        etag = '"' + hashlib.sha256(body).hexdigest()[:32] + '"'
+        return value, etag, first_seen(etag, time.time())
+    return load
+
+
+def etag_matches(etag: str, if_none_match: str) -> bool:
+    if if_none_match.strip() == "*":
+        return True
+    candidates = (tag.strip() for tag in if_none_match.split(","))
+    return any(tag.removeprefix("W/") == etag for tag in candidates)
+
+
+def not_modified(response: Response, etag: str, modified_at: float, max_age: int,
+                 if_none_match: str = None, if_modified_since: str = None, extra_headers=()):
+    """
+    Set validator and Cache-Control headers on `response` and return a bare
+    304 Response when the client's copy is current, or None otherwise.
+    If-None-Match wins over If-Modified-Since, as in RFC 9110.
+    """
+    response.headers["ETag"] = etag
+    response.headers["Last-Modified"] = formatdate(modified_at, usegmt=True)
+    response.headers["Cache-Control"] = f"public, max-age={max_age}"
+
+    if if_none_match is not None:
+        fresh = etag_matches(etag, if_none_match)
+    elif if_modified_since:
+        try:
+            fresh = int(modified_at) <= parsedate_to_datetime(if_modified_since).timestamp()
+        except (TypeError, ValueError):
+            fresh = False
+    else:
+        fresh = False
+
+    if not fresh:
+        return None
+    headers = {name: response.headers[name] for name in VALIDATOR_HEADERS + tuple(extra_headers) if name in response.headers}
+    return Response(status_code=304, headers=headers)
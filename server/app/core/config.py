@@ -13,5 +13,22 @@ class Settings:
     ACCESS_TOKEN_EXPIRE_MINUTES = 30
     SENDER_EMAIL = os.getenv("SENDER_EMAIL")
     SENDER_PASSWORD = os.getenv("SENDER_PASSWORD")
+    ADMIN_API_KEY = os.getenv("ADMIN_API_KEY")
+    DB_MAX_WORKERS = int(os.getenv("DB_MAX_WORKERS", "32"))
+    # HTTP transport shared by every Supabase call
+    SUPABASE_POOL_SIZE = int(os.getenv("SUPABASE_POOL_SIZE", "64"))
+    SUPABASE_MAX_KEEPALIVE = int(os.getenv("SUPABASE_MAX_KEEPALIVE", "32"))
+    SUPABASE_KEEPALIVE_EXPIRY = float(os.getenv("SUPABASE_KEEPALIVE_EXPIRY", "60"))
+    SUPABASE_CONNECT_TIMEOUT = float(os.getenv("SUPABASE_CONNECT_TIMEOUT", "5"))
+    SUPABASE_READ_TIMEOUT = float(os.getenv("SUPABASE_READ_TIMEOUT", "30"))
+    SUPABASE_HTTP2 = os.getenv("SUPABASE_HTTP2", "true").lower() in ("1", "true", "yes")
+    SUPABASE_WARM_CONNECTIONS = int(os.getenv("SUPABASE_WARM_CONNECTIONS", "4"))
+    # PostgREST's max-rows: no response carries more rows than this
+    SUPABASE_MAX_ROWS = int(os.getenv("SUPABASE_MAX_ROWS", "1000"))
+    # Timezone the event calendar's dates and times are written in
+    APP_TIMEZONE = os.getenv("APP_TIMEZONE", "Asia/Manila")
+    # bcrypt work factor for new hashes; older hashes are upgraded on login
+    BCRYPT_ROUNDS = int(os.getenv("BCRYPT_ROUNDS", "12"))
+    PASSWORD_HASH_WORKERS = int(os.getenv("PASSWORD_HASH_WORKERS", str(min(4, os.cpu_count() or 1))))
     
 settings = Settings()
\ No newline at end of file
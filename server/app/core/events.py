@@ -0,0 +1,176 @@
+#core/events.py
+import bisect
+import logging
+import threading
+from collections import defaultdict
+from datetime import datetime
+from zoneinfo import ZoneInfo
+from core.config import settings
+from db.database import run_blocking, supabase_client
+from core.cache import catalog_cache
+from core.pagination import fetch_all
+from core.singleflight import SingleFlight
+
+logger = logging.getLogger(__name__)
+
+EVENT_SELECT = (
+    "id, title, date, start_time, end_time, location, category, description, image_url, "
+    "ticket_availability, entrance_fee, town"
+)
+HIGHLIGHT_SELECT = "id, event_id, title, description, icon"
+LOAD_PAGE_SIZE = 1000
+
+
+def schedule_key(event: dict):
+    # ISO dates and times sort correctly as strings
+    return str(event.get("date") or ""), str(event.get("start_time") or "")
+
+
+class EventCalendar:
+    """
+    Events sorted by (date, start_time), overall and per town, with a
+    parallel list of dates so a date range is two bisects instead of a
+    scan. Rebuilt whole and swapped in on refresh.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.clear()
+
+    def clear(self):
+        self.events = None
+        self.highlights = {}
+        self._dates = []
+        self._by_town = {}
+
+    @property
+    def loaded(self) -> bool:
+        return self.events is not None
+
+    def __len__(self):
+        return len(self.events or [])
+
+    def replace(self, events: list, highlights: dict = None) -> bool:
+        """
+        Rebuild the calendar from `events` and, when given, the event id ->
+        highlights map. Returns True if the events changed.
+        """
+        ordered = sorted(events, key=schedule_key)
+        by_town = defaultdict(list)
+        for event in ordered:
+            by_town[str(event.get("town"))].append(event)
+        towns = {town: ([schedule_key(e)[0] for e in rows], rows) for town, rows in by_town.items()}
+        with self._lock:
+            changed = ordered != self.events
+            self.events = ordered
+            self._dates = [schedule_key(event)[0] for event in ordered]
+            self._by_town = towns
+            if highlights is not None:
+                self.highlights = highlights
+        return changed
+
+    def between(self, start=None, end=None, town: str = None, category: str = None) -> list:
+        """
+        Events dated within [start, end] (ISO date strings or dates, either
+        bound optional), in calendar order, optionally for one town and/or
+        category.
+        """
+        if town is None:
+            dates, events = self._dates, self.events or []
+        else:
+            dates, events = self._by_town.get(str(town), ([], []))
+        low = bisect.bisect_left(dates, str(start)) if start is not None else 0
+        high = bisect.bisect_right(dates, str(end)) if end is not None else len(dates)
+        selected = events[low:high]
+        if category is not None:
+            wanted = category.lower()
+            selected = [event for event in selected if (event.get("category") or "").lower() == wanted]
+        return selected
+
+    def upcoming(self, limit: int, now: datetime = None, town: str = None, category: str = None) -> list:
+        """
+        The next `limit` events that have not ended yet, soonest first.
+        Event dates and times are local to settings.APP_TIMEZONE; an aware
+        `now` is converted to it, a naive one is taken as already local.
+        """
+        timezone = ZoneInfo(settings.APP_TIMEZONE)
+        now = datetime.now(timezone) if now is None else now
+        if now.tzinfo is not None:
+            now = now.astimezone(timezone)
+        today, current_time = now.date().isoformat(), now.time().isoformat(timespec="seconds")
+        upcoming = []
+        for event in self.between(start=today, town=town, category=category):
+            if str(event.get("date")) == today and str(event.get("end_time") or "99") < current_time:
+                continue
+            upcoming.append(event)
+            if len(upcoming) == limit:
+                break
+        return upcoming
+
+
+event_calendar = EventCalendar()
+calendar_loads = SingleFlight()
+
+
+def group_highlights(event_ids, highlights: list) -> dict:
+    grouped = {str(event_id): [] for event_id in event_ids}
+    for highlight in highlights:
+        grouped.setdefault(str(highlight["event_id"]), []).append(highlight)
+    return grouped
+
+
+def fetch_highlights_by_event(event_ids) -> dict:
+    """
+    Highlights for several events with one in_() query, grouped by event id.
+    Every requested id gets an entry, empty when it has no highlights.
+    """
+    event_ids = sorted({str(event_id) for event_id in event_ids})
+    if not event_ids:
+        return {}
+    response = supabase_client.table("festival_highlights").select(HIGHLIGHT_SELECT).in_("event_id", event_ids).execute()
+    return group_highlights(event_ids, response.data or [])
+
+
+def attach_highlights(events: list) -> list:
+    """
+    Copy `events` with a "highlights" list on each. Highlights come from the
+    map refreshed with the calendar; events it does not know yet (added
+    since the last refresh) are fetched together in one batched query.
+    """
+    known = event_calendar.highlights
+    missing = [event["id"] for event in events if str(event["id"]) not in known]
+    fetched = fetch_highlights_by_event(missing) if missing else {}
+    return [
+        dict(event, highlights=known.get(str(event["id"])) or fetched.get(str(event["id"]), []))
+        for event in events
+    ]
+
+
+def load_event_calendar():
+    events = fetch_all(lambda: supabase_client.table("events").select(EVENT_SELECT), "id", LOAD_PAGE_SIZE)
+    highlights = fetch_all(lambda: supabase_client.table("festival_highlights").select(HIGHLIGHT_SELECT), "id", LOAD_PAGE_SIZE)
+    grouped = group_highlights((event["id"] for event in events), highlights)
+    highlights_changed = grouped != event_calendar.highlights
+    changed = event_calendar.replace(events, grouped)
+    if changed:
+        catalog_cache.invalidate("events")
+    if highlights_changed:
+        catalog_cache.invalidate("festival_highlights")
+    return changed or highlights_changed
+
+
+def ensure_event_calendar():
+    """
+    Load the calendar if it has not been loaded yet. Cheap once loaded.
+    """
+    if not event_calendar.loaded:
+        calendar_loads.do("event_calendar", load_event_calendar)
+    return event_calendar
+
+
+async def refresh_event_calendar():
+    try:
+        changed = await run_blocking(load_event_calendar)
+        logger.info(f"Event calendar refreshed: {len(event_calendar)} events (changed: {changed})")
+    except Exception as e:
+        logger.error(f"Error refreshing event calendar: {str(e)}")
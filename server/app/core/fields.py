@@ -0,0 +1,126 @@
+#core/fields.py
+from fastapi import HTTPException
+
+
+class FieldSet:
+    """
+    Sparse fieldset support for one resource. `fields` is a comma separated
+    list of field names and/or preset names; it resolves to the upstream
+    select() projection plus the set of keys to keep in the response.
+    Computed fields name the columns they are derived from so those are
+    still fetched when only the computed field was asked for.
+    """
+
+    def __init__(self, key: str, columns: dict, computed: dict, presets: dict):
+        self.key = key
+        self.columns = columns
+        self.computed = computed
+        self.presets = presets
+
+    def resolve(self, fields: str = None):
+        """
+        Return the requested field names, or None when no fieldset was
+        given and the endpoint should behave exactly as before.
+        """
+        if not fields:
+            return None
+        requested = set()
+        for name in (part.strip() for part in fields.split(",")):
+            if not name:
+                continue
+            if name in self.presets:
+                requested.update(self.presets[name])
+            elif name in self.columns or name in self.computed:
+                requested.add(name)
+            else:
+                raise HTTPException(status_code=400, detail=f"Unknown field: {name}")
+        requested.add(self.key)
+        return frozenset(requested)
+
+    def select(self, requested, default: str) -> str:
+        if requested is None:
+            return default
+        needed = {self.key}
+        for name in requested:
+            needed.update(self.computed.get(name, (name,)))
+        return ", ".join(self.columns[name] for name in self.columns if name in needed)
+
+    @staticmethod
+    def wants(requested, *names) -> bool:
+        return requested is None or any(name in requested for name in names)
+
+    @staticmethod
+    def project(rows: list, requested, extra=()) -> list:
+        """
+        Copy each row keeping only requested keys (plus `extra`, e.g. a
+        relevance score). Rows are returned untouched when requested is None.
+        """
+        if requested is None:
+            return rows
+        keep = requested.union(extra)
+        return [{name: value for name, value in row.items() if name in keep} for row in rows]
+
+
+PRODUCT_FIELDS = FieldSet(
+    key="id",
+    columns={
+        "id": "id",
+        "name": "name",
+        "description": "description",
+        "category": "category",
+        "price_min": "price_min",
+        "price_max": "price_max",
+        "ar_asset_url": "ar_asset_url",
+        "image_urls": "image_urls",
+        "address": "address",
+        "in_stock": "in_stock",
+        "store_id": "store_id",
+        "town": "town",
+        "views": "views",
+        "stores": "stores(name, store_id, latitude, longitude, store_image, type, rating, town)",
+    },
+    computed={
+        "average_rating": ("id",),
+        "total_reviews": ("id",),
+        "thumbnail": ("image_urls",),
+    },
+    presets={
+        "card": ("id", "name", "thumbnail", "price_min", "price_max", "average_rating", "total_reviews"),
+        "detail": (
+            "id", "name", "description", "category", "price_min", "price_max", "ar_asset_url", "image_urls",
+            "address", "in_stock", "store_id", "stores", "average_rating", "total_reviews",
+        ),
+    },
+)
+
+STORE_FIELDS = FieldSet(
+    key="store_id",
+    columns={
+        "store_id": "store_id",
+        "name": "name",
+        "description": "description",
+        "latitude": "latitude",
+        "longitude": "longitude",
+        "rating": "rating",
+        "store_image": "store_image",
+        "type": "type",
+        "operating_hours": "operating_hours",
+        "phone": "phone",
+        "town": "town",
+    },
+    computed={},
+    presets={
+        "card": ("store_id", "name", "store_image", "rating", "type", "town"),
+        "detail": (
+            "store_id", "name", "description", "latitude", "longitude", "rating", "store_image", "type",
+            "operating_hours", "phone", "town",
+        ),
+    },
+)
+
+
+def add_thumbnails(products: list) -> list:
+    for product in products:
+        images = product.get("image_urls") or []
+        product["thumbnail"] = images[0] if images else None
+    return products
@@ -0,0 +1,174 @@
+#core/geo.py
+import heapq
+import logging
+import math
+import threading
+from collections import defaultdict
+from db.database import run_blocking, supabase_client
+from core.cache import catalog_cache
+from core.pagination import fetch_all
+from core.search import store_index
+from core.singleflight import SingleFlight
+
+logger = logging.getLogger(__name__)
+
+EARTH_RADIUS_KM = 6371.0088
+KM_PER_DEGREE = 111.32
+# Grid cell edge in degrees (~11 km at the equator); a radius query only
+# measures distances for stores in the cells its bounding box touches
+CELL_DEGREES = 0.1
+LOAD_PAGE_SIZE = 1000
+STORE_LOCATION_SELECT = (
+    "store_id, name, description, latitude, longitude, rating, store_image, type, operating_hours, phone, town"
+)
+
+
+def haversine_km(lat1: float, lon1: float, lat2: float, lon2: float) -> float:
+    lat1, lon1, lat2, lon2 = map(math.radians, (lat1, lon1, lat2, lon2))
+    a = math.sin((lat2 - lat1) / 2) ** 2 + math.cos(lat1) * math.cos(lat2) * math.sin((lon2 - lon1) / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * math.asin(min(1.0, math.sqrt(a)))
+
+
+def cell_of(lat: float, lon: float):
+    return math.floor(lat / CELL_DEGREES), math.floor(lon / CELL_DEGREES)
+
+
+def coordinates(store: dict):
+    """
+    Return (lat, lon) as floats, or None when the store has no usable location.
+    """
+    try:
+        lat, lon = float(store["latitude"]), float(store["longitude"])
+    except (KeyError, TypeError, ValueError):
+        return None
+    if not (-90 <= lat <= 90 and -180 <= lon <= 180):
+        return None
+    return lat, lon
+
+
+class StoreLocator:
+    """
+    Uniform lat/lon grid over store locations. Stores are bucketed by cell
+    on rebuild; queries visit only the cells overlapping the search box and
+    compute exact great-circle distances for the stores found there. The
+    grid is swapped in whole, so readers never see a partial rebuild.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.clear()
+
+    def clear(self):
+        self.stores = None
+        self._cells = {}
+
+    @property
+    def loaded(self) -> bool:
+        return self.stores is not None
+
+    def __len__(self):
+        return len(self.stores or [])
+
+    def replace(self, stores: list) -> bool:
+        """
+        Rebuild the grid from `stores`. Returns True if the data changed.
+        """
+        cells = defaultdict(list)
+        for store in stores:
+            location = coordinates(store)
+            if location is not None:
+                cells[cell_of(*location)].append((location[0], location[1], store))
+        with self._lock:
+            changed = stores != self.stores
+            self.stores = stores
+            self._cells = dict(cells)
+        return changed
+
+    def _candidates(self, min_lat, min_lon, max_lat, max_lon):
+        low_row, low_col = cell_of(min_lat, min_lon)
+        high_row, high_col = cell_of(max_lat, max_lon)
+        cells = self._cells
+        # Wide boxes touch more grid cells than there are occupied ones
+        if (high_row - low_row + 1) * (high_col - low_col + 1) > len(cells):
+            keys = [key for key in cells if low_row <= key[0] <= high_row and low_col <= key[1] <= high_col]
+        else:
+            keys = [(row, col) for row in range(low_row, high_row + 1) for col in range(low_col, high_col + 1)]
+        for key in keys:
+            for lat, lon, store in cells.get(key, ()):
+                if min_lat <= lat <= max_lat and min_lon <= lon <= max_lon:
+                    yield lat, lon, store
+
+    @staticmethod
+    def _matches(store: dict, store_type: str = None, town: str = None) -> bool:
+        if store_type is not None and (store.get("type") or "").lower() != store_type.lower():
+            return False
+        if town is not None and str(store.get("town")) != str(town):
+            return False
+        return True
+
+    def nearby(self, lat: float, lon: float, radius_km: float, limit: int, store_type: str = None, town: str = None) -> list:
+        """
+        Return up to `limit` (store, distance_km) pairs within radius_km of
+        (lat, lon), nearest first.
+        """
+        lat_delta = radius_km / KM_PER_DEGREE
+        lon_delta = radius_km / (KM_PER_DEGREE * max(math.cos(math.radians(lat)), 1e-6))
+        hits = []
+        for store_lat, store_lon, store in self._candidates(
+            max(lat - lat_delta, -90), max(lon - lon_delta, -180), min(lat + lat_delta, 90), min(lon + lon_delta, 180)
+        ):
+            if not self._matches(store, store_type, town):
+                continue
+            distance = haversine_km(lat, lon, store_lat, store_lon)
+            if distance <= radius_km:
+                hits.append((distance, store))
+        return [(store, distance) for distance, store in heapq.nsmallest(limit, hits, key=lambda hit: hit[0])]
+
+    def in_bbox(self, min_lat: float, min_lon: float, max_lat: float, max_lon: float, limit: int,
+                lat: float = None, lon: float = None, store_type: str = None, town: str = None) -> list:
+        """
+        Return up to `limit` (store, distance_km) pairs inside the box,
+        nearest to (lat, lon) first, or to the box centre when no point is given.
+        """
+        if lat is None or lon is None:
+            lat, lon = (min_lat + max_lat) / 2, (min_lon + max_lon) / 2
+        hits = [
+            (haversine_km(lat, lon, store_lat, store_lon), store)
+            for store_lat, store_lon, store in self._candidates(min_lat, min_lon, max_lat, max_lon)
+            if self._matches(store, store_type, town)
+        ]
+        return [(store, distance) for distance, store in heapq.nsmallest(limit, hits, key=lambda hit: hit[0])]
+
+
+store_locator = StoreLocator()
+index_loads = SingleFlight()
+
+
+def load_store_indexes():
+    """
+    Page through the stores table once and rebuild both in-memory store
+    indexes: the spatial grid here and the name index in core/search.py.
+    """
+    stores = fetch_all(lambda: supabase_client.table("stores").select(STORE_LOCATION_SELECT), "store_id", LOAD_PAGE_SIZE)
+    changed = store_locator.replace(stores)
+    store_index.replace(stores)
+    if changed:
+        catalog_cache.invalidate("stores")
+    return changed
+
+
+def ensure_store_indexes():
+    """
+    Load both store indexes if either has not been loaded yet. Cheap once loaded.
+    """
+    if not store_locator.loaded or not store_index.loaded:
+        index_loads.do("store_indexes", load_store_indexes)
+    return store_locator
+
+
+async def refresh_store_indexes():
+    try:
+        changed = await run_blocking(load_store_indexes)
+        logger.info(f"Store indexes rebuilt for {len(store_locator)} stores (changed: {changed})")
+    except Exception as e:
+        logger.error(f"Error rebuilding store indexes: {str(e)}")
@@ -0,0 +1,114 @@
+#core/identity.py
+import threading
+import time
+from collections import OrderedDict
+import jwt
+from core.config import settings
+from db.database import run_query, supabase_client
+
+# Seconds an email -> user id mapping is trusted before it is looked up again
+USER_ID_TTL_SECONDS = 300
+MAX_TOKENS = 4096
+MAX_USER_IDS = 4096
+
+
+def local_token_email(token: str):
+    """
+    Verify one of our own HS256 access tokens without a network call and
+    return its subject (the user's email), or None when the token was not
+    signed by us. Our own expired tokens raise jwt.ExpiredSignatureError.
+    """
+    try:
+        payload = jwt.decode(token, settings.SECRET_KEY, algorithms=[settings.ALGORITHM])
+    except jwt.ExpiredSignatureError:
+        raise
+    except (jwt.PyJWTError, TypeError, ValueError):
+        return None
+    return payload.get("sub") or None
+
+
+def token_expiry(token: str):
+    # Only read after Supabase has verified the token, so the signature is not rechecked
+    try:
+        exp = jwt.decode(token, options={"verify_signature": False}).get("exp")
+    except jwt.PyJWTError:
+        return None
+    return float(exp) if exp is not None else None
+
+
+class IdentityCache:
+    """
+    Two small LRUs in front of the authentication round trips: Supabase
+    tokens that already passed auth.get_user (kept until the token's own
+    exp) and email -> user id (kept for USER_ID_TTL_SECONDS).
+    """
+
+    def __init__(self, max_tokens: int = MAX_TOKENS, max_user_ids: int = MAX_USER_IDS,
+                 user_id_ttl: float = USER_ID_TTL_SECONDS, clock=time.time):
+        self.max_tokens = max_tokens
+        self.max_user_ids = max_user_ids
+        self.user_id_ttl = user_id_ttl
+        self.clock = clock
+        self._lock = threading.Lock()
+        self.clear()
+
+    def clear(self):
+        with self._lock:
+            self._tokens = OrderedDict()
+            self._user_ids = OrderedDict()
+
+    @staticmethod
+    def _get(entries: OrderedDict, key, now):
+        entry = entries.get(key)
+        if entry is None:
+            return None
+        if entry[0] <= now:
+            del entries[key]
+            return None
+        entries.move_to_end(key)
+        return entry[1]
+
+    @staticmethod
+    def _put(entries: OrderedDict, key, expires_at, value, max_entries):
+        entries[key] = (expires_at, value)
+        entries.move_to_end(key)
+        while len(entries) > max_entries:
+            entries.popitem(last=False)
+
+    def token_email(self, token: str):
+        with self._lock:
+            return self._get(self._tokens, token, self.clock())
+
+    def remember_token(self, token: str, email: str):
+        expires_at = token_expiry(token)
+        if expires_at is None or expires_at <= self.clock():
+            return
+        with self._lock:
+            self._put(self._tokens, token, expires_at, email, self.max_tokens)
+
+    def user_id(self, email: str):
+        with self._lock:
+            return self._get(self._user_ids, email, self.clock())
+
+    def remember_user_id(self, email: str, user_id):
+        with self._lock:
+            self._put(self._user_ids, email, self.clock() + self.user_id_ttl, user_id, self.max_user_ids)
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {"tokens": len(self._tokens), "user_ids": len(self._user_ids)}
+
+
+identity_cache = IdentityCache()
+
+
+def load_user_id(email: str):
+    """
+    Look up the user id for `email` and cache it; None when there is no such user.
+    """
+    response = run_query(supabase_client.table("users").select("id").eq("email", email))
+    if not response.data:
+        return None
+    user_id = response.data[0]["id"]
+    identity_cache.remember_user_id(email, user_id)
+    return user_id
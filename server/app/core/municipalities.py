@@ -0,0 +1,102 @@
+#core/municipalities.py
+import logging
+import threading
+import time
+from db.database import run_blocking, supabase_client
+from core.cache import catalog_cache
+from core.singleflight import SingleFlight
+from core.search import tokenize
+
+logger = logging.getLogger(__name__)
+
+# Municipalities rarely change; the scheduler reloads them on this interval
+# and processes without a scheduler (the chatbot) reload when older than it
+REFRESH_INTERVAL_SECONDS = 3600
+
+
+def name_key(name: str) -> str:
+    """
+    Normalised lookup key for a municipality name: case, accents and
+    punctuation are ignored, so "San Fernando" and "san  fernando." agree.
+    """
+    return " ".join(tokenize(name))
+
+
+class MunicipalityRegistry:
+    """
+    The whole municipalities table held in memory, with id -> record and
+    normalised name -> id maps. Maps are swapped in together on reload.
+    """
+
+    def __init__(self, clock=time.monotonic):
+        self.clock = clock
+        self._lock = threading.Lock()
+        self.clear()
+
+    def clear(self):
+        self._by_id = {}
+        self._ids_by_name = {}
+        self.loaded_at = None
+
+    @property
+    def loaded(self) -> bool:
+        return self.loaded_at is not None
+
+    def is_stale(self, max_age: float = REFRESH_INTERVAL_SECONDS) -> bool:
+        return self.loaded_at is None or self.clock() - self.loaded_at > max_age
+
+    def __len__(self):
+        return len(self._by_id)
+
+    def replace(self, municipalities: list) -> bool:
+        """
+        Swap in a fresh copy of the table. Returns True if anything changed.
+        """
+        by_id = {str(row["id"]): row for row in municipalities}
+        ids_by_name = {name_key(row.get("name")): str(row["id"]) for row in municipalities if row.get("name")}
+        with self._lock:
+            changed = by_id != self._by_id
+            self._by_id, self._ids_by_name = by_id, ids_by_name
+            self.loaded_at = self.clock()
+        return changed
+
+    def get(self, municipality_id):
+        return self._by_id.get(str(municipality_id))
+
+    def resolve(self, name: str):
+        """
+        Return the id of the municipality called `name`, or None.
+        """
+        return self._ids_by_name.get(name_key(name))
+
+    def all(self) -> list:
+        return list(self._by_id.values())
+
+
+municipality_registry = MunicipalityRegistry()
+registry_loads = SingleFlight()
+
+
+def load_municipalities():
+    response = supabase_client.table("municipalities").select("*").execute()
+    changed = municipality_registry.replace(response.data or [])
+    if changed:
+        catalog_cache.invalidate("municipalities")
+    return changed
+
+
+def ensure_municipalities(max_age: float = REFRESH_INTERVAL_SECONDS):
+    """
+    Load the registry if it is empty or older than max_age. Cheap when fresh.
+    """
+    if municipality_registry.is_stale(max_age):
+        registry_loads.do("municipalities", load_municipalities)
+    return municipality_registry
+
+
+async def refresh_municipalities():
+    try:
+        changed = await run_blocking(load_municipalities)
+        logger.info(f"Municipality registry refreshed: {len(municipality_registry)} municipalities (changed: {changed})")
+    except Exception as e:
+        logger.error(f"Error refreshing municipality registry: {str(e)}")
@@ -0,0 +1,148 @@
+#core/pagination.py
+import base64
+import json
+from fastapi import HTTPException
+from core.config import settings
+from db.database import run_query
+
+DEFAULT_PAGE_SIZE = 100
+MAX_PAGE_SIZE = 1000
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+
+
+def encode_cursor(last_key) -> str:
+    raw = json.dumps({"after": last_key}, separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def is_key_value(value) -> bool:
+    return isinstance(value, (str, int, float)) and not isinstance(value, bool)
+
+
+def decode_cursor(cursor: str, compound: bool = False):
+    """
+    Return the key encoded in an opaque cursor, or None when no cursor was
+    given. The key must be a single string/number, or with compound=True a
+    list of them (fetch_keyset_page). Malformed cursors are a client error.
+    """
+    if not cursor:
+        return None
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        after = json.loads(base64.urlsafe_b64decode(padded.encode()))["after"]
+    except (ValueError, KeyError, TypeError):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    valid = (
+        isinstance(after, list) and bool(after) and all(is_key_value(value) for value in after)
+        if compound else is_key_value(after)
+    )
+    if not valid:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    return after
+
+
+def page_size(limit: int) -> int:
+    # limit + 1 rows are requested per page, and PostgREST silently caps a
+    # response at max-rows, so a page must stay below it or the probe row
+    # (and with it every later page) is lost
+    return max(1, min(limit, settings.SUPABASE_MAX_ROWS - 1))
+
+
+def fetch_page(query, key: str, after, limit: int):
+    """
+    Run a keyset-paginated query ordered by `key` and return (rows, next_cursor).
+    One extra row is requested so next_cursor is only set when another page
+    actually exists. Pages larger than max-rows allows are shortened.
+    """
+    limit = page_size(limit)
+    query = query.order(key)
+    if after is not None:
+        query = query.gt(key, after)
+    rows = run_query(query.limit(limit + 1)).data or []
+
+    if len(rows) <= limit:
+        return rows, None
+    rows = rows[:limit]
+    return rows, encode_cursor(rows[-1][key])
+
+
+def quote_value(value) -> str:
+    return '"' + str(value).replace('"', '\\"') + '"'
+
+
+def keyset_filter(order, last) -> str:
+    """
+    PostgREST or=() expression selecting the rows that come after `last` (one
+    value per ordering column) for a multi-column ordering such as
+    [("created_at", True), ("id", True)]: a < x OR (a = x AND b < y) ...
+    """
+    clauses = []
+    for position, (column, descending) in enumerate(order):
+        terms = [f"{name}.eq.{quote_value(value)}" for (name, _), value in zip(order[:position], last)]
+        terms.append(f"{column}.{'lt' if descending else 'gt'}.{quote_value(last[position])}")
+        clauses.append(terms[0] if len(terms) == 1 else f"and({','.join(terms)})")
+    return ",".join(clauses)
+
+
+def fetch_keyset_page(query, order, after, limit: int):
+    """
+    fetch_page for a compound ordering given as [(column, descending), ...].
+    The cursor carries the last row's value for every ordering column, so
+    the last column should be unique (e.g. id) to break ties. Besides the
+    or() tree, the leading column gets a plain range bound (redundant, but
+    it lets Postgres start an index scan at the cursor instead of filtering
+    every earlier row).
+    """
+    limit = page_size(limit)
+    for column, descending in order:
+        query = query.order(column, desc=descending)
+    if after is not None:
+        if not isinstance(after, list) or len(after) != len(order):
+            raise HTTPException(status_code=400, detail="Invalid cursor")
+        leading, descending = order[0]
+        query = query.lte(leading, after[0]) if descending else query.gte(leading, after[0])
+        query = query.or_(keyset_filter(order, after))
+    rows = run_query(query.limit(limit + 1)).data or []
+
+    if len(rows) <= limit:
+        return rows, None
+    rows = rows[:limit]
+    return rows, encode_cursor([rows[-1][column] for column, _ in order])
+
+
+def fetch_all(build_query, key: str, page_size: int = MAX_PAGE_SIZE) -> list:
+    """
+    Walk a whole table with keyset pagination. build_query() must return a
+    fresh query (select + filters) for every page.
+    """
+    rows, after = [], None
+    while True:
+        page, next_cursor = fetch_page(build_query(), key, after, page_size)
+        rows.extend(page)
+        if next_cursor is None:
+            return rows
+        after = page[-1][key]
+
+
+def fetch_keyset_all(build_query, order, page_size: int = MAX_PAGE_SIZE) -> list:
+    """
+    fetch_all for a compound ordering; rows come back in `order`.
+    """
+    rows, after = [], None
+    while True:
+        page, next_cursor = fetch_keyset_page(build_query(), order, after, page_size)
+        rows.extend(page)
+        if next_cursor is None:
+            return rows
+        after = [page[-1][column] for column, _ in order]
+
+
+def fetch_page_or_all(build_query, key: str, after, limit):
+    """
+    One keyset page when the client asked for paging (a limit or a cursor),
+    otherwise the whole table, so callers that predate pagination still get
+    every row. Returns (rows, next_cursor).
+    """
+    if limit is None and after is None:
+        return fetch_all(build_query, key), None
+    return fetch_page(build_query(), key, after, limit or DEFAULT_PAGE_SIZE)
@@ -0,0 +1,124 @@
+#core/popularity.py
+import heapq
+import logging
+import math
+import threading
+from datetime import datetime
+from db.database import run_blocking, supabase_client
+from core.pagination import fetch_page
+from core.ratings import fetch_rating_totals, format_average_rating
+from core.singleflight import SingleFlight
+
+logger = logging.getLogger(__name__)
+
+# Reviews' worth of the catalog-wide mean rating every product starts with,
+# so a single 5.0 review cannot outrank ten reviews averaging 4.9
+PRIOR_REVIEWS = 5
+RATING_WEIGHT = 0.6
+VIEW_WEIGHT = 0.25
+REVIEW_COUNT_WEIGHT = 0.15
+LOAD_PAGE_SIZE = 1000
+
+
+def bayesian_rating(rating_sum: float, rating_count: int, prior_mean: float, prior_reviews: int = PRIOR_REVIEWS) -> float:
+    return (prior_mean * prior_reviews + rating_sum) / (prior_reviews + rating_count)
+
+
+def popularity_score(rating: float, views: int, reviews: int, max_views: int, max_reviews: int) -> float:
+    """
+    Blend a 0-5 rating with log-scaled views and review counts into a 0-1 score.
+    """
+    view_share = math.log1p(views) / math.log1p(max_views) if max_views else 0.0
+    review_share = math.log1p(reviews) / math.log1p(max_reviews) if max_reviews else 0.0
+    return RATING_WEIGHT * rating / 5 + VIEW_WEIGHT * view_share + REVIEW_COUNT_WEIGHT * review_share
+
+
+class PopularityRanking:
+    """
+    Precomputed popularity scores for every product, swapped in atomically
+    on refresh and queried with a top-k heap.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.clear()
+
+    def clear(self):
+        self.products = []
+        self.refreshed_at = None
+
+    @property
+    def loaded(self) -> bool:
+        return self.refreshed_at is not None
+
+    def replace(self, products: list):
+        with self._lock:
+            self.products = products
+            self.refreshed_at = datetime.utcnow()
+
+    def top(self, k: int, town: str = None, category: str = None) -> list:
+        category = category.lower() if category else None
+        candidates = (
+            product for product in self.products
+            if (town is None or str(product.get("town")) == str(town))
+            and (category is None or (product.get("category") or "").lower() == category)
+        )
+        return heapq.nlargest(k, candidates, key=lambda product: (product["popularity_score"], product["total_reviews"]))
+
+
+popular_ranking = PopularityRanking()
+ranking_builds = SingleFlight()
+
+
+def compute_popularity():
+    """
+    Score every product from its rating summary and views, and publish the
+    result to popular_ranking.
+    """
+    products, totals, after = [], {}, None
+    while True:
+        query = supabase_client.table("products").select(
+            "id, name, description, category, price_min,price_max, ar_asset_url, image_urls, address, in_stock, store_id, town, views, "
+            "stores(name, store_id, latitude, longitude, store_image, type, rating)"
+        )
+        page, next_cursor = fetch_page(query, "id", after, LOAD_PAGE_SIZE)
+        products.extend(page)
+        totals.update(fetch_rating_totals([product["id"] for product in page]))
+        if next_cursor is None:
+            break
+        after = page[-1]["id"]
+
+    review_count = sum(count for _, count in totals.values())
+    prior_mean = sum(rating_sum for rating_sum, _ in totals.values()) / review_count if review_count else 0.0
+    max_views = max((product.get("views") or 0 for product in products), default=0)
+    max_reviews = max((count for _, count in totals.values()), default=0)
+
+    for product in products:
+        rating_sum, rating_count = totals.get(product["id"], (0.0, 0))
+        rating = bayesian_rating(rating_sum, rating_count, prior_mean)
+        product["average_rating"] = format_average_rating(rating_sum, rating_count)
+        product["total_reviews"] = rating_count
+        product["bayesian_rating"] = round(rating, 3)
+        product["popularity_score"] = round(
+            popularity_score(rating, product.get("views") or 0, rating_count, max_views, max_reviews), 6
+        )
+
+    popular_ranking.replace(products)
+    return products
+
+
+def ensure_popularity():
+    """
+    Compute the ranking if it has not been computed yet. Cheap once computed.
+    """
+    if not popular_ranking.loaded:
+        ranking_builds.do("popularity", compute_popularity)
+    return popular_ranking
+
+
+async def refresh_popularity():
+    try:
+        products = await run_blocking(compute_popularity)
+        logger.info(f"Popularity ranking refreshed for {len(products)} products")
+    except Exception as e:
+        logger.error(f"Error refreshing popularity ranking: {str(e)}")
@@ -0,0 +1,100 @@
+#core/ratings.py
+import logging
+from db.database import execute, run_blocking, run_query, supabase_client
+from core.cache import catalog_cache
+from core.pagination import fetch_page
+
+logger = logging.getLogger(__name__)
+
+SUMMARY_TABLE = "product_rating_summary"
+STAR_COLUMNS = ["star_1", "star_2", "star_3", "star_4", "star_5"]
+# Product ids per rebuild call; each call is one short transaction
+REBUILD_CHUNK = 500
+
+
+def format_average_rating(rating_sum: float, rating_count: int) -> str:
+    return "{:.1f}".format(round(rating_sum / rating_count, 1)) if rating_count else "0"
+
+
+def empty_summary() -> dict:
+    return dict.fromkeys(["rating_sum", "rating_count"] + STAR_COLUMNS, 0)
+
+
+def star_column(rating: float) -> str:
+    # Half-star ratings round up (4.5 counts as a 5-star review)
+    return STAR_COLUMNS[min(5, max(1, int(float(rating) + 0.5))) - 1]
+
+
+def fetch_rating_totals(product_ids: list) -> dict:
+    """
+    Return {product_id: (rating_sum, rating_count)} for every product id
+    with a single lookup on the rating summary table.
+    """
+    totals = {}
+    # Sorted so the same set of ids always builds the same (coalescable) query
+    ids = sorted({product_id for product_id in product_ids if product_id is not None})
+    if not ids:
+        return totals
+
+    response = run_query(
+        supabase_client.table(SUMMARY_TABLE)
+        .select("product_id, rating_sum, rating_count")
+        .in_("product_id", ids)
+    )
+
+    for row in response.data or []:
+        totals[row["product_id"]] = (float(row["rating_sum"]), int(row["rating_count"]))
+    return totals
+
+
+def attach_ratings(products: list) -> list:
+    """
+    Add average_rating and total_reviews to each product in place.
+    """
+    totals = fetch_rating_totals([product["id"] for product in products])
+    for product in products:
+        rating_sum, rating_count = totals.get(product["id"], (0.0, 0))
+        product["average_rating"] = format_average_rating(rating_sum, rating_count)
+        product["total_reviews"] = rating_count
+    return products
+
+
+def record_review_rating(product_id: int, rating: float):
+    """
+    Fold a newly created review into the summary table. Failures are only
+    logged; the periodic rebuild reconciles any drift.
+    """
+    try:
+        supabase_client.rpc("record_product_rating", {"p_product_id": product_id, "p_rating": rating}).execute()
+    except Exception as e:
+        logger.error(f"Error updating rating summary for product {product_id}: {str(e)}")
+
+
+async def rebuild_rating_summary():
+    """
+    Recompute product_rating_summary from the reviews table, one range of
+    REBUILD_CHUNK product ids at a time. Each range is rebuilt inside the
+    database (rebuild_product_rating_summary, migration 005) with only its
+    own summary rows locked, so concurrent reviews are neither overwritten
+    nor held up for the whole rebuild.
+    """
+    try:
+        rebuilt, after = 0, None
+        while True:
+            products, next_cursor = await run_blocking(
+                fetch_page, supabase_client.table("products").select("id"), "id", after, REBUILD_CHUNK
+            )
+            if not products:
+                break
+            response = await execute(supabase_client.rpc(
+                "rebuild_product_rating_summary", {"p_first_id": products[0]["id"], "p_last_id": products[-1]["id"]}
+            ))
+            rebuilt += response.data or 0
+            if next_cursor is None:
+                break
+            after = products[-1]["id"]
+
+        catalog_cache.invalidate("reviews")
+        logger.info(f"Rebuilt rating summary for {rebuilt} products")
+    except Exception as e:
+        logger.error(f"Error rebuilding rating summary: {str(e)}")
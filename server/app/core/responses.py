@@ -0,0 +1,20 @@
+#core/responses.py
+import orjson
+from fastapi.responses import JSONResponse
+
+ORJSON_OPTIONS = orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY
+
+
+def dumps(content) -> bytes:
+    return orjson.dumps(content, default=str, option=ORJSON_OPTIONS)
+
+
+class FastJSONResponse(JSONResponse):
+    """
+    App-wide default response class. Encodes with orjson, which is several
+    times faster than the stdlib encoder on large product lists and emits
+    compact UTF-8 without escaping non-ASCII names.
+    """
+
+    def render(self, content) -> bytes:
+        return dumps(content)
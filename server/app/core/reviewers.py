@@ -0,0 +1,79 @@
+#core/reviewers.py
+import threading
+from collections import OrderedDict
+from db.database import run_query, supabase_client
+
+MAX_REVIEWERS = 1024
+# Ids per users lookup: keeps the in_() list well inside URL limits
+LOOKUP_CHUNK = 100
+
+
+def full_name(user: dict) -> str:
+    return f"{user.get('first_name') or ''} {user.get('last_name') or ''}".strip()
+
+
+class ReviewerNames:
+    """
+    Small LRU of user id -> display name for review listings. A page of
+    reviews is usually written by a few recurring users, so names are
+    looked up once and reused instead of joining users on every page.
+    """
+
+    def __init__(self, max_entries: int = MAX_REVIEWERS):
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self.clear()
+
+    def clear(self):
+        with self._lock:
+            self._names = OrderedDict()
+            self.hits = 0
+            self.misses = 0
+
+    def forget(self, user_id):
+        with self._lock:
+            self._names.pop(str(user_id), None)
+
+    def _remember(self, names: dict):
+        with self._lock:
+            for user_id, name in names.items():
+                self._names[user_id] = name
+                self._names.move_to_end(user_id)
+            while len(self._names) > self.max_entries:
+                self._names.popitem(last=False)
+
+    def lookup(self, user_ids) -> dict:
+        """
+        Return {user_id: full_name} for the given ids. Ids not cached yet are
+        fetched with in_() queries of LOOKUP_CHUNK ids; unknown users map to "".
+        """
+        wanted = list(dict.fromkeys(str(user_id) for user_id in user_ids))
+        names, missing = {}, []
+        with self._lock:
+            for user_id in wanted:
+                if user_id in self._names:
+                    self._names.move_to_end(user_id)
+                    names[user_id] = self._names[user_id]
+                else:
+                    missing.append(user_id)
+            self.hits += len(names)
+            self.misses += len(missing)
+
+        missing.sort()
+        for start in range(0, len(missing), LOOKUP_CHUNK):
+            chunk = missing[start:start + LOOKUP_CHUNK]
+            response = run_query(
+                supabase_client.table("users").select("id, first_name, last_name").in_("id", chunk)
+            )
+            fetched = {user_id: "" for user_id in chunk}
+            fetched.update({str(user["id"]): full_name(user) for user in response.data or []})
+            self._remember(fetched)
+            names.update(fetched)
+        return names
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {"entries": len(self._names), "max_entries": self.max_entries, "hits": self.hits, "misses": self.misses}
+
+
+reviewer_names = ReviewerNames()
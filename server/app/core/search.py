@@ -0,0 +1,319 @@
+#core/search.py
+import logging
+import math
+import re
+import threading
+import unicodedata
+from collections import Counter, defaultdict
+from db.database import run_blocking, supabase_client
+from core.cache import catalog_cache
+from core.pagination import fetch_all
+from core.singleflight import SingleFlight
+
+logger = logging.getLogger(__name__)
+
+# How much a term occurrence counts towards BM25 term frequency, per field
+FIELD_WEIGHTS = {"name": 3.0, "category": 2.0, "store_name": 2.0, "description": 1.0}
+BM25_K1 = 1.2
+BM25_B = 0.75
+PREFIX_WEIGHT = 0.9
+MIN_TRIGRAM_SIMILARITY = 0.4
+MAX_EXPANSIONS = 5
+LOAD_PAGE_SIZE = 1000
+# Store name match types, best first, with the score each one starts from
+STORE_MATCH_SCORES = {"exact": 1.0, "prefix": 0.9, "token": 0.6, "fuzzy": 0.5}
+MIN_STORE_NAME_SIMILARITY = 0.3
+
+TOKEN_PATTERN = re.compile(r"[a-z0-9]+")
+
+
+def normalize(text: str) -> str:
+    text = unicodedata.normalize("NFKD", text or "")
+    return "".join(ch for ch in text if not unicodedata.combining(ch)).lower()
+
+
+def tokenize(text: str) -> list:
+    return TOKEN_PATTERN.findall(normalize(text))
+
+
+def trigrams(term: str) -> set:
+    padded = f"  {term} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+def product_fields(product: dict) -> dict:
+    store = product.get("stores") or {}
+    return {
+        "name": product.get("name") or "",
+        "category": product.get("category") or "",
+        "store_name": store.get("name") or "",
+        "description": product.get("description") or "",
+    }
+
+
+class ProductSearchIndex:
+    """
+    Inverted index over product name, category, store name and description.
+    Documents are weighted per field and ranked with BM25; query terms are
+    expanded to indexed terms they prefix, or resemble by trigram overlap,
+    so partial and misspelled searches still match.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.clear()
+
+    def clear(self):
+        self.docs = {}
+        self.loaded = False
+        self._fingerprints = {}
+        self._doc_terms = {}
+        self._doc_lengths = {}
+        self._postings = defaultdict(dict)
+        self._trigrams = defaultdict(set)
+        self._total_length = 0.0
+
+    def __len__(self):
+        return len(self.docs)
+
+    def _index_terms(self, product: dict) -> Counter:
+        terms = Counter()
+        for field, text in product_fields(product).items():
+            for token in tokenize(text):
+                terms[token] += FIELD_WEIGHTS[field]
+        return terms
+
+    def _remove(self, product_id):
+        terms = self._doc_terms.pop(product_id, None)
+        if terms is None:
+            return
+        for term in terms:
+            postings = self._postings[term]
+            postings.pop(product_id, None)
+            if not postings:
+                del self._postings[term]
+                for gram in trigrams(term):
+                    self._trigrams[gram].discard(term)
+                    if not self._trigrams[gram]:
+                        del self._trigrams[gram]
+        self._total_length -= self._doc_lengths.pop(product_id)
+        self.docs.pop(product_id, None)
+        self._fingerprints.pop(product_id, None)
+
+    def _add(self, product: dict, fingerprint):
+        product_id = product["id"]
+        terms = self._index_terms(product)
+        for term, frequency in terms.items():
+            if term not in self._postings:
+                for gram in trigrams(term):
+                    self._trigrams[gram].add(term)
+            self._postings[term][product_id] = frequency
+        self._doc_terms[product_id] = terms
+        self._doc_lengths[product_id] = sum(terms.values())
+        self._total_length += self._doc_lengths[product_id]
+        self.docs[product_id] = product
+        self._fingerprints[product_id] = fingerprint
+
+    def upsert(self, product: dict) -> bool:
+        """
+        Index or re-index one product. Returns False when its searchable
+        fields are unchanged and nothing had to be done.
+        """
+        fingerprint = tuple(product_fields(product).values())
+        with self._lock:
+            if self._fingerprints.get(product["id"]) == fingerprint:
+                self.docs[product["id"]] = product
+                return False
+            self._remove(product["id"])
+            self._add(product, fingerprint)
+            return True
+
+    def remove(self, product_id):
+        with self._lock:
+            self._remove(product_id)
+
+    def sync(self, products: list) -> int:
+        """
+        Bring the index in line with a full product listing, touching only
+        products that were added, changed or deleted. Returns the number of
+        documents that changed.
+        """
+        changed = sum(1 for product in products if self.upsert(product))
+        live_ids = {product["id"] for product in products}
+        with self._lock:
+            stale = [product_id for product_id in self.docs if product_id not in live_ids]
+            for product_id in stale:
+                self._remove(product_id)
+            self.loaded = True
+        return changed + len(stale)
+
+    def _expand(self, term: str, is_last: bool) -> dict:
+        """
+        Map a query term to {indexed_term: weight}: the exact term, terms it
+        prefixes (for the word still being typed) and trigram look-alikes.
+        """
+        expansions = {}
+        if term in self._postings:
+            expansions[term] = 1.0
+        if is_last:
+            prefixed = sorted(t for t in self._postings if t.startswith(term) and t != term)
+            for indexed in prefixed[:MAX_EXPANSIONS]:
+                expansions.setdefault(indexed, PREFIX_WEIGHT)
+
+        query_grams = trigrams(term)
+        shared = Counter(t for gram in query_grams for t in self._trigrams.get(gram, ()))
+        candidates = []
+        for indexed, overlap in shared.items():
+            similarity = overlap / len(query_grams | trigrams(indexed))
+            if similarity >= MIN_TRIGRAM_SIMILARITY and indexed not in expansions:
+                candidates.append((similarity, indexed))
+        for similarity, indexed in sorted(candidates, reverse=True)[:MAX_EXPANSIONS]:
+            expansions[indexed] = similarity * PREFIX_WEIGHT
+        return expansions
+
+    def search(self, query: str, limit: int = 20) -> list:
+        """
+        Return up to `limit` (product_id, score) pairs, best match first.
+        """
+        tokens = tokenize(query)
+        with self._lock:
+            if not tokens or not self.docs:
+                return []
+            doc_count = len(self.docs)
+            average_length = self._total_length / doc_count
+            scores = Counter()
+            for position, token in enumerate(tokens):
+                for term, weight in self._expand(token, position == len(tokens) - 1).items():
+                    postings = self._postings[term]
+                    idf = math.log(1 + (doc_count - len(postings) + 0.5) / (len(postings) + 0.5))
+                    for product_id, frequency in postings.items():
+                        norm = BM25_K1 * (1 - BM25_B + BM25_B * self._doc_lengths[product_id] / average_length)
+                        scores[product_id] += weight * idf * frequency * (BM25_K1 + 1) / (frequency + norm)
+        return sorted(scores.items(), key=lambda item: (-item[1], str(item[0])))[:limit]
+
+
+product_index = ProductSearchIndex()
+index_loads = SingleFlight()
+
+
+def load_product_index():
+    """
+    Page through the products table and sync the search index with it.
+    """
+    products = fetch_all(
+        lambda: supabase_client.table("products").select(
+            "id, name, description, category, price_min, price_max, ar_asset_url, image_urls, address, in_stock, store_id, stores(name, store_id, latitude, longitude, store_image, type, rating, town)"
+        ),
+        "id",
+        LOAD_PAGE_SIZE,
+    )
+
+    changed = product_index.sync(products)
+    if changed:
+        catalog_cache.invalidate("products")
+    return changed
+
+
+def ensure_product_index():
+    """
+    Load the index if it has not been loaded yet. Cheap once loaded.
+    """
+    if not product_index.loaded:
+        index_loads.do("product_index", load_product_index)
+    return product_index
+
+
+async def refresh_product_index():
+    try:
+        changed = await run_blocking(load_product_index)
+        logger.info(f"Product search index refreshed: {changed} changes, {len(product_index)} products")
+    except Exception as e:
+        logger.error(f"Error refreshing product search index: {str(e)}")
+
+
+class StoreNameIndex:
+    """
+    Store names as normalised token sequences, with postings by token and
+    by name trigram. A query is ranked in one pass into exact, prefix,
+    token (every query word present, the last one possibly as a prefix)
+    and fuzzy (trigram overlap) matches.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.clear()
+
+    def clear(self):
+        self.stores = {}
+        self.loaded = False
+        self._names = {}
+        self._tokens = {}
+        self._postings = {}
+        self._trigrams = {}
+
+    def __len__(self):
+        return len(self.stores)
+
+    def replace(self, stores: list):
+        names, tokens, postings, grams = {}, {}, defaultdict(set), defaultdict(set)
+        for store in stores:
+            store_id = store["store_id"]
+            tokens[store_id] = tokenize(store.get("name"))
+            names[store_id] = " ".join(tokens[store_id])
+            for token in tokens[store_id]:
+                postings[token].add(store_id)
+            for gram in trigrams(names[store_id]):
+                grams[gram].add(store_id)
+        with self._lock:
+            self.stores = {store["store_id"]: store for store in stores}
+            self._names, self._tokens = names, tokens
+            self._postings, self._trigrams = dict(postings), dict(grams)
+            self.loaded = True
+
+    def _classify(self, store_id, query: str, query_tokens: list, query_grams: set):
+        name = self._names[store_id]
+        if name == query:
+            return "exact", STORE_MATCH_SCORES["exact"]
+        if name.startswith(query):
+            return "prefix", STORE_MATCH_SCORES["prefix"] + 0.1 * len(query) / len(name)
+        name_tokens = self._tokens[store_id]
+        *whole, last = query_tokens
+        if all(token in name_tokens for token in whole) and any(token.startswith(last) for token in name_tokens):
+            coverage = len(query_tokens) / len(name_tokens)
+            return "token", STORE_MATCH_SCORES["token"] + 0.3 * min(coverage, 1.0)
+        name_grams = trigrams(name)
+        similarity = len(query_grams & name_grams) / len(query_grams | name_grams)
+        if similarity >= MIN_STORE_NAME_SIMILARITY:
+            return "fuzzy", STORE_MATCH_SCORES["fuzzy"] * similarity
+        return None
+
+    def search(self, query: str, limit: int = 20) -> list:
+        """
+        Return up to `limit` (store, match_type, score) triples, best first.
+        """
+        query_tokens = tokenize(query)
+        if not query_tokens:
+            return []
+        query = " ".join(query_tokens)
+        query_grams = trigrams(query)
+        with self._lock:
+            candidates = set()
+            for token in query_tokens:
+                candidates.update(self._postings.get(token, ()))
+            last = query_tokens[-1]
+            for token, store_ids in self._postings.items():
+                if token.startswith(last):
+                    candidates.update(store_ids)
+            for gram in query_grams:
+                candidates.update(self._trigrams.get(gram, ()))
+
+            ranked = []
+            for store_id in candidates:
+                match = self._classify(store_id, query, query_tokens, query_grams)
+                if match is not None:
+                    ranked.append((-match[1], self._names[store_id], store_id, match[0]))
+            ranked.sort()
+            return [(self.stores[store_id], match_type, round(-score, 4)) for score, _, store_id, match_type in ranked[:limit]]
+
+
+store_index = StoreNameIndex()
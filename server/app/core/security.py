@@ -1,6 +1,8 @@
 #core/security.py
+import asyncio
 import bcrypt
 import jwt
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta
 from fastapi import Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordBearer
@@ -9,8 +11,43 @@ from typing import Optional
 
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/login")
 
-def hash_password(password: str) -> str:
-    return bcrypt.hashpw(password.encode(), bcrypt.gensalt()).decode()
+# bcrypt releases the GIL, so a small dedicated pool hashes in parallel
+# without blocking the event loop or taking threads from the database pool
+password_executor = ThreadPoolExecutor(max_workers=settings.PASSWORD_HASH_WORKERS, thread_name_prefix="bcrypt")
+
+def hash_password(password: str, rounds: Optional[int] = None) -> str:
+    return bcrypt.hashpw(password.encode(), bcrypt.gensalt(rounds or settings.BCRYPT_ROUNDS)).decode()
+
+def check_password(password: str, password_hash: str) -> bool:
+    try:
+        return bcrypt.checkpw(password.encode(), password_hash.encode())
+    except (ValueError, AttributeError):
+        # Missing or malformed stored hash
+        return False
+
+def hash_rounds(password_hash: str) -> Optional[int]:
+    # "$2b$12$<salt+digest>" -> 12
+    try:
+        return int(password_hash.split("$")[2])
+    except (AttributeError, IndexError, ValueError):
+        return None
+
+def needs_rehash(password_hash: str) -> bool:
+    """
+    True when the hash was made with a lower work factor than BCRYPT_ROUNDS.
+    """
+    rounds = hash_rounds(password_hash)
+    return rounds is not None and rounds < settings.BCRYPT_ROUNDS
+
+async def run_password_work(fn, *args):
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(password_executor, fn, *args)
+
+async def hash_password_async(password: str) -> str:
+    return await run_password_work(hash_password, password)
+
+async def check_password_async(password: str, password_hash: str) -> bool:
+    return await run_password_work(check_password, password, password_hash)
 
 def create_access_token(data: dict, expires_delta: Optional[timedelta] = None):
     to_encode = data.copy()
@@ -0,0 +1,200 @@
+#core/similarity.py
+import logging
+import math
+import threading
+import zlib
+from collections import Counter
+import numpy as np
+from db.database import run_blocking, supabase_client
+from core.cache import catalog_cache
+from core.pagination import fetch_all
+from core.search import tokenize
+from core.singleflight import SingleFlight
+
+logger = logging.getLogger(__name__)
+
+FEATURE_DIMENSIONS = 1024
+NEIGHBOR_COUNT = 10
+BLOCK_SIZE = 256
+LOAD_PAGE_SIZE = 1000
+# Relative pull of each feature group on the product vector
+FEATURE_WEIGHTS = {"name": 3.0, "category": 2.0, "description": 1.0, "price": 1.0, "town": 1.0}
+# Added to the ranking score of products with the same normalised name.
+# Cosine similarity is at most 1, so these always rank ahead of the rest.
+SAME_NAME_BOOST = 1.0
+
+
+def price_band(product: dict):
+    """
+    Log2 bucket of the product's mid price, so 90 and 110 land together
+    while 100 and 1000 do not.
+    """
+    prices = [float(p) for p in (product.get("price_min"), product.get("price_max")) if p is not None]
+    if not prices or max(prices) <= 0:
+        return None
+    return int(math.log2(max(sum(prices) / len(prices), 1)))
+
+
+def product_features(product: dict) -> Counter:
+    features = Counter()
+    for token in tokenize(product.get("name")):
+        features[f"name:{token}"] += FEATURE_WEIGHTS["name"]
+    for token in tokenize(product.get("description")):
+        features[f"description:{token}"] += FEATURE_WEIGHTS["description"]
+    if product.get("category"):
+        features[f"category:{product['category'].strip().lower()}"] += FEATURE_WEIGHTS["category"]
+    band = price_band(product)
+    if band is not None:
+        features[f"price:{band}"] += FEATURE_WEIGHTS["price"]
+    town = product.get("town") or (product.get("stores") or {}).get("town")
+    if town:
+        features[f"town:{town}"] += FEATURE_WEIGHTS["town"]
+    return features
+
+
+def name_groups(products: list) -> np.ndarray:
+    """
+    Group id per product for its normalised name (case, accents and
+    punctuation ignored), or -1 when it has no name.
+    """
+    groups = {}
+    keys = (" ".join(tokenize(product.get("name"))) for product in products)
+    return np.array([groups.setdefault(key, len(groups)) if key else -1 for key in keys], dtype=np.int64)
+
+
+def feature_slot(feature: str):
+    """
+    Stable hashed column and sign for a feature (crc32, not hash(), so the
+    layout does not change between processes).
+    """
+    digest = zlib.crc32(feature.encode())
+    return digest % FEATURE_DIMENSIONS, 1.0 if digest & 0x80000000 else -1.0
+
+
+def vectorize(products: list) -> np.ndarray:
+    """
+    TF-IDF weighted, hashed, L2-normalised feature matrix with one row per product.
+    """
+    features = [product_features(product) for product in products]
+    document_frequency = Counter(feature for row in features for feature in row)
+    count = len(products)
+
+    matrix = np.zeros((count, FEATURE_DIMENSIONS), dtype=np.float32)
+    for row, product_terms in enumerate(features):
+        for feature, weight in product_terms.items():
+            column, sign = feature_slot(feature)
+            idf = math.log((1 + count) / (1 + document_frequency[feature])) + 1
+            matrix[row, column] += sign * weight * idf
+
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    norms[norms == 0] = 1
+    return matrix / norms
+
+
+def nearest_neighbors(matrix: np.ndarray, k: int, groups: np.ndarray = None):
+    """
+    Return (indices, scores), both shaped (rows, k), of each row's most
+    cosine-similar other rows. Similarities are computed BLOCK_SIZE rows at a
+    time so memory stays O(BLOCK_SIZE * rows). Missing neighbours get index -1.
+    When `groups` is given, rows sharing a group (>= 0) are ranked first;
+    the reported score is still the plain cosine similarity.
+    """
+    count = matrix.shape[0]
+    k = min(k, max(count - 1, 0))
+    indices = np.full((count, k), -1, dtype=np.int32)
+    scores = np.zeros((count, k), dtype=np.float32)
+    if k == 0:
+        return indices, scores
+
+    for start in range(0, count, BLOCK_SIZE):
+        similarity = matrix[start:start + BLOCK_SIZE] @ matrix.T
+        block = similarity.copy()
+        if groups is not None:
+            block_groups = groups[start:start + BLOCK_SIZE, None]
+            block += SAME_NAME_BOOST * ((block_groups == groups[None, :]) & (block_groups >= 0))
+        rows = np.arange(block.shape[0])
+        block[rows, rows + start] = -np.inf
+        top = np.argpartition(-block, k - 1, axis=1)[:, :k]
+        ranking = np.take_along_axis(block, top, axis=1)
+        order = np.argsort(-ranking, axis=1)
+        top = np.take_along_axis(top, order, axis=1)
+        keep = np.take_along_axis(ranking, order, axis=1) > 0
+        top_scores = np.take_along_axis(similarity, top, axis=1)
+        indices[start:start + block.shape[0]] = np.where(keep, top, -1)
+        scores[start:start + block.shape[0]] = np.where(keep, top_scores, 0)
+    return indices, scores
+
+
+class SimilarProducts:
+    """
+    Precomputed top-K neighbour table. Product rows and their neighbours are
+    swapped in together on refresh, so a lookup never sees a half-built table.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.clear()
+
+    def clear(self):
+        self._table = None
+
+    @property
+    def loaded(self) -> bool:
+        return self._table is not None
+
+    def replace(self, products: list, indices: np.ndarray, scores: np.ndarray):
+        rows = {product["id"]: row for row, product in enumerate(products)}
+        with self._lock:
+            self._table = (products, rows, indices, scores)
+
+    def lookup(self, product_id, limit: int = NEIGHBOR_COUNT):
+        """
+        Return [(product, score)] for a product's neighbours, or None if the
+        product is not in the table.
+        """
+        products, rows, indices, scores = self._table
+        row = rows.get(product_id)
+        if row is None and isinstance(product_id, str) and product_id.isdigit():
+            row = rows.get(int(product_id))
+        if row is None:
+            return None
+        return [
+            (products[index], float(score))
+            for index, score in zip(indices[row][:limit], scores[row][:limit])
+            if index >= 0
+        ]
+
+
+similar_products = SimilarProducts()
+table_builds = SingleFlight()
+
+
+def compute_similar_products():
+    products = fetch_all(
+        lambda: supabase_client.table("products").select(
+            "id, name, description, category, price_min,price_max, ar_asset_url, image_urls, address, in_stock, store_id, town, stores(name, store_id, latitude, longitude, store_image, type, rating, town)"
+        ),
+        "id",
+        LOAD_PAGE_SIZE,
+    )
+    indices, scores = nearest_neighbors(vectorize(products), NEIGHBOR_COUNT, name_groups(products))
+    similar_products.replace(products, indices, scores)
+    catalog_cache.invalidate("product_neighbors")
+    return len(products)
+
+
+def ensure_similar_products():
+    """
+    Build the neighbour table if it has not been built yet. Cheap once built.
+    """
+    if not similar_products.loaded:
+        table_builds.do("similar_products", compute_similar_products)
+    return similar_products
+
+
+async def refresh_similar_products():
+    try:
+        count = await run_blocking(compute_similar_products)
+        logger.info(f"Similar products table rebuilt for {count} products")
+    except Exception as e:
+        logger.error(f"Error rebuilding similar products table: {str(e)}")
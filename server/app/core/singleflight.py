@@ -0,0 +1,84 @@
+#core/singleflight.py
+import threading
+from postgrest.base_request_builder import RequestConfig
+
+
+class _Flight:
+    def __init__(self):
+        self.done = threading.Event()
+        self.value = None
+        self.error = None
+
+
+class SingleFlight:
+    """
+    Collapse concurrent calls that share a key into one execution. The
+    first caller runs fn(); callers arriving while it is in flight block
+    until it finishes and receive the same result (or exception). Nothing
+    is remembered once the flight lands, so this is not a cache.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._flights = {}
+        self.executions = 0
+        self.coalesced = 0
+
+    def do(self, key, fn):
+        with self._lock:
+            flight = self._flights.get(key)
+            leader = flight is None
+            if leader:
+                flight = self._flights[key] = _Flight()
+                self.executions += 1
+            else:
+                self.coalesced += 1
+
+        if not leader:
+            flight.done.wait()
+            if flight.error is not None:
+                raise flight.error
+            return flight.value
+
+        try:
+            flight.value = fn()
+        except BaseException as e:
+            flight.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._flights[key]
+            flight.done.set()
+        return flight.value
+
+    @property
+    def in_flight(self) -> int:
+        return len(self._flights)
+
+    def stats(self) -> dict:
+        with self._lock:
+            calls = self.executions + self.coalesced
+            return {
+                "executions": self.executions,
+                "coalesced": self.coalesced,
+                "in_flight": len(self._flights),
+                "coalesced_rate": round(self.coalesced / calls, 4) if calls else 0.0,
+            }
+
+
+def query_key(query):
+    """
+    Normalised identity of a postgrest read: method, table URL, filters,
+    projection, ordering and limits (all carried in the query string), plus
+    the headers that change the response shape. Returns None for writes and
+    anything that is not a postgrest builder, which are never coalesced.
+    """
+    request = getattr(query, "request", None)
+    if not isinstance(request, RequestConfig) or request.http_method not in ("GET", "HEAD"):
+        return None
+    return (
+        str(request.http_method),
+        str(request.path),
+        tuple(sorted(request.params.multi_items())),
+        tuple(sorted((name, value) for name, value in request.headers.items() if name != "x-client-info")),
+    )
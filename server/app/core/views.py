@@ -0,0 +1,96 @@
+#core/views.py
+import logging
+import threading
+from collections import Counter
+from db.database import run_blocking, supabase_client
+
+logger = logging.getLogger(__name__)
+
+SHARD_COUNT = 16
+FLUSH_INTERVAL_SECONDS = 5
+FLUSH_EVERY_HITS = 500
+
+
+class ViewCounter:
+    """
+    Write-behind product view counter. Hits land in lock-striped in-memory
+    shards and are flushed to Supabase as one batched atomic increment,
+    either on the flush interval or once FLUSH_EVERY_HITS are pending.
+    """
+
+    def __init__(self, shard_count: int = SHARD_COUNT, flush_every: int = FLUSH_EVERY_HITS):
+        self.flush_every = flush_every
+        self._shards = [(threading.Lock(), Counter()) for _ in range(shard_count)]
+        self._pending = 0
+        self._pending_lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self.flushed_hits = 0
+        self.failed_flushes = 0
+
+    @property
+    def pending(self) -> int:
+        return self._pending
+
+    def hit(self, product_id: int):
+        lock, counts = self._shards[hash(product_id) % len(self._shards)]
+        with lock:
+            counts[product_id] += 1
+        with self._pending_lock:
+            self._pending += 1
+            due = self._pending >= self.flush_every
+        if due and not self._flush_lock.locked():
+            threading.Thread(target=self.flush, daemon=True).start()
+
+    def _drain(self) -> Counter:
+        drained = Counter()
+        for lock, counts in self._shards:
+            with lock:
+                drained.update(counts)
+                counts.clear()
+        with self._pending_lock:
+            self._pending -= sum(drained.values())
+        return drained
+
+    def _restore(self, drained: Counter):
+        for product_id, views in drained.items():
+            lock, counts = self._shards[hash(product_id) % len(self._shards)]
+            with lock:
+                counts[product_id] += views
+        with self._pending_lock:
+            self._pending += sum(drained.values())
+
+    def flush(self, wait: bool = False) -> int:
+        """
+        Push every pending hit upstream in a single RPC. On failure the hits
+        are put back so the next flush retries them. Returns hits flushed.
+        A flush already in progress makes this a no-op, unless `wait` is set
+        (shutdown), in which case it waits for it and then flushes the rest.
+        Cached product responses are left alone; their `views` may lag by
+        up to the products TTL.
+        """
+        if not self._flush_lock.acquire(blocking=wait):
+            return 0
+        try:
+            drained = self._drain()
+            if not drained:
+                return 0
+            batch = [{"product_id": product_id, "views": views} for product_id, views in drained.items()]
+            try:
+                supabase_client.rpc("increment_product_views", {"p_views": batch}).execute()
+            except Exception as e:
+                self._restore(drained)
+                self.failed_flushes += 1
+                logger.error(f"Error flushing {len(batch)} product view counts: {str(e)}")
+                return 0
+            hits = sum(drained.values())
+            self.flushed_hits += hits
+            return hits
+        finally:
+            self._flush_lock.release()
+
+
+view_counter = ViewCounter()
+
+
+async def flush_view_counts():
+    await run_blocking(view_counter.flush)
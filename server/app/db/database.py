@@ -1,5 +1,70 @@
 #db/database.py
+import asyncio
+import functools
+import logging
+from concurrent.futures import ThreadPoolExecutor
 from supabase import create_client, Client
+from supabase.lib.client_options import SyncClientOptions
 from core.config import settings  # Updated import path
+from db.transport import build_http_client, pool_stats
+from core.singleflight import SingleFlight, query_key
 
-supabase_client: Client = create_client(settings.SUPABASE_URL, settings.SUPABASE_KEY)
+logger = logging.getLogger(__name__)
+
+http_client = build_http_client()
+supabase_client: Client = create_client(
+    settings.SUPABASE_URL, settings.SUPABASE_KEY, options=SyncClientOptions(httpx_client=http_client)
+)
+
+# supabase-py is synchronous; every call from an async handler runs on this
+# bounded pool so a slow query never stalls the event loop
+db_executor = ThreadPoolExecutor(max_workers=settings.DB_MAX_WORKERS, thread_name_prefix="supabase")
+
+
+async def run_blocking(fn, *args, **kwargs):
+    """
+    Run a blocking function (a query, or a loader that issues several) on
+    the database pool and await its result.
+    """
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(db_executor, functools.partial(fn, *args, **kwargs))
+
+
+# Identical reads issued at the same time share one upstream round trip
+query_flights = SingleFlight()
+
+
+def run_query(query):
+    """
+    Execute a postgrest query, joining an identical read that is already
+    in flight instead of sending a duplicate. Writes always execute.
+    """
+    key = query_key(query)
+    if key is None:
+        return query.execute()
+    return query_flights.do(key, query.execute)
+
+
+async def execute(query):
+    return await run_blocking(run_query, query)
+
+
+def ping_rest():
+    http_client.head(
+        f"{settings.SUPABASE_URL}/rest/v1/",
+        headers={"apikey": settings.SUPABASE_KEY, "Authorization": f"Bearer {settings.SUPABASE_KEY}"},
+    )
+
+
+async def warm_connections(count: int = None):
+    """
+    Open `count` keep-alive connections to PostgREST at startup so the first
+    requests don't pay for TCP/TLS setup. Pings run concurrently, otherwise
+    they would all reuse the same connection.
+    """
+    count = settings.SUPABASE_WARM_CONNECTIONS if count is None else count
+    results = await asyncio.gather(*(run_blocking(ping_rest) for _ in range(count)), return_exceptions=True)
+    failures = [result for result in results if isinstance(result, Exception)]
+    if failures:
+        logger.warning(f"Connection warm-up: {len(failures)} of {count} pings failed: {failures[0]}")
+    logger.info(f"Supabase connection pool warmed: {pool_stats(http_client)}")
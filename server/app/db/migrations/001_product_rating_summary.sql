@@ -0,0 +1,38 @@
+-- db/migrations/001_product_rating_summary.sql
+-- Per-product rating rollup read by core/ratings.py instead of scanning reviews.
+
+CREATE TABLE IF NOT EXISTS public.product_rating_summary (
+    product_id integer PRIMARY KEY REFERENCES public.products(id) ON DELETE CASCADE,
+    rating_sum numeric NOT NULL DEFAULT 0,
+    rating_count integer NOT NULL DEFAULT 0,
+    star_1 integer NOT NULL DEFAULT 0,
+    star_2 integer NOT NULL DEFAULT 0,
+    star_3 integer NOT NULL DEFAULT 0,
+    star_4 integer NOT NULL DEFAULT 0,
+    star_5 integer NOT NULL DEFAULT 0,
+    updated_at timestamp without time zone DEFAULT now()
+);
+
+-- Atomically fold one new review into the rollup (called after create_review).
+CREATE OR REPLACE FUNCTION public.record_product_rating(p_product_id integer, p_rating numeric)
+RETURNS void
+LANGUAGE sql
+AS $$
+    INSERT INTO public.product_rating_summary AS s
+        (product_id, rating_sum, rating_count, star_1, star_2, star_3, star_4, star_5, updated_at)
+    VALUES (
+        p_product_id, p_rating, 1,
+        (floor(p_rating + 0.5) = 1)::int, (floor(p_rating + 0.5) = 2)::int, (floor(p_rating + 0.5) = 3)::int,
+        (floor(p_rating + 0.5) = 4)::int, (floor(p_rating + 0.5) = 5)::int,
+        now()
+    )
+    ON CONFLICT (product_id) DO UPDATE SET
+        rating_sum = s.rating_sum + EXCLUDED.rating_sum,
+        rating_count = s.rating_count + 1,
+        star_1 = s.star_1 + EXCLUDED.star_1,
+        star_2 = s.star_2 + EXCLUDED.star_2,
+        star_3 = s.star_3 + EXCLUDED.star_3,
+        star_4 = s.star_4 + EXCLUDED.star_4,
+        star_5 = s.star_5 + EXCLUDED.star_5,
+        updated_at = now();
+$$;
@@ -0,0 +1,13 @@
+-- db/migrations/002_increment_product_views.sql
+-- Batched, atomic view increments flushed by core/views.py.
+-- p_views is a JSON array of {"product_id": <int>, "views": <int>} objects.
+
+CREATE OR REPLACE FUNCTION public.increment_product_views(p_views jsonb)
+RETURNS void
+LANGUAGE sql
+AS $$
+    UPDATE public.products AS p
+    SET views = COALESCE(p.views, 0) + v.views
+    FROM jsonb_to_recordset(p_views) AS v(product_id integer, views integer)
+    WHERE p.id = v.product_id;
+$$;
@@ -0,0 +1,19 @@
+-- db/migrations/003_store_product_summary.sql
+-- Per-store product rollup read by /stores/fetch_store_directory: one
+-- grouped row per store, so a town page needs a single in_() lookup
+-- instead of one products call per store. Ratings come from the
+-- product_rating_summary table (001), weighted by review count.
+
+CREATE OR REPLACE VIEW public.store_product_summary AS
+SELECT
+    p.store_id,
+    COUNT(*) AS product_count,
+    COUNT(*) FILTER (WHERE p.in_stock) AS in_stock_count,
+    MIN(p.price_min) AS price_min,
+    MAX(p.price_max) AS price_max,
+    COALESCE(SUM(r.rating_sum), 0) AS rating_sum,
+    COALESCE(SUM(r.rating_count), 0) AS rating_count
+FROM public.products AS p
+LEFT JOIN public.product_rating_summary AS r ON r.product_id = p.id
+WHERE p.store_id IS NOT NULL
+GROUP BY p.store_id;
@@ -0,0 +1,18 @@
+-- db/migrations/004_review_keyset_indexes.sql
+-- Indexes behind the keyset-paginated /reviews/{product_id} listing, one
+-- per sort order (Postgres can scan an index backwards, so each serves its
+-- order and the exact reverse). A page query bounds the leading column at
+-- the cursor, so it starts an index range scan there instead of sorting or
+-- filtering every review the product has.
+
+-- newest (created_at DESC, id DESC) and oldest (created_at, id)
+CREATE INDEX IF NOT EXISTS reviews_product_newest_idx
+    ON public.reviews (product_id, created_at DESC, id DESC);
+
+-- lowest (rating, created_at DESC, id DESC)
+CREATE INDEX IF NOT EXISTS reviews_product_rating_idx
+    ON public.reviews (product_id, rating, created_at DESC, id DESC);
+
+-- highest (rating DESC, created_at DESC, id DESC)
+CREATE INDEX IF NOT EXISTS reviews_product_rating_desc_idx
+    ON public.reviews (product_id, rating DESC, created_at DESC, id DESC);
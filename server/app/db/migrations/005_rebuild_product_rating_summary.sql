@@ -0,0 +1,61 @@
+-- db/migrations/005_rebuild_product_rating_summary.sql
+-- Recompute product_rating_summary from reviews for one range of product
+-- ids, called range by range by the scheduled rebuild in core/ratings.py
+-- (each call is its own short transaction). The range's summary rows are
+-- locked first, so record_product_rating increments for those products
+-- wait and then apply on top of the rebuilt totals instead of being
+-- overwritten; products outside the range are never blocked.
+-- Returns the number of summary rows written.
+
+DROP FUNCTION IF EXISTS public.rebuild_product_rating_summary();
+
+CREATE OR REPLACE FUNCTION public.rebuild_product_rating_summary(p_first_id integer, p_last_id integer)
+RETURNS integer
+LANGUAGE plpgsql
+AS $$
+DECLARE
+    written integer;
+    zeroed integer;
+BEGIN
+    PERFORM 1 FROM public.product_rating_summary
+    WHERE product_id BETWEEN p_first_id AND p_last_id
+    FOR UPDATE;
+
+    INSERT INTO public.product_rating_summary AS s
+        (product_id, rating_sum, rating_count, star_1, star_2, star_3, star_4, star_5, updated_at)
+    SELECT
+        r.product_id,
+        SUM(r.rating),
+        COUNT(*),
+        COUNT(*) FILTER (WHERE LEAST(5, GREATEST(1, floor(r.rating + 0.5))) = 1),
+        COUNT(*) FILTER (WHERE LEAST(5, GREATEST(1, floor(r.rating + 0.5))) = 2),
+        COUNT(*) FILTER (WHERE LEAST(5, GREATEST(1, floor(r.rating + 0.5))) = 3),
+        COUNT(*) FILTER (WHERE LEAST(5, GREATEST(1, floor(r.rating + 0.5))) = 4),
+        COUNT(*) FILTER (WHERE LEAST(5, GREATEST(1, floor(r.rating + 0.5))) = 5),
+        now()
+    FROM public.reviews AS r
+    WHERE r.product_id BETWEEN p_first_id AND p_last_id
+    GROUP BY r.product_id
+    ON CONFLICT (product_id) DO UPDATE SET
+        rating_sum = EXCLUDED.rating_sum,
+        rating_count = EXCLUDED.rating_count,
+        star_1 = EXCLUDED.star_1,
+        star_2 = EXCLUDED.star_2,
+        star_3 = EXCLUDED.star_3,
+        star_4 = EXCLUDED.star_4,
+        star_5 = EXCLUDED.star_5,
+        updated_at = now();
+    GET DIAGNOSTICS written = ROW_COUNT;
+
+    -- Products in the range whose reviews were all deleted
+    UPDATE public.product_rating_summary AS s SET
+        rating_sum = 0, rating_count = 0, star_1 = 0, star_2 = 0, star_3 = 0, star_4 = 0, star_5 = 0,
+        updated_at = now()
+    WHERE s.product_id BETWEEN p_first_id AND p_last_id
+      AND s.rating_count <> 0
+      AND NOT EXISTS (SELECT 1 FROM public.reviews AS r WHERE r.product_id = s.product_id);
+    GET DIAGNOSTICS zeroed = ROW_COUNT;
+
+    RETURN written + zeroed;
+END;
+$$;
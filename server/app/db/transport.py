@@ -0,0 +1,78 @@
+#db/transport.py
+import logging
+import threading
+import httpx
+from core.config import settings
+
+logger = logging.getLogger(__name__)
+
+try:
+    import h2  # noqa: F401 - httpx only negotiates HTTP/2 when h2 is installed
+except ImportError:
+    h2 = None
+
+
+class TransportStats:
+    """
+    Request counter fed by httpx event hooks, so pool utilisation can be
+    read next to how much traffic went through it.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.requests = 0
+
+    def on_request(self, request):
+        with self._lock:
+            self.requests += 1
+
+
+transport_stats = TransportStats()
+
+
+def http2_enabled() -> bool:
+    if settings.SUPABASE_HTTP2 and h2 is None:
+        logger.warning("SUPABASE_HTTP2 is set but the h2 package is not installed; using HTTP/1.1")
+    return bool(settings.SUPABASE_HTTP2 and h2 is not None)
+
+
+def build_http_client() -> httpx.Client:
+    """
+    One shared keep-alive client for every Supabase service (PostgREST,
+    auth, storage), sized from settings.
+    """
+    return httpx.Client(
+        http2=http2_enabled(),
+        limits=httpx.Limits(
+            max_connections=settings.SUPABASE_POOL_SIZE,
+            max_keepalive_connections=settings.SUPABASE_MAX_KEEPALIVE,
+            keepalive_expiry=settings.SUPABASE_KEEPALIVE_EXPIRY,
+        ),
+        timeout=httpx.Timeout(
+            settings.SUPABASE_READ_TIMEOUT,
+            connect=settings.SUPABASE_CONNECT_TIMEOUT,
+            pool=settings.SUPABASE_CONNECT_TIMEOUT,
+        ),
+        event_hooks={"request": [transport_stats.on_request]},
+    )
+
+
+def pool_stats(client: httpx.Client) -> dict:
+    """
+    Snapshot of the connection pool behind `client`. Connection states come
+    from httpcore's pool, which httpx does not expose publicly, so they are
+    read defensively and reported as empty if the layout changes.
+    """
+    pool = getattr(getattr(client, "_transport", None), "_pool", None)
+    connections = list(getattr(pool, "connections", []))
+    idle = sum(1 for connection in connections if connection.is_idle())
+    return {
+        "max_connections": settings.SUPABASE_POOL_SIZE,
+        "max_keepalive_connections": settings.SUPABASE_MAX_KEEPALIVE,
+        "keepalive_expiry": settings.SUPABASE_KEEPALIVE_EXPIRY,
+        "http2": http2_enabled(),
+        "connections": len(connections),
+        "active": len(connections) - idle,
+        "idle": idle,
+        "requests": transport_stats.requests,
+    }
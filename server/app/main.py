@@ -2,14 +2,28 @@ from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from apscheduler.schedulers.asyncio import AsyncIOScheduler
 from core.cleanup import cleanup_unverified_users
+from core.ratings import rebuild_rating_summary
+from core.search import refresh_product_index
+from core.popularity import refresh_popularity
+from core.similarity import refresh_similar_products
+from core.geo import refresh_store_indexes
+from core.municipalities import REFRESH_INTERVAL_SECONDS, refresh_municipalities
+from core.events import refresh_event_calendar
+from core.views import FLUSH_INTERVAL_SECONDS, flush_view_counts, view_counter
+from core.pagination import NEXT_CURSOR_HEADER
+from core.responses import FastJSONResponse
+from core.compression import CompressionMiddleware
+from db.database import db_executor, http_client, warm_connections
+from core.security import password_executor
 from routes import reviews
+from datetime import datetime
 import logging
 
 # Set up logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
-app = FastAPI()
+app = FastAPI(default_response_class=FastJSONResponse)
 
 # Add CORS middleware
 app.add_middleware(
@@ -18,11 +32,22 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=[NEXT_CURSOR_HEADER, "ETag"],
 )
+# Compress JSON/NDJSON bodies over 1 KB with brotli or gzip, whichever the client accepts
+app.add_middleware(CompressionMiddleware)
 
 # Set up scheduler
 scheduler = AsyncIOScheduler()
 scheduler.add_job(cleanup_unverified_users, 'interval', hours=24)
+scheduler.add_job(rebuild_rating_summary, 'interval', hours=6)
+scheduler.add_job(refresh_product_index, 'interval', minutes=10, next_run_time=datetime.now())
+scheduler.add_job(refresh_popularity, 'interval', minutes=15, next_run_time=datetime.now())
+scheduler.add_job(refresh_similar_products, 'interval', minutes=30, next_run_time=datetime.now())
+scheduler.add_job(refresh_store_indexes, 'interval', minutes=10, next_run_time=datetime.now())
+scheduler.add_job(refresh_municipalities, 'interval', seconds=REFRESH_INTERVAL_SECONDS, next_run_time=datetime.now())
+scheduler.add_job(refresh_event_calendar, 'interval', minutes=10, next_run_time=datetime.now())
+scheduler.add_job(flush_view_counts, 'interval', seconds=FLUSH_INTERVAL_SECONDS)
 scheduler.start()
 
 # Import and include routers
@@ -30,12 +55,26 @@ from routes import auth
 from routes import fetch_products as products
 from routes import fetch_stores as stores
 from routes import fetch_municipalities as municipalities
+from routes import admin
+from routes import fetch_events as events
 app.include_router(auth.router, prefix="/auth", tags=["auth"])
 app.include_router(products.router, prefix="/products", tags=["products"])
 app.include_router(stores.router, prefix="/stores", tags=["stores"])
 app.include_router(reviews.router, prefix="/reviews", tags=["reviews"]) 
 app.include_router(municipalities.router, prefix="/municipalities", tags=["municipalities"])
+app.include_router(events.router, prefix="/events", tags=["events"])
+app.include_router(admin.router, prefix="/admin", tags=["admin"])
+
+@app.on_event("startup")
+async def startup_event():
+    # Open keep-alive connections before traffic arrives
+    await warm_connections()
 
 @app.on_event("shutdown")
 def shutdown_event():
     scheduler.shutdown()
+    # Wait out any running flush, then push everything still pending
+    view_counter.flush(wait=True)
+    db_executor.shutdown(wait=True)
+    password_executor.shutdown(wait=True)
+    http_client.close()
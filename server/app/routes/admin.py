@@ -0,0 +1,40 @@
+#routes/admin.py
+import hmac
+from fastapi import APIRouter, Depends, Header, HTTPException, Query
+from typing import Annotated, List, Optional
+from core.cache import catalog_cache
+from core.config import settings
+from db.database import http_client, query_flights
+from db.transport import pool_stats
+
+router = APIRouter()
+
+def require_admin_key(x_admin_key: Optional[str] = Header(None)):
+    # Constant-time comparison so the key can't be recovered from response timing
+    if not settings.ADMIN_API_KEY or not hmac.compare_digest((x_admin_key or "").encode(), settings.ADMIN_API_KEY.encode()):
+        raise HTTPException(status_code=403, detail="Admin key required")
+
+@router.get("/cache/stats", dependencies=[Depends(require_admin_key)])
+async def cache_stats():
+    return catalog_cache.stats()
+
+@router.get("/pool/stats", dependencies=[Depends(require_admin_key)])
+async def connection_pool_stats():
+    return pool_stats(http_client)
+
+@router.get("/coalescing/stats", dependencies=[Depends(require_admin_key)])
+async def coalescing_stats():
+    """
+    How many cache loads and upstream reads joined an identical call that
+    was already in flight instead of running their own.
+    """
+    return {"cache_loads": catalog_cache.flights.stats(), "queries": query_flights.stats()}
+
+@router.post("/cache/purge", dependencies=[Depends(require_admin_key)])
+async def purge_cache(tables: Annotated[Optional[List[str]], Query()] = None):
+    """
+    Drop cached results built from the given tables, or the whole cache
+    when no table is given.
+    """
+    removed = catalog_cache.invalidate(*(tables or []))
+    return {"message": "Cache purged", "removed": removed}
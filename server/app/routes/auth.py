@@ -1,10 +1,10 @@
 # auth/auth.py
 from fastapi import APIRouter, Depends, HTTPException
-from db.database import supabase_client
-from core.security import hash_password, create_access_token, verify_token
+from db.database import execute, run_blocking, supabase_client
+from core.security import check_password_async, create_access_token, hash_password_async, needs_rehash, verify_token
+from core.reviewers import reviewer_names
 from schemas.user import UserRegister, UserLogin, UserProfileUpdate, PasswordUpdate, EmailVerification
 from datetime import datetime, timedelta
-import bcrypt
 from core.config import settings
 import random
 import smtplib
@@ -52,7 +52,7 @@ def send_verification_email(email: str, code: str):
 async def register_user(user: UserRegister):
     try:
         # Check if user already exists
-        existing_user = supabase_client.table("users").select("*").eq("email", user.email).execute()
+        existing_user = await execute(supabase_client.table("users").select("*").eq("email", user.email))
         
         if existing_user.data and len(existing_user.data) > 0:
             # Check if the existing user is verified
@@ -62,37 +62,37 @@ async def register_user(user: UserRegister):
             else:
                 # User exists but is not verified - allow re-registration
                 # Update the user's information
-                supabase_client.table("users").update({
+                await execute(supabase_client.table("users").update({
                     "first_name": user.first_name,
                     "last_name": user.last_name,
-                    "password_hash": hash_password(user.password)
-                }).eq("email", user.email).execute()
+                    "password_hash": await hash_password_async(user.password)
+                }).eq("email", user.email))
                 
                 # Delete any existing verification codes
-                supabase_client.table("email_verification").delete().eq("email", user.email).execute()
+                await execute(supabase_client.table("email_verification").delete().eq("email", user.email))
         else:
             # Insert new user with is_verified=False
-            user_response = supabase_client.table("users").insert({
+            user_response = await execute(supabase_client.table("users").insert({
                 "email": user.email,
-                "password_hash": hash_password(user.password),
+                "password_hash": await hash_password_async(user.password),
                 "first_name": user.first_name,
                 "last_name": user.last_name,
                 "is_verified": False
-            }).execute()
+            }))
 
         # Generate new verification code
         verification_code = generate_verification_code()
         expires_at = datetime.utcnow() + timedelta(minutes=30)
         
         # Insert verification code
-        verification_response = supabase_client.table("email_verification").insert({
+        verification_response = await execute(supabase_client.table("email_verification").insert({
             "email": user.email,
             "code": verification_code,
             "expires_at": expires_at.isoformat()
-        }).execute()
+        }))
 
         # Send verification email
-        send_verification_email(user.email, verification_code)
+        await run_blocking(send_verification_email, user.email, verification_code)
 
         return {"message": "User registered successfully. Please check your email for verification code."}
     except HTTPException:
@@ -106,7 +106,7 @@ async def register_user(user: UserRegister):
 async def verify_email(verification: EmailVerification):
     try:
         # Check verification code
-        record = supabase_client.table("email_verification").select("*").eq("email", verification.email).eq("code", verification.code).execute()
+        record = await execute(supabase_client.table("email_verification").select("*").eq("email", verification.email).eq("code", verification.code))
         
         if not record.data or len(record.data) == 0:
             raise HTTPException(status_code=400, detail="Invalid verification code")
@@ -117,26 +117,26 @@ async def verify_email(verification: EmailVerification):
             expires_at = datetime.utcnow() + timedelta(minutes=30)
             
             # Update verification code
-            supabase_client.table("email_verification").update({
+            await execute(supabase_client.table("email_verification").update({
                 "code": verification_code,
                 "expires_at": expires_at.isoformat()
-            }).eq("email", verification.email).execute()
+            }).eq("email", verification.email))
             
             # Send new verification email
-            send_verification_email(verification.email, verification_code)
+            await run_blocking(send_verification_email, verification.email, verification_code)
             
             raise HTTPException(status_code=400, detail="Verification code expired. A new code has been sent to your email.")
         
         # Update user verification status
-        user_response = supabase_client.table("users").update({
+        user_response = await execute(supabase_client.table("users").update({
             "is_verified": True
-        }).eq("email", verification.email).execute()
+        }).eq("email", verification.email))
         
         if not user_response.data:
             raise HTTPException(status_code=404, detail="User not found")
 
         # Delete verification record
-        supabase_client.table("email_verification").delete().eq("email", verification.email).execute()
+        await execute(supabase_client.table("email_verification").delete().eq("email", verification.email))
 
         # Create access token for immediate login
         access_token = create_access_token(
@@ -157,7 +157,7 @@ async def verify_email(verification: EmailVerification):
 async def login_user(user: UserLogin):
     try:
         # Check if user exists
-        response = supabase_client.table("users").select("*").eq("email", user.email).execute()
+        response = await execute(supabase_client.table("users").select("*").eq("email", user.email))
         
         if not response.data or len(response.data) == 0:
             raise HTTPException(status_code=400, detail="User not found")
@@ -165,7 +165,7 @@ async def login_user(user: UserLogin):
         db_user = response.data[0]
         
         # Verify password
-        if not bcrypt.checkpw(user.password.encode(), db_user["password_hash"].encode()):
+        if not await check_password_async(user.password, db_user["password_hash"]):
             raise HTTPException(status_code=400, detail="Incorrect password")
         
         # Check verification status
@@ -175,14 +175,14 @@ async def login_user(user: UserLogin):
             expires_at = datetime.utcnow() + timedelta(minutes=30)
             
             # Upsert verification code
-            supabase_client.table("email_verification").upsert({
+            await execute(supabase_client.table("email_verification").upsert({
                 "email": user.email,
                 "code": verification_code,
                 "expires_at": expires_at.isoformat()
-            }).execute()
+            }))
             
             # Send verification email
-            send_verification_email(user.email, verification_code)
+            await run_blocking(send_verification_email, user.email, verification_code)
             
             # Return a specific status code and message for unverified accounts
             raise HTTPException(
@@ -190,6 +190,15 @@ async def login_user(user: UserLogin):
                 detail="Email not verified. A new verification code has been sent to your email."
             )
 
+        # Upgrade hashes made with an older work factor while we have the password
+        if needs_rehash(db_user["password_hash"]):
+            try:
+                await execute(supabase_client.table("users").update({
+                    "password_hash": await hash_password_async(user.password)
+                }).eq("email", user.email))
+            except Exception as e:
+                logger.error(f"Password rehash failed for {user.email}: {str(e)}")
+
         # If user is verified, proceed with login
         access_token = create_access_token(
             data={"sub": user.email},
@@ -206,7 +215,7 @@ async def login_user(user: UserLogin):
 async def get_user_profile(current_user: dict = Depends(verify_token)):
     try:
         user_email = current_user.get("sub")
-        response = supabase_client.table("users").select("email", "first_name", "last_name", "is_verified").eq("email", user_email).execute()
+        response = await execute(supabase_client.table("users").select("email", "first_name", "last_name", "is_verified").eq("email", user_email))
         
         if not response.data or len(response.data) == 0:
             raise HTTPException(status_code=404, detail="User not found")
@@ -228,10 +237,12 @@ async def update_user_profile(
             "last_name": profile.last_name.strip(),
         }
 
-        response = supabase_client.table("users").update(update_data).eq("email", user_email).execute()
+        response = await execute(supabase_client.table("users").update(update_data).eq("email", user_email))
 
         if not response.data or len(response.data) == 0:
             raise HTTPException(status_code=404, detail="User not found")
+        for user in response.data:
+            reviewer_names.forget(user.get("id"))
 
         return {"message": "Profile updated successfully"}
     except Exception as e:
@@ -245,21 +256,21 @@ async def update_password(
 ):
     try:
         user_email = current_user.get("sub")
-        response = supabase_client.table("users").select("*").eq("email", user_email).execute()
+        response = await execute(supabase_client.table("users").select("*").eq("email", user_email))
         
         if not response.data or len(response.data) == 0:
             raise HTTPException(status_code=404, detail="User not found")
 
         user = response.data[0]
         
-        if not bcrypt.checkpw(password_update.current_password.encode(), user["password_hash"].encode()):
+        if not await check_password_async(password_update.current_password, user["password_hash"]):
             raise HTTPException(status_code=400, detail="Current password is incorrect")
         
-        new_password_hash = hash_password(password_update.new_password)
+        new_password_hash = await hash_password_async(password_update.new_password)
         
-        update_response = supabase_client.table("users").update({
+        update_response = await execute(supabase_client.table("users").update({
             "password_hash": new_password_hash
-        }).eq("email", user_email).execute()
+        }).eq("email", user_email))
 
         if not update_response.data:
             raise HTTPException(status_code=500, detail="Failed to update password")
@@ -273,7 +284,7 @@ async def update_password(
 async def resend_verification(email: EmailStr):
     try:
         # Check if user exists
-        user_response = supabase_client.table("users").select("*").eq("email", email).execute()
+        user_response = await execute(supabase_client.table("users").select("*").eq("email", email))
         
         if not user_response.data or len(user_response.data) == 0:
             raise HTTPException(status_code=404, detail="User not found")
@@ -287,14 +298,14 @@ async def resend_verification(email: EmailStr):
         expires_at = datetime.utcnow() + timedelta(minutes=30)
         
         # Upsert verification code
-        supabase_client.table("email_verification").upsert({
+        await execute(supabase_client.table("email_verification").upsert({
             "email": email,
             "code": verification_code,
             "expires_at": expires_at.isoformat()
-        }).execute()
+        }))
         
         # Send verification email
-        send_verification_email(email, verification_code)
+        await run_blocking(send_verification_email, email, verification_code)
         
         return {"message": "Verification code sent successfully"}
     except Exception as e:
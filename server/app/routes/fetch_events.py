@@ -1,66 +1,90 @@
 #routes/fetch_events.py
-from fastapi import APIRouter, HTTPException
-from db.database import supabase_client
-from schemas.events import Event
-from typing import List
+from fastapi import APIRouter, HTTPException, Query
+from datetime import date
+from db.database import run_blocking
+from schemas.events import EventWithHighlights
+from core.events import attach_highlights, ensure_event_calendar, event_calendar
+from core.municipalities import ensure_municipalities, municipality_registry
+from typing import Annotated, List, Literal, Optional
 
 router = APIRouter()
 
-@router.get("/fetch_events", response_model=List[Event])
-async def fetch_events():
-    try:
-        print("Attempting to fetch events with columns...")
-        query = supabase_client.table("events").select(
-            "id, title, date, start_time, end_time, location, category, description, image_url, ticket_availability, entrance_fee, town"
-        )
-        print("Supabase Query:", query)
-        response = query.execute()
-        
-        print("Raw Supabase Response:", response)
-        print("Response Data:", response.data)
-        print("Response Keys in First Item:", 
-              list(response.data[0].keys()) if response.data else "No data")
+DEFAULT_UPCOMING_RESULTS = 10
+MAX_UPCOMING_RESULTS = 100
 
-        if not response.data:
-            print("No events found")
-            return []  # Return empty list instead of raising 404
+async def with_includes(events: list, include) -> list:
+    if include == "highlights":
+        return await run_blocking(attach_highlights, events)
+    return events
 
-        return response.data
+@router.get("/fetch_events", response_model=List[EventWithHighlights], response_model_exclude_unset=True)
+async def fetch_events(
+    from_date: Annotated[Optional[date], Query(alias="from")] = None,
+    to_date: Annotated[Optional[date], Query(alias="to")] = None,
+    town: Optional[str] = None,
+    category: Optional[str] = None,
+    include: Optional[Literal["highlights"]] = None,
+):
+    """
+    Events in calendar order, optionally limited to a date range (inclusive),
+    a town and/or a category.
+    """
+    if from_date and to_date and from_date > to_date:
+        raise HTTPException(status_code=400, detail="'from' must not be after 'to'")
+    try:
+        if not event_calendar.loaded:
+            await run_blocking(ensure_event_calendar)
+        return await with_includes(event_calendar.between(from_date, to_date, town=town, category=category), include)
 
     except Exception as e:
         print(f"Error in fetch_events: {str(e)}")
         raise HTTPException(status_code=500, detail=f"Database error: {str(e)}")
 
-@router.get("/fetch_events/municipality/{municipality_id}", response_model=List[Event])
-async def fetch_events_by_municipality(municipality_id: str):
+@router.get("/upcoming", response_model=List[EventWithHighlights], response_model_exclude_unset=True)
+async def fetch_upcoming_events(
+    limit: Annotated[int, Query(ge=1, le=MAX_UPCOMING_RESULTS)] = DEFAULT_UPCOMING_RESULTS,
+    town: Optional[str] = None,
+    category: Optional[str] = None,
+    include: Optional[Literal["highlights"]] = None,
+):
+    """
+    The next events that have not ended yet, soonest first.
+    """
     try:
-        print(f"Attempting to fetch events for municipality ID: {municipality_id}")
+        if not event_calendar.loaded:
+            await run_blocking(ensure_event_calendar)
+        return await with_includes(event_calendar.upcoming(limit, town=town, category=category), include)
+
+    except Exception as e:
+        print(f"Error in fetch_upcoming_events: {str(e)}")
+        raise HTTPException(status_code=500, detail=f"Database error: {str(e)}")
 
-        # Verify that the municipality exists
-        municipality_check = supabase_client.table("municipalities").select("id").eq("id", municipality_id).execute()
-        if not municipality_check.data:
+@router.get("/fetch_events/municipality/{municipality_id}", response_model=List[EventWithHighlights], response_model_exclude_unset=True)
+async def fetch_events_by_municipality(
+    municipality_id: str,
+    from_date: Annotated[Optional[date], Query(alias="from")] = None,
+    to_date: Annotated[Optional[date], Query(alias="to")] = None,
+    category: Optional[str] = None,
+    include: Optional[Literal["highlights"]] = None,
+):
+    if from_date and to_date and from_date > to_date:
+        raise HTTPException(status_code=400, detail="'from' must not be after 'to'")
+    try:
+        # Existence check against the in-memory registry, not a query
+        if not municipality_registry.loaded:
+            await run_blocking(ensure_municipalities)
+        if municipality_registry.get(municipality_id) is None:
             print(f"Municipality with ID {municipality_id} not found")
             raise HTTPException(status_code=404, detail="Municipality not found")
 
-        # Query events where the town column matches the municipality_id
-        query = supabase_client.table("events").select(
-            "id, title, date, start_time, end_time, location, category, description, image_url, ticket_availability, entrance_fee, town"
-        ).eq("town", municipality_id)
-        
-        print("Supabase Query:", query)
-        response = query.execute()
-        
-        print("Raw Supabase Response:", response)
-        print("Response Data:", response.data)
-        print("Response Keys in First Item:", 
-              list(response.data[0].keys()) if response.data else "No data")
-
-        if not response.data:
-            print(f"No events found for municipality ID: {municipality_id}")
-            return []  # Return empty list instead of raising 404
-
-        return response.data
+        if not event_calendar.loaded:
+            await run_blocking(ensure_event_calendar)
+        return await with_includes(
+            event_calendar.between(from_date, to_date, town=municipality_id, category=category), include
+        )
 
+    except HTTPException:
+        raise
     except Exception as e:
         print(f"Error in fetch_events_by_municipality: {str(e)}")
-        raise HTTPException(status_code=500, detail=f"Database error: {str(e)}")
\ No newline at end of file
+        raise HTTPException(status_code=500, detail=f"Database error: {str(e)}")
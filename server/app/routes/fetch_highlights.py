@@ -1,14 +1,15 @@
 #routes/fetch_highlights.py
 from fastapi import APIRouter, HTTPException
-from db.database import supabase_client
+from db.database import run_blocking, supabase_client
 from schemas.highlights import Highlight
+from core.cache import catalog_cache
 from typing import List
 
 router = APIRouter()
 
 @router.get("/fetch_highlights", response_model=List[Highlight])
 async def fetch_highlights(event_id: str = None):
-    try:
+    def load():
         print("Connecting to Supabase to fetch festival highlights...")
 
         query = supabase_client.table("festival_highlights").select(
@@ -21,12 +22,16 @@ async def fetch_highlights(event_id: str = None):
         response = query.execute()
         
         print("Supabase Response:", response)
+        return response.data
 
-        if not response.data:
+    try:
+        data = await run_blocking(catalog_cache.get_or_load, ("festival_highlights",), ("fetch_highlights", event_id), load)
+
+        if not data:
             print("No highlights found")
             raise HTTPException(status_code=404, detail="No festival highlights found")
 
-        return response.data
+        return data
 
     except Exception as e:
         print(f"Error in fetch_highlights: {str(e)}")
@@ -1,26 +1,53 @@
 #routes/fetch_municipalities.py
-from fastapi import APIRouter, HTTPException
-from db.database import supabase_client
+from fastapi import APIRouter, Header, HTTPException, Query, Response
+from db.database import run_blocking, supabase_client
 from schemas.municipalities import Municipality
-from typing import List
+from core.cache import catalog_cache
+from core.municipalities import ensure_municipalities, municipality_registry
+from core.conditional import not_modified, with_validators
+from core.pagination import MAX_PAGE_SIZE, NEXT_CURSOR_HEADER, decode_cursor, fetch_page_or_all
+from typing import Annotated, List, Optional
 
 router = APIRouter()
 
 @router.get("/fetch_municipalities", response_model=List[Municipality])
-async def fetch_municipalities():
-    try:
+async def fetch_municipalities(
+    response: Response,
+    limit: Annotated[Optional[int], Query(ge=1, le=MAX_PAGE_SIZE)] = None,
+    cursor: Optional[str] = None,
+    if_none_match: Annotated[Optional[str], Header()] = None,
+    if_modified_since: Annotated[Optional[str], Header()] = None,
+):
+    after = decode_cursor(cursor)
+
+    def load():
         print("Attempting to connect to Supabase...")
 
-        # Query the municipalities table
-        response = supabase_client.table("municipalities").select("*").execute()
+        # Every municipality unless the client pages with limit/cursor
+        municipalities, next_cursor = fetch_page_or_all(
+            lambda: supabase_client.table("municipalities").select("*"), "id", after, limit
+        )
 
-        print("Supabase Response:", response)
+        print("Supabase Response:", len(municipalities), "municipalities")
+        return municipalities, next_cursor
+
+    try:
+        (municipalities, next_cursor), etag, modified_at = await run_blocking(
+            catalog_cache.get_or_load, ("municipalities",), ("fetch_municipalities", limit, after), with_validators(load)
+        )
 
-        if not response.data:
+        if not municipalities and after is None:
             print("No data found in response")
             raise HTTPException(status_code=404, detail="No municipalities found")
 
-        return response.data
+        if next_cursor:
+            response.headers[NEXT_CURSOR_HEADER] = next_cursor
+
+        unchanged = not_modified(
+            response, etag, modified_at, catalog_cache.ttl_for(("municipalities",)), if_none_match,
+            if_modified_since, extra_headers=(NEXT_CURSOR_HEADER,),
+        )
+        return unchanged or municipalities
 
     except Exception as e:
         print(f"Error in fetch_municipalities: {str(e)}")
@@ -29,20 +56,19 @@ async def fetch_municipalities():
 @router.get("/{municipality_id}", response_model=Municipality)
 async def fetch_municipality(municipality_id: str):
     try:
-        print(f"Fetching municipality with ID: {municipality_id}")
-
-        # Query the municipalities table for a specific ID
-        response = supabase_client.table("municipalities").select("*").eq("id", municipality_id).execute()
+        # Served from the in-memory registry; the scheduler keeps it fresh
+        if not municipality_registry.loaded:
+            await run_blocking(ensure_municipalities)
 
-        print("Supabase Response:", response)
-
-        if not response.data:
+        municipality = municipality_registry.get(municipality_id)
+        if not municipality:
             print("No data found in response")
             raise HTTPException(status_code=404, detail="Municipality not found")
 
-        # Since we're querying by ID, there should only be one result
-        return response.data[0]
+        return municipality
 
+    except HTTPException:
+        raise
     except Exception as e:
         print(f"Error in fetch_municipality: {str(e)}")
-        raise HTTPException(status_code=500, detail=f"Database error: {str(e)}")
\ No newline at end of file
+        raise HTTPException(status_code=500, detail=f"Database error: {str(e)}")
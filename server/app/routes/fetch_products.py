@@ -1,202 +1,286 @@
 #routes/fetch_products.py
-from fastapi import APIRouter, HTTPException
-from db.database import supabase_client
-from schemas.product import Products
-from typing import List
+from fastapi import APIRouter, Header, HTTPException, Query, Response
+from fastapi.responses import StreamingResponse
+from db.database import run_blocking, run_query, supabase_client
+from schemas.product import ProductBatchRequest, Products
+from core.ratings import attach_ratings
+from core.cache import catalog_cache
+from core.conditional import not_modified, with_validators
+from core.search import ensure_product_index, product_index
+from core.popularity import ensure_popularity, popular_ranking
+from core.views import view_counter
+from core.similarity import NEIGHBOR_COUNT, ensure_similar_products, similar_products
+from core.fields import PRODUCT_FIELDS, add_thumbnails
+from core.responses import dumps
+from core.pagination import MAX_PAGE_SIZE, decode_cursor, fetch_page, fetch_page_or_all
+from typing import Annotated, List, Literal, Optional
 
 router = APIRouter()
 
-@router.get("/search_products/{product_name}")
-async def search_products_by_name(product_name: str):
-    try:
-        response = supabase_client.table("products").select(
-            "id, name, description, category, price_min, price_max, ar_asset_url, image_urls, address, in_stock, store_id, stores(name, store_id, latitude, longitude, store_image, type, rating, town)"
-        ).ilike("name", f"%{product_name}%").execute()
+EXPORT_PAGE_SIZE = 500
+DEFAULT_SEARCH_RESULTS = 20
+MAX_SEARCH_RESULTS = 100
+DEFAULT_POPULAR_RESULTS = 4
+MAX_POPULAR_RESULTS = 50
+# Tables every enriched product result is built from; used to tag cache entries
+PRODUCT_TABLES = ("products", "stores", "reviews")
+PRODUCT_SELECT = (
+    "id, name, description, category, price_min, price_max, ar_asset_url, image_urls, address, in_stock, store_id, "
+    "stores(name, store_id, latitude, longitude, store_image, type, rating, town)"
+)
+
+def enrich_products(products: list, requested, extra=()) -> list:
+    """
+    Add the computed fields that were asked for (all of them when no
+    fieldset was given) and trim each product to the requested fields.
+    Works on copies: the rows may be shared with coalesced callers and
+    cache entries, which must not see fields computed for this request.
+    """
+    products = [dict(product) for product in products]
+    if PRODUCT_FIELDS.wants(requested, "average_rating", "total_reviews"):
+        attach_ratings(products)
+    if requested is not None and "thumbnail" in requested:
+        add_thumbnails(products)
+    return PRODUCT_FIELDS.project(products, requested, extra)
 
-        if not response.data:
+@router.get("/search_products/{product_name}")
+async def search_products_by_name(
+    product_name: str,
+    limit: Annotated[int, Query(ge=1, le=MAX_SEARCH_RESULTS)] = DEFAULT_SEARCH_RESULTS,
+    fields: Optional[str] = None,
+):
+    requested = PRODUCT_FIELDS.resolve(fields)
+
+    def load():
+        ensure_product_index()
+
+        ranked = product_index.search(product_name, limit)
+        if not ranked:
             return {"products": []}
 
-        products = response.data
+        # Copy the indexed rows so rating fields never leak back into the index
+        products = [dict(product_index.docs[product_id], score=round(score, 4)) for product_id, score in ranked]
 
-        for product in products:
-            ratings_response = (
-                supabase_client.table("reviews")
-                .select("rating")
-                .eq("product_id", product["id"])
-                .execute()
-            )
-            ratings = [r["rating"] for r in ratings_response.data]
-            product["average_rating"] = "{:.1f}".format(round(sum(ratings) / len(ratings), 1)) if ratings else "0"
-            product["total_reviews"] = len(ratings)
+        return {"products": enrich_products(products, requested, extra=("score",))}
 
-        return {"products": products}
+    try:
+        return await run_blocking(
+            catalog_cache.get_or_load, PRODUCT_TABLES, ("search_products", product_name.lower(), limit, requested), load
+        )
 
     except Exception as e:
         print(f"Error searching products: {str(e)}")
         raise HTTPException(status_code=500, detail=f"Database error: {str(e)}")
 
 @router.get("/fetch_product/{product_id}")
-async def fetch_product(product_id: str):
-    try:
+async def fetch_product(product_id: str, fields: Optional[str] = None):
+    requested = PRODUCT_FIELDS.resolve(fields)
+
+    def load():
         response = supabase_client.table("products").select(
-            "id, name, description, category, price_min, price_max, ar_asset_url, image_urls, address, in_stock, store_id, stores(name, store_id, latitude, longitude, store_image, type, rating, town)"
+            PRODUCT_FIELDS.select(requested, PRODUCT_SELECT)
         ).eq("id", product_id).single().execute()
 
         if not response.data:
             raise HTTPException(status_code=404, detail="Product not found")
 
-        product = response.data
-
-        ratings_response = (
-            supabase_client.table("reviews")
-            .select("rating")
-            .eq("product_id", product["id"])
-            .execute()
-        )
-        ratings = [r["rating"] for r in ratings_response.data]
-        product["average_rating"] = "{:.1f}".format(round(sum(ratings) / len(ratings), 1)) if ratings else "0"
-        product["total_reviews"] = len(ratings)
+        product = enrich_products([response.data], requested)[0]
 
         return {"product": product}
 
+    try:
+        return await run_blocking(catalog_cache.get_or_load, PRODUCT_TABLES, ("fetch_product", product_id, requested), load)
+
     except Exception as e:
         print(f"Error fetching product: {str(e)}")
         raise HTTPException(status_code=500, detail=f"Database error: {str(e)}")
 
-@router.get("/fetch_products")
-async def fetch_products():
-    try:
+@router.post("/batch")
+async def fetch_products_batch(batch: ProductBatchRequest, fields: Optional[str] = None):
+    """
+    Fetch many products by id in one round trip (one `in_` query plus one
+    rating lookup). Products come back in the requested order; ids with no
+    product are listed under "missing".
+    """
+    requested = PRODUCT_FIELDS.resolve(fields)
+    ids = tuple(dict.fromkeys(batch.ids))
+
+    def load():
         response = supabase_client.table("products").select(
-            "id, name, description, category, price_min,price_max, ar_asset_url, image_urls, address, in_stock, store_id, stores(name, store_id, latitude, longitude, store_image, type, rating, town)"
-        ).execute()
+            PRODUCT_FIELDS.select(requested, PRODUCT_SELECT)
+        ).in_("id", list(ids)).execute()
 
-        if not response.data:
-            raise HTTPException(status_code=404, detail="No products found")
+        by_id = {product["id"]: product for product in response.data or []}
+        products = [by_id[product_id] for product_id in ids if product_id in by_id]
 
-        products = response.data
+        return {
+            "products": enrich_products(products, requested),
+            "missing": [product_id for product_id in ids if product_id not in by_id],
+        }
+
+    try:
+        return await run_blocking(catalog_cache.get_or_load, PRODUCT_TABLES, ("fetch_products_batch", ids, requested), load)
+
+    except Exception as e:
+        print(f"Error fetching product batch: {str(e)}")
+        raise HTTPException(status_code=500, detail=f"Database error: {str(e)}")
 
-        for product in products:
-            ratings_response = (
-                supabase_client.table("reviews")
-                .select("rating")
-                .eq("product_id", product["id"])
-                .execute()
-            )
-            ratings = [r["rating"] for r in ratings_response.data]
-            product["average_rating"] = "{:.1f}".format(round(sum(ratings) / len(ratings), 1)) if ratings else "0"
-            product["total_reviews"] = len(ratings)
+def stream_products(after, requested=None):
+    """
+    Yield the catalog as NDJSON, one enriched product per line, fetching
+    products and their ratings one upstream page at a time.
+    """
+    try:
+        while True:
+            query = supabase_client.table("products").select(PRODUCT_FIELDS.select(requested, PRODUCT_SELECT))
+            products, next_cursor = fetch_page(query, "id", after, EXPORT_PAGE_SIZE)
 
-        return {"products": products}
+            for product in enrich_products(products, requested):
+                yield dumps(product) + b"\n"
+
+            if next_cursor is None:
+                break
+            after = products[-1]["id"]
+    except Exception as e:
+        # Headers are already sent, so the client sees a truncated stream
+        print(f"Error streaming products: {str(e)}")
+
+@router.get("/fetch_products")
+async def fetch_products(
+    response: Response,
+    limit: Annotated[Optional[int], Query(ge=1, le=MAX_PAGE_SIZE)] = None,
+    cursor: Optional[str] = None,
+    format: Literal["json", "ndjson"] = "json",
+    fields: Optional[str] = None,
+    if_none_match: Annotated[Optional[str], Header()] = None,
+    if_modified_since: Annotated[Optional[str], Header()] = None,
+):
+    after = decode_cursor(cursor)
+    requested = PRODUCT_FIELDS.resolve(fields)
+    if format == "ndjson":
+        return StreamingResponse(stream_products(after, requested), media_type="application/x-ndjson")
+
+    def load():
+        # The whole catalog unless the client pages with limit/cursor
+        products, next_cursor = fetch_page_or_all(
+            lambda: supabase_client.table("products").select(PRODUCT_FIELDS.select(requested, PRODUCT_SELECT)),
+            "id", after, limit,
+        )
+
+        if not products:
+            if after is not None:
+                return {"products": [], "next_cursor": None}
+            raise HTTPException(status_code=404, detail="No products found")
+
+        return {"products": enrich_products(products, requested), "next_cursor": next_cursor}
+
+    try:
+        page, etag, modified_at = await run_blocking(
+            catalog_cache.get_or_load, PRODUCT_TABLES, ("fetch_products", limit, after, requested), with_validators(load)
+        )
+        unchanged = not_modified(
+            response, etag, modified_at, catalog_cache.ttl_for(PRODUCT_TABLES), if_none_match, if_modified_since
+        )
+        return unchanged or page
 
     except Exception as e:
         print(f"Error fetching products: {str(e)}")
         raise HTTPException(status_code=500, detail=f"Database error: {str(e)}")
 
 @router.get("/fetch_products_by_municipality/{municipality_id}")
-async def fetch_products_by_municipality(municipality_id: str):
-    try:
+async def fetch_products_by_municipality(municipality_id: str, fields: Optional[str] = None):
+    requested = PRODUCT_FIELDS.resolve(fields)
+
+    def load():
         response = supabase_client.table("products").select(
-            "id, name, description, category, price_min, price_max, ar_asset_url, image_urls, address, in_stock, store_id, stores(name, store_id, latitude, longitude, store_image, type, rating, town)"
+            PRODUCT_FIELDS.select(requested, PRODUCT_SELECT)
         ).eq("town", municipality_id).execute()
 
         if not response.data:
             return {"products": []}
 
-        products = response.data
-
-        for product in products:
-            ratings_response = (
-                supabase_client.table("reviews")
-                .select("rating")
-                .eq("product_id", product["id"])
-                .execute()
-            )
-            ratings = [r["rating"] for r in ratings_response.data]
-            product["average_rating"] = "{:.1f}".format(round(sum(ratings) / len(ratings), 1)) if ratings else "0"
-            product["total_reviews"] = len(ratings)
+        return {"products": enrich_products(response.data, requested)}
 
-        return {"products": products}
+    try:
+        return await run_blocking(
+            catalog_cache.get_or_load, PRODUCT_TABLES, ("fetch_products_by_municipality", municipality_id, requested), load
+        )
 
     except Exception as e:
         print(f"Error fetching products by municipality: {str(e)}")
         raise HTTPException(status_code=500, detail=f"Database error: {str(e)}")
 
 @router.get("/fetch_similar_products/{product_id}")
-async def fetch_similar_products(product_id: str):
-    try:
-        reference_product = supabase_client.table("products").select(
-            "id, name, store_id, stores(name, store_id, latitude, longitude, store_image, type, rating, town)"
-        ).eq("id", product_id).single().execute()
-
-        if not reference_product.data:
+async def fetch_similar_products(
+    product_id: str,
+    limit: Annotated[int, Query(ge=1, le=NEIGHBOR_COUNT)] = NEIGHBOR_COUNT,
+    fields: Optional[str] = None,
+):
+    requested = PRODUCT_FIELDS.resolve(fields)
+
+    def load():
+        ensure_similar_products()
+
+        neighbors = similar_products.lookup(product_id, limit)
+        if neighbors is None:
             raise HTTPException(status_code=404, detail="Reference product not found")
 
-        ref_name = reference_product.data["name"].strip()
+        similar = [dict(product, similarity=round(score, 4)) for product, score in neighbors]
 
-        response = supabase_client.table("products").select(
-            "id, name, description, category, price_min,price_max, ar_asset_url, image_urls, address, in_stock, store_id, stores(name, store_id, latitude, longitude, store_image, type, rating, town)"
-        ).eq("name", ref_name).neq("id", product_id).execute()
-
-        if not response.data:
-            print(f"No similar products found for name: '{ref_name}'")
-            return {"similar_products": []}
-
-        similar_products = response.data
-        print(f"Found similar products: {similar_products}")
+        return {"similar_products": enrich_products(similar, requested, extra=("similarity",))}
 
-        for product in similar_products:
-            ratings_response = (
-                supabase_client.table("reviews")
-                .select("rating")
-                .eq("product_id", product["id"])
-                .execute()
-            )
-            ratings = [r["rating"] for r in ratings_response.data]
-            product["average_rating"] = "{:.1f}".format(round(sum(ratings) / len(ratings), 1)) if ratings else "0"
-            product["total_reviews"] = len(ratings)
-
-        return {"similar_products": similar_products}
+    try:
+        return await run_blocking(
+            catalog_cache.get_or_load, PRODUCT_TABLES + ("product_neighbors",), ("fetch_similar_products", product_id, limit, requested), load
+        )
 
+    except HTTPException:
+        raise
     except Exception as e:
         print(f"Error fetching similar products: {str(e)}")
         raise HTTPException(status_code=500, detail=f"Database error: {str(e)}")
 
 @router.get("/fetch_popular_products")
-async def fetch_popular_products():
+async def fetch_popular_products(
+    k: Annotated[int, Query(ge=1, le=MAX_POPULAR_RESULTS)] = DEFAULT_POPULAR_RESULTS,
+    town: Optional[str] = None,
+    category: Optional[str] = None,
+    fields: Optional[str] = None,
+):
+    requested = PRODUCT_FIELDS.resolve(fields)
     try:
-        response = supabase_client.table('products').select(
-            "id, name, description, category, price_min,price_max, ar_asset_url, image_urls, address, in_stock, store_id, "
-            "stores(name, store_id, latitude, longitude, store_image, type, rating)"
-        ).execute()
-        
-        if not response.data:
+        if not popular_ranking.loaded:
+            await run_blocking(ensure_popularity)
+
+        products = popular_ranking.top(k, town=town, category=category)
+
+        if not products and town is None and category is None:
             raise HTTPException(status_code=404, detail="No products found")
-        
-        products = response.data
-        
-        for product in products:
-            ratings_response = supabase_client.table("reviews").select("rating").eq("product_id", product["id"]).execute()
-            ratings = [r["rating"] for r in ratings_response.data] if ratings_response.data else []
-            product["average_rating"] = "{:.1f}".format(round(sum(ratings)/len(ratings), 1)) if ratings else "0"
-            product["total_reviews"] = len(ratings)
-        
-        sorted_products = sorted(products, key=lambda x: x["average_rating"], reverse=True)[:4]
-        
-        return {"products": sorted_products}
+
+        # Ratings are part of the precomputed ranking, so only thumbnails are derived here
+        if requested is not None and "thumbnail" in requested:
+            products = add_thumbnails([dict(product) for product in products])
+        return {"products": PRODUCT_FIELDS.project(products, requested, extra=("popularity_score",))}
     
     except Exception as e:
         print(f"Error fetching products: {type(e).__name__}: {str(e)}")
         raise HTTPException(status_code=500, detail=f"Database error: {type(e).__name__}: {str(e)}")
 
-@router.put("/add_view_to_product/{product_id}")
+@router.put("/add_view_to_product/{product_id}", status_code=202)
 def increment_views(product_id: str):
     try:
-        response = supabase_client.table("products").select("views").eq("id", product_id).execute()
-        views = response.data[0]["views"]
-        new_views = views + 1
-        response = supabase_client.table("products").update({"views": new_views}).eq("id", product_id).execute()
-        
-        print(response)
-    except Exception as e:
-        print(f"Error incrementing views: {type(e).__name__}: {str(e)}")
-        raise HTTPException(status_code=404, detail="Product not found")
\ No newline at end of file
+        product_id = int(product_id)
+    except ValueError:
+        raise HTTPException(status_code=404, detail="Product not found")
+
+    # Existence is checked against the in-memory search index; only ids it
+    # does not know (e.g. added since the last refresh) cost a lookup
+    ensure_product_index()
+    if product_id not in product_index.docs:
+        found = run_query(supabase_client.table("products").select("id").eq("id", product_id).limit(1))
+        if not found.data:
+            raise HTTPException(status_code=404, detail="Product not found")
+
+    # Counted in memory and flushed to Supabase in batches by core/views.py
+    view_counter.hit(product_id)
+    return {"message": "View recorded"}
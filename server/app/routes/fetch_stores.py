@@ -1,89 +1,152 @@
 #routes/fetch_stores.py
-from fastapi import APIRouter, HTTPException
-from db.database import supabase_client
+from fastapi import APIRouter, Header, HTTPException, Query, Response
+from db.database import run_blocking, supabase_client
 from schemas.stores import Store
-from typing import List
+from core.cache import catalog_cache
+from core.conditional import not_modified, with_validators
+from core.fields import STORE_FIELDS
+from core.geo import ensure_store_indexes, store_locator
+from core.search import store_index
+from core.ratings import format_average_rating
+from core.pagination import MAX_PAGE_SIZE, NEXT_CURSOR_HEADER, decode_cursor, fetch_page_or_all
+from typing import Annotated, List, Optional
 import json
 
 router = APIRouter()
 
-@router.get("/fetch_stores", response_model=List[Store])
-async def fetch_stores():
-    try:
+STORE_SELECT = "store_id, name, description, latitude, longitude, rating, store_image, type, operating_hours, phone"
+DEFAULT_NEARBY_RADIUS_KM = 5
+MAX_NEARBY_RADIUS_KM = 200
+DEFAULT_NEARBY_RESULTS = 20
+DEFAULT_SEARCH_RESULTS = 20
+MAX_SEARCH_RESULTS = 100
+MAX_NEARBY_RESULTS = 200
+
+def with_distances(matches, requested) -> list:
+    stores = [dict(store, distance_km=round(distance, 3)) for store, distance in matches]
+    return STORE_FIELDS.project(stores, requested, extra=("distance_km",))
+
+@router.get("/fetch_stores", response_model=List[Store], response_model_exclude_unset=True)
+async def fetch_stores(
+    response: Response,
+    limit: Annotated[Optional[int], Query(ge=1, le=MAX_PAGE_SIZE)] = None,
+    cursor: Optional[str] = None,
+    fields: Optional[str] = None,
+    if_none_match: Annotated[Optional[str], Header()] = None,
+    if_modified_since: Annotated[Optional[str], Header()] = None,
+):
+    after = decode_cursor(cursor)
+    requested = STORE_FIELDS.resolve(fields)
+
+    def load():
         print("Attempting to connect to Supabase...")
         
-        # Query the stores table
-        response = supabase_client.table("stores").select(
-            "store_id, name, description, latitude, longitude, rating, store_image, type, operating_hours, phone"
-        ).execute()
+        # Every store unless the client pages with limit/cursor
+        stores, next_cursor = fetch_page_or_all(
+            lambda: supabase_client.table("stores").select(STORE_FIELDS.select(requested, STORE_SELECT)),
+            "store_id", after, limit,
+        )
         
-        print("Supabase Response received. Data length:", len(response.data) if response.data else 0)
-        if response.data:
-            print("First store sample:", json.dumps(response.data[0], ensure_ascii=False))
-        else:
+        print("Supabase Response received. Data length:", len(stores))
+        if stores:
+            print("First store sample:", json.dumps(stores[0], ensure_ascii=False))
+        return stores, next_cursor
+
+    try:
+        (stores, next_cursor), etag, modified_at = await run_blocking(
+            catalog_cache.get_or_load, ("stores",), ("fetch_stores", limit, after, requested), with_validators(load)
+        )
+        if not stores and after is None:
             print("No data found in response")
             raise HTTPException(status_code=404, detail="No stores found")
-        
-        return response.data
+
+        # The body stays a plain list; the cursor for the next page rides in a header
+        if next_cursor:
+            response.headers[NEXT_CURSOR_HEADER] = next_cursor
+
+        unchanged = not_modified(
+            response, etag, modified_at, catalog_cache.ttl_for(("stores",)), if_none_match, if_modified_since,
+            extra_headers=(NEXT_CURSOR_HEADER,),
+        )
+        return unchanged or stores
 
     except Exception as e:
         print(f"Error in fetch_stores: {str(e)}")
         raise HTTPException(status_code=500, detail=f"Database error: {str(e)}")
 
-@router.get("/search_stores/{store_name}")
-async def search_stores_by_name(store_name: str):
+@router.get("/nearby")
+async def fetch_nearby_stores(
+    lat: Annotated[float, Query(ge=-90, le=90)],
+    lon: Annotated[float, Query(ge=-180, le=180)],
+    radius: Annotated[float, Query(gt=0, le=MAX_NEARBY_RADIUS_KM)] = DEFAULT_NEARBY_RADIUS_KM,
+    limit: Annotated[int, Query(ge=1, le=MAX_NEARBY_RESULTS)] = DEFAULT_NEARBY_RESULTS,
+    type: Optional[str] = None,
+    town: Optional[str] = None,
+    fields: Optional[str] = None,
+):
+    """
+    Stores within `radius` km of (lat, lon), nearest first, each with its distance_km.
+    """
+    requested = STORE_FIELDS.resolve(fields)
     try:
-        print(f"Searching for stores with name: {store_name}")
-        
-        # Clean the store name by removing parentheses and special characters
-        cleaned_store_name = store_name.replace("(", "").replace(")", "").strip()
-        print(f"Cleaned store name: {cleaned_store_name}")
-        
-        # First try exact match
-        response = supabase_client.table("stores").select(
-            "store_id, name, description, latitude, longitude, rating, store_image, type, operating_hours, phone, town"
-        ).eq("name", cleaned_store_name).execute()
-        
-        # If no exact match, try case-insensitive partial match
-        if not response.data:
-            print(f"No exact match, trying partial match for: {cleaned_store_name}")
-            response = supabase_client.table("stores").select(
-                "store_id, name, description, latitude, longitude, rating, store_image, type, operating_hours, phone, town"
-            ).ilike("name", f"%{cleaned_store_name}%").execute()
+        if not store_locator.loaded or not store_index.loaded:
+            await run_blocking(ensure_store_indexes)
+        matches = store_locator.nearby(lat, lon, radius, limit, store_type=type, town=town)
+        return {"stores": with_distances(matches, requested)}
 
-        print(f"Search results: {response.data if response.data else 'No results found'}")
-        
-        if not response.data:
-            # Try searching by splitting the name into parts
-            name_parts = cleaned_store_name.split()
-            if len(name_parts) > 1:
-                print(f"Trying search with first part: {name_parts[0]}")
-                response = supabase_client.table("stores").select(
-                    "store_id, name, description, latitude, longitude, rating, store_image, type, operating_hours, phone, town"
-                ).ilike("name", f"%{name_parts[0]}%").execute()
+    except Exception as e:
+        print(f"Error in fetch_nearby_stores: {str(e)}")
+        raise HTTPException(status_code=500, detail=f"Database error: {str(e)}")
 
-        if not response.data:
-            return {"stores": []}
-            
-        # Clean the response data
-        cleaned_stores = []
-        for store in response.data:
-            cleaned_store = {
-                "store_id": store.get("store_id", ""),
-                "name": store.get("name", "").encode('utf-8', 'ignore').decode('utf-8'),
-                "description": store.get("description", "").encode('utf-8', 'ignore').decode('utf-8'),
-                "latitude": store.get("latitude"),
-                "longitude": store.get("longitude"),
-                "rating": store.get("rating", 0),
-                "store_image": store.get("store_image", ""),
-                "type": store.get("type", "").encode('utf-8', 'ignore').decode('utf-8'),
-                "operating_hours": store.get("operating_hours", "").encode('utf-8', 'ignore').decode('utf-8'),
-                "phone": store.get("phone", ""),
-                "town": store.get("town", "").encode('utf-8', 'ignore').decode('utf-8')
-            }
-            cleaned_stores.append(cleaned_store)
-        
-        return {"stores": cleaned_stores}
+@router.get("/in_bbox")
+async def fetch_stores_in_bbox(
+    min_lat: Annotated[float, Query(ge=-90, le=90)],
+    min_lon: Annotated[float, Query(ge=-180, le=180)],
+    max_lat: Annotated[float, Query(ge=-90, le=90)],
+    max_lon: Annotated[float, Query(ge=-180, le=180)],
+    lat: Annotated[Optional[float], Query(ge=-90, le=90)] = None,
+    lon: Annotated[Optional[float], Query(ge=-180, le=180)] = None,
+    limit: Annotated[int, Query(ge=1, le=MAX_NEARBY_RESULTS)] = MAX_NEARBY_RESULTS,
+    type: Optional[str] = None,
+    town: Optional[str] = None,
+    fields: Optional[str] = None,
+):
+    """
+    Stores inside the bounding box (e.g. the visible map region), nearest to
+    (lat, lon) first, or to the box centre when no point is given.
+    """
+    if min_lat > max_lat or min_lon > max_lon:
+        raise HTTPException(status_code=400, detail="Bounding box minimums must not exceed maximums")
+    requested = STORE_FIELDS.resolve(fields)
+    try:
+        if not store_locator.loaded or not store_index.loaded:
+            await run_blocking(ensure_store_indexes)
+        matches = store_locator.in_bbox(
+            min_lat, min_lon, max_lat, max_lon, limit, lat=lat, lon=lon, store_type=type, town=town
+        )
+        return {"stores": with_distances(matches, requested)}
+
+    except Exception as e:
+        print(f"Error in fetch_stores_in_bbox: {str(e)}")
+        raise HTTPException(status_code=500, detail=f"Database error: {str(e)}")
+
+@router.get("/search_stores/{store_name}")
+async def search_stores_by_name(
+    store_name: str,
+    limit: Annotated[int, Query(ge=1, le=MAX_SEARCH_RESULTS)] = DEFAULT_SEARCH_RESULTS,
+    fields: Optional[str] = None,
+):
+    """
+    Ranked store name search against the in-memory name index. Each store
+    carries its match_type (exact, prefix, token or fuzzy) and score.
+    """
+    requested = STORE_FIELDS.resolve(fields)
+    try:
+        if not store_locator.loaded or not store_index.loaded:
+            await run_blocking(ensure_store_indexes)
+        matches = store_index.search(store_name, limit)
+        stores = [dict(store, match_type=match_type, score=score) for store, match_type, score in matches]
+        return {"stores": STORE_FIELDS.project(stores, requested, extra=("match_type", "score"))}
         
     except Exception as e:
         print(f"Error in search_stores_by_name: {str(e)}")
@@ -91,7 +154,7 @@ async def search_stores_by_name(store_name: str):
 
 @router.get("/fetch_stores_by_town/{town}")
 async def fetch_stores_by_town(town: str):
-    try:
+    def load():
         print(f"Fetching stores for town: {town}")
         
         response = supabase_client.table("stores").select(
@@ -114,6 +177,62 @@ async def fetch_stores_by_town(town: str):
 
         return {"stores": stores}
 
+    try:
+        return await run_blocking(catalog_cache.get_or_load, ("stores",), ("fetch_stores_by_town", town), load)
+
     except Exception as e:
         print(f"Error fetching stores by town: {str(e)}")
         raise HTTPException(status_code=500, detail=f"Database error: {str(e)}")
+
+def empty_store_summary() -> dict:
+    return {"product_count": 0, "in_stock_count": 0, "price_min": None, "price_max": None, "rating_sum": 0, "rating_count": 0}
+
+@router.get("/fetch_store_directory/{town}")
+async def fetch_store_directory(town: str):
+    """
+    Stores in a town with their product count, in-stock count, price range
+    and average product rating, read from the store_product_summary rollup
+    in one lookup for all of the town's stores.
+    """
+    def load():
+        response = supabase_client.table("stores").select(STORE_SELECT).eq("town", town).execute()
+        stores = response.data or []
+        if not stores:
+            return {"stores": []}
+
+        summaries = supabase_client.table("store_product_summary").select(
+            "store_id, product_count, in_stock_count, price_min, price_max, rating_sum, rating_count"
+        ).in_("store_id", sorted(store["store_id"] for store in stores)).execute()
+        by_store = {row["store_id"]: row for row in summaries.data or []}
+
+        directory = []
+        for store in stores:
+            summary = by_store.get(store["store_id"]) or empty_store_summary()
+            rating_count = int(summary["rating_count"] or 0)
+            directory.append({
+                "id": store["store_id"],
+                "name": store["name"],
+                "description": store["description"],
+                "image_url": store["store_image"],
+                "rating": store["rating"],
+                "type": store["type"],
+                "operating_hours": store["operating_hours"],
+                "phone": store["phone"],
+                "product_count": int(summary["product_count"] or 0),
+                "in_stock_count": int(summary["in_stock_count"] or 0),
+                "price_min": summary["price_min"],
+                "price_max": summary["price_max"],
+                "average_rating": format_average_rating(float(summary["rating_sum"] or 0), rating_count),
+                "total_reviews": rating_count,
+            })
+
+        return {"stores": directory}
+
+    try:
+        return await run_blocking(
+            catalog_cache.get_or_load, ("stores", "products", "reviews"), ("fetch_store_directory", town), load
+        )
+
+    except Exception as e:
+        print(f"Error fetching store directory: {str(e)}")
+        raise HTTPException(status_code=500, detail=f"Database error: {str(e)}")
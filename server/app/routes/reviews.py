@@ -1,10 +1,14 @@
 #routes/reviews.py
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Query, Response
 import logging
-from db.database import supabase_client
+from db.database import execute, run_blocking, supabase_client
 from schemas.review import ReviewCreate, ReviewResponse
 from auth.auth_handler import get_current_user
-from typing import List
+from core.ratings import record_review_rating
+from core.cache import catalog_cache
+from core.pagination import NEXT_CURSOR_HEADER, decode_cursor, fetch_keyset_all, fetch_keyset_page
+from core.reviewers import reviewer_names
+from typing import Annotated, List, Literal, Optional
 
 router = APIRouter()
 logging.basicConfig(level=logging.DEBUG)
@@ -16,7 +20,7 @@ async def create_review(review: ReviewCreate, user=Depends(get_current_user)):
         logger.debug(f"User: {user}")
         logger.debug(f"Review payload: {review.dict()}")
 
-        response = (
+        response = await execute(
             supabase_client.table("reviews")
             .insert(
                 {
@@ -26,10 +30,13 @@ async def create_review(review: ReviewCreate, user=Depends(get_current_user)):
                     "review_text": review.review_text,
                 }
             )
-            .execute()
         )
         logger.debug(f"Insert response: {response.data}")
 
+        if response.data:
+            await run_blocking(record_review_rating, review.product_id, review.rating)
+            catalog_cache.invalidate("reviews")
+
         return {"message": "Review submitted successfully", "review": response.data[0] if response.data else response.data}
     except HTTPException as e:
         raise e
@@ -37,41 +44,50 @@ async def create_review(review: ReviewCreate, user=Depends(get_current_user)):
         logger.error(f"Error in create_review: {str(e)}", exc_info=True)
         raise HTTPException(status_code=500, detail=f"Internal server error: {str(e)}")
 
+# Review listing orders; every order ends on (created_at, id) so the keyset is unique
+REVIEW_ORDERS = {
+    "newest": [("created_at", True), ("id", True)],
+    "oldest": [("created_at", False), ("id", False)],
+    "highest": [("rating", True), ("created_at", True), ("id", True)],
+    "lowest": [("rating", False), ("created_at", True), ("id", True)],
+}
+REVIEW_SELECT = "id, created_at, product_id, rating, review_text, user_id"
+DEFAULT_REVIEW_PAGE_SIZE = 20
+MAX_REVIEW_PAGE_SIZE = 100
+
 @router.get("/{product_id}", response_model=List[ReviewResponse])
-async def get_reviews(product_id: int):
+async def get_reviews(
+    product_id: int,
+    response: Response,
+    limit: Annotated[Optional[int], Query(ge=1, le=MAX_REVIEW_PAGE_SIZE)] = None,
+    cursor: Optional[str] = None,
+    sort: Literal["newest", "oldest", "highest", "lowest"] = "newest",
+    rating: Annotated[Optional[float], Query(ge=0, le=5)] = None,
+):
+    """
+    A product's reviews as a plain list. Without limit or cursor every review
+    is returned, as the app expects; with either, one page is returned and
+    the cursor for the next page is in the X-Next-Cursor header. Reviewer
+    names come from the reviewer name cache.
+    """
+    after = decode_cursor(cursor, compound=True)
+    order = REVIEW_ORDERS[sort]
     try:
-        # Log the incoming request
-        logger.debug(f"Fetching reviews for product_id: {product_id}")
-        
-        # Convert product_id to int if it's a string
-        try:
-            product_id = int(product_id)
-        except ValueError:
-            logger.error(f"Invalid product_id format: {product_id}")
-            return []
-            
-        response = (
-            supabase_client.table("reviews")
-            .select("*, users(first_name, last_name)")
-            .eq("product_id", product_id)
-            .execute()
-        )
-        
-        logger.debug(f"Response data: {response.data}")
+        def build_query():
+            query = supabase_client.table("reviews").select(REVIEW_SELECT).eq("product_id", product_id)
+            return query.eq("rating", rating) if rating is not None else query
 
-        if not response.data:
-            logger.info(f"No reviews found for product_id: {product_id}")
-            return []
+        if limit is None and after is None:
+            rows, next_cursor = await run_blocking(fetch_keyset_all, build_query, order), None
+        else:
+            rows, next_cursor = await run_blocking(fetch_keyset_page, build_query(), order, after, limit or DEFAULT_REVIEW_PAGE_SIZE)
+        names = await run_blocking(reviewer_names.lookup, [review["user_id"] for review in rows]) if rows else {}
 
-        # Combine first_name and last_name into full_name
-        flattened_reviews = [
-            {
-                **review,
-                "full_name": f"{review['users']['first_name']} {review['users']['last_name']}"
-            }
-            for review in response.data
-        ]
-        return flattened_reviews
+        if next_cursor:
+            response.headers[NEXT_CURSOR_HEADER] = next_cursor
+        return [{**review, "full_name": names.get(str(review["user_id"]), "")} for review in rows]
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"Error in get_reviews: {str(e)}", exc_info=True)
         raise HTTPException(status_code=500, detail=f"Internal server error: {str(e)}")
@@ -1,6 +1,7 @@
 from pydantic import BaseModel
 from datetime import date, time
-from typing import Optional
+from typing import List, Optional
+from schemas.highlights import Highlight
 
 class Event(BaseModel):
     id: str
@@ -15,3 +16,6 @@ class Event(BaseModel):
     entrance_fee: float
     ticket_availability: bool
     town: Optional[str] = None
+
+class EventWithHighlights(Event):
+    highlights: List[Highlight] = []
@@ -1,4 +1,4 @@
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
 from typing import List, Union, Optional
 from uuid import UUID
 
@@ -20,3 +20,5 @@ class Products(BaseModel):
     town: Optional[str] = None
     views: int
 
+class ProductBatchRequest(BaseModel):
+    ids: List[int] = Field(..., min_length=1, max_length=300)
@@ -4,12 +4,14 @@ from pydantic import BaseModel
 
 class Store(BaseModel):
     store_id: Union[UUID, str]  # Accept UUID or string
-    name: str
-    description: str
-    latitude: float
-    longitude: float
-    rating: float
+    # Optional so sparse fieldsets (?fields=) validate; full rows always carry them
+    name: Optional[str] = None
+    description: Optional[str] = None
+    latitude: Optional[float] = None
+    longitude: Optional[float] = None
+    rating: Optional[float] = None
     store_image: Optional[str] = None  # Make it optional
     type: Optional[str] = None  # Make it optional as well based on previous error
     operating_hours: Optional[str] = None  # For highlights
     phone: Optional[str] = None           # For highlights
+    town: Optional[str] = None
@@ -0,0 +1,287 @@
+# tests/conftest.py
+import os
+import sys
+import types
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+class FakeResponse:
+    def __init__(self, data, count=None):
+        self.data = data
+        self.count = count
+
+
+OPERATORS = {
+    "eq": lambda a, b: a == b, "neq": lambda a, b: a != b, "lt": lambda a, b: a < b,
+    "lte": lambda a, b: a <= b, "gt": lambda a, b: a > b, "gte": lambda a, b: a >= b,
+}
+
+
+def split_top_level(expression):
+    parts, depth, quoted, current = [], 0, False, ""
+    for ch in expression:
+        if ch == '"':
+            quoted = not quoted
+        elif not quoted and ch in "()":
+            depth += 1 if ch == "(" else -1
+        elif not quoted and ch == "," and depth == 0:
+            parts.append(current)
+            current = ""
+            continue
+        current += ch
+    return parts + [current]
+
+
+def or_predicate(expression):
+    """
+    Evaluate a PostgREST logic tree such as `a.lt.1,and(a.eq.1,b.gt."x")`
+    against a row, comparing as numbers when the row value is numeric.
+    """
+    def term(text):
+        if text.startswith("and(") or text.startswith("or("):
+            combine = all if text.startswith("and(") else any
+            children = [term(part) for part in split_top_level(text[text.index("(") + 1:-1])]
+            return lambda row: combine(child(row) for child in children)
+        column, operator, value = text.split(".", 2)
+        value = value.strip('"').replace('\\"', '"')
+
+        def compare(row):
+            current = row.get(column)
+            if current is None:
+                return False
+            if isinstance(current, (int, float)) and not isinstance(current, bool):
+                return OPERATORS[operator](current, float(value))
+            return OPERATORS[operator](str(current), value)
+        return compare
+
+    children = [term(part) for part in split_top_level(expression)]
+    return lambda row: any(child(row) for child in children)
+
+
+class FakeQuery:
+    """
+    Tiny in-memory stand-in for the postgrest query builder. Filters are
+    evaluated against the rows of the fake table, and every execute() is
+    recorded on the client so tests can count upstream round trips.
+    """
+
+    def __init__(self, client, table):
+        self.client = client
+        self.table = table
+        self.operation = "select"
+        self.columns = "*"
+        self.payload = None
+        self.filters = []
+        self.ordering = []
+        self.row_limit = None
+        self.row_offset = 0
+        self.is_single = False
+        self.conflict_key = "id"
+
+    # Projection / mutation
+    def select(self, *columns, **kwargs):
+        self.columns = ",".join(columns)
+        return self
+
+    def insert(self, payload, **kwargs):
+        self.operation, self.payload = "insert", payload
+        return self
+
+    def upsert(self, payload, on_conflict=None, **kwargs):
+        self.operation, self.payload = "upsert", payload
+        if on_conflict:
+            self.conflict_key = on_conflict
+        return self
+
+    def update(self, payload, **kwargs):
+        self.operation, self.payload = "update", payload
+        return self
+
+    def delete(self, **kwargs):
+        self.operation = "delete"
+        return self
+
+    # Filters
+    def _filter(self, column, predicate):
+        self.filters.append((column, predicate))
+        return self
+
+    def eq(self, column, value):
+        return self._filter(column, lambda v: str(v) == str(value))
+
+    def neq(self, column, value):
+        return self._filter(column, lambda v: str(v) != str(value))
+
+    def gt(self, column, value):
+        return self._filter(column, lambda v: v is not None and v > value)
+
+    def gte(self, column, value):
+        return self._filter(column, lambda v: v is not None and v >= value)
+
+    def lt(self, column, value):
+        return self._filter(column, lambda v: v is not None and v < value)
+
+    def lte(self, column, value):
+        return self._filter(column, lambda v: v is not None and v <= value)
+
+    def in_(self, column, values):
+        wanted = {str(value) for value in values}
+        return self._filter(column, lambda v: str(v) in wanted)
+
+    def or_(self, filters, **kwargs):
+        # Logic trees test the whole row, not one column
+        return self._filter(None, or_predicate(filters))
+
+    def ilike(self, column, pattern):
+        needle = pattern.strip("%").lower()
+        return self._filter(column, lambda v: v is not None and needle in str(v).lower())
+
+    # Modifiers
+    def order(self, column, desc=False, **kwargs):
+        self.ordering.append((column, desc))
+        return self
+
+    def limit(self, size, **kwargs):
+        self.row_limit = size
+        return self
+
+    def range(self, start, end, **kwargs):
+        self.row_offset, self.row_limit = start, end - start + 1
+        return self
+
+    def single(self):
+        self.is_single = True
+        return self
+
+    def _matches(self, row):
+        return all(predicate(row if column is None else row.get(column)) for column, predicate in self.filters)
+
+    def execute(self):
+        self.client.calls.append((self.table, self.operation))
+        rows = self.client.tables.setdefault(self.table, [])
+
+        if self.operation in ("insert", "upsert"):
+            payload = self.payload if isinstance(self.payload, list) else [self.payload]
+            written = []
+            for row in payload:
+                existing = None
+                if self.operation == "upsert":
+                    existing = next((r for r in rows if r.get(self.conflict_key) == row.get(self.conflict_key)), None)
+                if existing is not None:
+                    existing.update(row)
+                else:
+                    if self.operation == "insert" and "id" not in row and any("id" in r for r in rows):
+                        # Stand in for the database-generated primary key
+                        row = dict(row, id=f"generated-{len(rows) + 1}")
+                    rows.append(dict(row))
+                written.append(dict(row))
+            return FakeResponse(written)
+        if self.operation == "update":
+            matched = [row for row in rows if self._matches(row)]
+            for row in matched:
+                row.update(self.payload)
+            return FakeResponse([dict(row) for row in matched])
+        if self.operation == "delete":
+            matched = [row for row in rows if self._matches(row)]
+            self.client.tables[self.table] = [row for row in rows if not self._matches(row)]
+            return FakeResponse(matched)
+
+        result = [dict(row) for row in rows if self._matches(row)]
+        for column, desc in reversed(self.ordering):
+            result.sort(key=lambda row: (row.get(column) is None, row.get(column)), reverse=desc)
+        result = result[self.row_offset:]
+        if self.row_limit is not None:
+            result = result[:self.row_limit]
+        # PostgREST's max-rows cap
+        result = result[:self.client.max_rows]
+        if self.is_single:
+            return FakeResponse(result[0] if result else None)
+        return FakeResponse(result)
+
+
+class FakeRpc:
+    def __init__(self, client, name, params):
+        self.client = client
+        self.name = name
+        self.params = params
+
+    def execute(self):
+        self.client.calls.append((self.name, "rpc"))
+        handler = self.client.functions.get(self.name)
+        return FakeResponse(handler(self.client, **self.params) if handler else None)
+
+
+def rebuild_product_rating_summary(fake, p_first_id, p_last_id):
+    # Mirrors migration 005: absolute totals for one id range, zeroing products without reviews
+    from core.ratings import empty_summary, star_column
+
+    summaries = {}
+    for review in fake.tables.get("reviews", []):
+        if not p_first_id <= review["product_id"] <= p_last_id:
+            continue
+        summary = summaries.setdefault(review["product_id"], empty_summary())
+        summary["rating_sum"] += float(review["rating"])
+        summary["rating_count"] += 1
+        summary[star_column(review["rating"])] += 1
+    rows = fake.tables.setdefault("product_rating_summary", [])
+    written = len(summaries)
+    for row in rows:
+        if p_first_id <= row["product_id"] <= p_last_id:
+            row.update(summaries.pop(row["product_id"], empty_summary()))
+    rows.extend({"product_id": product_id, **summary} for product_id, summary in summaries.items())
+    return written
+
+
+class FakeSupabase:
+    def __init__(self, tables=None):
+        self.tables = {name: [dict(row) for row in rows] for name, rows in (tables or {}).items()}
+        self.functions = {"rebuild_product_rating_summary": rebuild_product_rating_summary}
+        self.max_rows = 1000
+        self.calls = []
+
+    def table(self, name):
+        return FakeQuery(self, name)
+
+    def rpc(self, name, params=None):
+        return FakeRpc(self, name, params or {})
+
+    def calls_to(self, table):
+        return [call for call in self.calls if call[0] == table]
+
+
+@pytest.fixture
+def fake_supabase(monkeypatch):
+    """
+    Swap the shared supabase_client in every loaded app module for an
+    in-memory fake and start from empty caches and indexes. Tests fill
+    fake_supabase.tables before calling routes.
+    """
+    from core.cache import catalog_cache
+    from core.events import event_calendar
+    from core.geo import store_locator
+    from core.identity import identity_cache
+    from core.municipalities import municipality_registry
+    from core.popularity import popular_ranking
+    from core.reviewers import reviewer_names
+    from core.search import product_index, store_index
+    from core.similarity import similar_products
+    from db.database import supabase_client
+
+    catalog_cache.invalidate()
+    product_index.clear()
+    popular_ranking.clear()
+    similar_products.clear()
+    store_locator.clear()
+    store_index.clear()
+    municipality_registry.clear()
+    event_calendar.clear()
+    reviewer_names.clear()
+    identity_cache.clear()
+    fake = FakeSupabase()
+    for module in list(sys.modules.values()):
+        if isinstance(module, types.ModuleType) and getattr(module, "supabase_client", None) is supabase_client:
+            monkeypatch.setattr(module, "supabase_client", fake)
+    return fake
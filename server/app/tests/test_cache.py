@@ -0,0 +1,139 @@
+# tests/test_cache.py
+import asyncio
+
+import pytest
+from fastapi import HTTPException
+
+from core.cache import QueryCache
+from routes import admin, fetch_products, reviews
+from schemas.review import ReviewCreate
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_entries_expire_after_shortest_table_ttl():
+    clock = FakeClock()
+    cache = QueryCache(ttls={"products": 300, "stores": 60}, clock=clock)
+    cache.set(("products", "stores"), "key", "value")
+
+    clock.now = 59
+    assert cache.get("key") == ("value", True)
+    clock.now = 60
+    assert cache.get("key") == (None, False)
+
+
+def test_least_recently_used_entry_is_evicted():
+    cache = QueryCache(max_entries=2)
+    cache.set(("products",), "a", 1)
+    cache.set(("products",), "b", 2)
+    cache.get("a")
+    cache.set(("products",), "c", 3)
+
+    assert cache.get("b") == (None, False)
+    assert cache.get("a") == (1, True)
+    assert cache.stats()["evictions"] == 1
+
+
+def test_invalidate_only_drops_entries_built_from_that_table():
+    cache = QueryCache()
+    cache.set(("products", "reviews"), "products", 1)
+    cache.set(("stores",), "stores", 2)
+
+    assert cache.invalidate("reviews") == 1
+    assert cache.get("products") == (None, False)
+    assert cache.get("stores") == (2, True)
+
+
+def test_load_overtaken_by_an_invalidation_is_not_stored():
+    cache = QueryCache()
+
+    def loader():
+        # A review lands (and invalidates) while this load is reading
+        cache.invalidate("reviews")
+        return "stale"
+
+    assert cache.get_or_load(("products", "reviews"), "key", loader) == "stale"
+    assert cache.get("key") == (None, False)
+    assert cache.get_or_load(("products", "reviews"), "key", lambda: "fresh") == "fresh"
+    assert cache.get("key") == ("fresh", True)
+
+
+def test_full_invalidation_also_discards_running_loads():
+    cache = QueryCache()
+
+    def loader():
+        cache.invalidate()
+        return "stale"
+
+    cache.get_or_load(("stores",), "key", loader)
+    assert cache.get("key") == (None, False)
+
+
+def test_loader_errors_are_not_cached():
+    cache = QueryCache()
+
+    def failing():
+        raise RuntimeError("upstream down")
+
+    with pytest.raises(RuntimeError):
+        cache.get_or_load(("products",), "key", failing)
+    assert cache.get_or_load(("products",), "key", lambda: "ok") == "ok"
+
+
+def test_repeat_reads_are_served_from_memory(fake_supabase):
+    fake_supabase.tables["products"] = [{"id": 1, "name": "Basi", "town": "agoo"}]
+
+    first = asyncio.run(fetch_products.fetch_products_by_municipality("agoo"))
+    upstream_calls = len(fake_supabase.calls)
+    second = asyncio.run(fetch_products.fetch_products_by_municipality("agoo"))
+
+    assert second == first
+    assert len(fake_supabase.calls) == upstream_calls
+
+
+def test_create_review_invalidates_product_ratings(fake_supabase):
+    fake_supabase.tables["products"] = [{"id": 1, "name": "Basi", "town": "agoo"}]
+    fake_supabase.tables["product_rating_summary"] = []
+
+    def record_product_rating(fake, p_product_id, p_rating):
+        fake.tables["product_rating_summary"].append(
+            {"product_id": p_product_id, "rating_sum": p_rating, "rating_count": 1}
+        )
+
+    fake_supabase.functions["record_product_rating"] = record_product_rating
+
+    before = asyncio.run(fetch_products.fetch_product("1"))
+    assert before["product"]["total_reviews"] == 0
+
+    review = ReviewCreate(product_id=1, rating=5, review_text="Solid")
+    asyncio.run(reviews.create_review(review, user={"id": "u1"}))
+
+    after = asyncio.run(fetch_products.fetch_product("1"))
+    assert after["product"]["total_reviews"] == 1
+
+
+def test_admin_endpoints_require_key(monkeypatch):
+    monkeypatch.setattr(admin.settings, "ADMIN_API_KEY", "secret")
+
+    with pytest.raises(HTTPException) as error:
+        admin.require_admin_key("wrong")
+    assert error.value.status_code == 403
+    with pytest.raises(HTTPException):
+        admin.require_admin_key(None)
+    admin.require_admin_key("secret")
+
+
+def test_admin_purge_clears_cache(fake_supabase):
+    fake_supabase.tables["products"] = [{"id": 1, "name": "Basi", "town": "agoo"}]
+    asyncio.run(fetch_products.fetch_products_by_municipality("agoo"))
+
+    result = asyncio.run(admin.purge_cache(["products"]))
+
+    assert result["removed"] == 1
+    assert asyncio.run(admin.cache_stats())["entries"] == 0
@@ -0,0 +1,75 @@
+# tests/test_compression.py
+import gzip
+
+import brotli
+import pytest
+from fastapi import FastAPI
+from fastapi.responses import StreamingResponse
+from fastapi.testclient import TestClient
+
+from core.compression import CompressionMiddleware, choose_encoding
+from core.responses import FastJSONResponse
+
+LARGE = {"products": [{"id": i, "name": "Inabel Blanket ñ", "image_urls": ["a.jpg", "b.jpg"]} for i in range(200)]}
+
+
+@pytest.fixture
+def client():
+    app = FastAPI(default_response_class=FastJSONResponse)
+    app.add_middleware(CompressionMiddleware, minimum_size=500)
+
+    @app.get("/large")
+    async def large():
+        return LARGE
+
+    @app.get("/small")
+    async def small():
+        return {"ok": True}
+
+    @app.get("/stream")
+    async def stream():
+        lines = (b'{"id": %d}\n' % i for i in range(100))
+        return StreamingResponse(lines, media_type="application/x-ndjson")
+
+    return TestClient(app)
+
+
+def raw_get(client, path, encoding):
+    with client.stream("GET", path, headers={"Accept-Encoding": encoding}) as response:
+        return response, b"".join(response.iter_raw())
+
+
+def test_encoding_negotiation():
+    assert choose_encoding("gzip, deflate, br") == "br"
+    assert choose_encoding("gzip;q=0.5, br;q=0") == "gzip"
+    assert choose_encoding("identity") is None
+
+
+def test_orjson_response_round_trips():
+    body = FastJSONResponse(LARGE).body
+    assert b"\xc3\xb1" in body
+    assert b"\\u00f1" not in body
+
+
+@pytest.mark.parametrize("encoding, decode", [("br", brotli.decompress), ("gzip", gzip.decompress)])
+def test_large_bodies_are_compressed(client, encoding, decode):
+    response, raw = raw_get(client, "/large", encoding)
+
+    assert response.headers["content-encoding"] == encoding
+    assert response.headers["vary"] == "Accept-Encoding"
+    assert int(response.headers["content-length"]) == len(raw)
+    assert decode(raw) == FastJSONResponse(LARGE).body
+
+
+def test_small_bodies_are_left_alone(client):
+    response, raw = raw_get(client, "/small", "gzip")
+
+    assert "content-encoding" not in response.headers
+    assert raw == b'{"ok":true}'
+
+
+def test_streams_are_compressed_chunk_by_chunk(client):
+    response, raw = raw_get(client, "/stream", "gzip")
+
+    assert response.headers["content-encoding"] == "gzip"
+    assert gzip.decompress(raw).count(b"\n") == 100
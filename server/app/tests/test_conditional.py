@@ -0,0 +1,86 @@
+# tests/test_conditional.py
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from core.pagination import NEXT_CURSOR_HEADER
+from routes import fetch_municipalities, fetch_products, fetch_stores
+
+
+@pytest.fixture
+def client(fake_supabase):
+    fake_supabase.tables["products"] = [{"id": i, "name": f"Product {i}"} for i in range(1, 4)]
+    fake_supabase.tables["stores"] = [
+        {"store_id": f"s{i}", "name": f"Store {i}", "description": "", "latitude": 16.6, "longitude": 120.3, "rating": 4}
+        for i in range(3)
+    ]
+    fake_supabase.tables["municipalities"] = [
+        {"id": str(i), "name": f"Town {i}", "description": "", "image_url": ""} for i in range(2)
+    ]
+    app = FastAPI()
+    app.include_router(fetch_products.router, prefix="/products")
+    app.include_router(fetch_stores.router, prefix="/stores")
+    app.include_router(fetch_municipalities.router, prefix="/municipalities")
+    return TestClient(app)
+
+
+@pytest.mark.parametrize("path", [
+    "/products/fetch_products",
+    "/stores/fetch_stores",
+    "/municipalities/fetch_municipalities",
+])
+def test_matching_etag_returns_empty_304(client, path):
+    first = client.get(path)
+    assert first.status_code == 200
+    assert first.headers["etag"].startswith('"')
+    assert "max-age=" in first.headers["cache-control"]
+    assert "last-modified" in first.headers
+
+    second = client.get(path, headers={"If-None-Match": first.headers["etag"]})
+    assert second.status_code == 304
+    assert second.content == b""
+    assert second.headers["etag"] == first.headers["etag"]
+
+
+def test_changed_content_gets_a_new_etag(client, fake_supabase):
+    from core.cache import catalog_cache
+
+    first = client.get("/products/fetch_products")
+    fake_supabase.tables["products"][0]["name"] = "Renamed"
+    catalog_cache.invalidate("products")
+
+    second = client.get("/products/fetch_products", headers={"If-None-Match": first.headers["etag"]})
+    assert second.status_code == 200
+    assert second.headers["etag"] != first.headers["etag"]
+
+
+def test_if_modified_since_is_honoured(client):
+    first = client.get("/municipalities/fetch_municipalities")
+
+    second = client.get("/municipalities/fetch_municipalities",
+                        headers={"If-Modified-Since": first.headers["last-modified"]})
+    assert second.status_code == 304
+
+
+def test_304_keeps_the_next_cursor_header(client):
+    first = client.get("/stores/fetch_stores?limit=2")
+
+    second = client.get("/stores/fetch_stores?limit=2", headers={"If-None-Match": first.headers["etag"]})
+    assert second.status_code == 304
+    assert second.headers[NEXT_CURSOR_HEADER] == first.headers[NEXT_CURSOR_HEADER]
+
+
+def test_reload_of_unchanged_content_keeps_last_modified(client, monkeypatch):
+    from types import SimpleNamespace
+
+    from core import conditional
+    from core.cache import catalog_cache
+
+    first = client.get("/municipalities/fetch_municipalities")
+    monkeypatch.setattr(conditional, "time", SimpleNamespace(time=lambda: 4102444800.0))
+    catalog_cache.invalidate("municipalities")
+
+    second = client.get("/municipalities/fetch_municipalities",
+                        headers={"If-Modified-Since": first.headers["last-modified"]})
+    assert second.status_code == 304
+    assert second.headers["last-modified"] == first.headers["last-modified"]
@@ -0,0 +1,67 @@
+# tests/test_database.py
+import asyncio
+import threading
+import time
+
+from conftest import FakeQuery
+from core.config import settings
+from db.database import execute, run_blocking
+from routes import fetch_products
+
+LATENCY = 0.05
+
+
+def slow_queries(monkeypatch):
+    """
+    Make every fake query take LATENCY seconds; returns a dict whose "peak"
+    is the most queries observed running at the same time.
+    """
+    original = FakeQuery.execute
+    lock = threading.Lock()
+    observed = {"running": 0, "peak": 0}
+
+    def execute_slowly(self):
+        with lock:
+            observed["running"] += 1
+            observed["peak"] = max(observed["peak"], observed["running"])
+        try:
+            time.sleep(LATENCY)
+            return original(self)
+        finally:
+            with lock:
+                observed["running"] -= 1
+
+    monkeypatch.setattr(FakeQuery, "execute", execute_slowly)
+    return observed
+
+
+def test_execute_runs_query_on_database_pool(fake_supabase):
+    fake_supabase.tables["users"] = [{"id": 1, "email": "a@example.com"}]
+    seen = []
+
+    async def main():
+        query = fake_supabase.table("users").select("id").eq("email", "a@example.com")
+        response = await execute(query)
+        seen.append(await run_blocking(lambda: threading.current_thread().name))
+        return response
+
+    assert asyncio.run(main()).data == [{"id": 1, "email": "a@example.com"}]
+    assert seen[0].startswith("supabase")
+
+
+def test_slow_queries_do_not_serialize_requests(fake_supabase, monkeypatch):
+    fake_supabase.tables["products"] = [{"id": i, "name": f"Product {i}"} for i in range(1, 9)]
+    observed = slow_queries(monkeypatch)
+
+    async def main():
+        return await asyncio.gather(*(fetch_products.fetch_product(str(i)) for i in range(1, 9)))
+
+    started = time.perf_counter()
+    results = asyncio.run(main())
+    elapsed = time.perf_counter() - started
+
+    assert [result["product"]["id"] for result in results] == list(range(1, 9))
+    # Each request makes two round trips; run inline the batch would take 16 * LATENCY
+    assert settings.DB_MAX_WORKERS >= 8
+    assert observed["peak"] >= 8
+    assert elapsed < 8 * LATENCY
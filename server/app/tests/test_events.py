@@ -0,0 +1,150 @@
+# tests/test_events.py
+import asyncio
+from datetime import date, datetime
+
+import pytest
+from fastapi import FastAPI, HTTPException
+from fastapi.testclient import TestClient
+
+from core.events import EventCalendar, attach_highlights, ensure_event_calendar
+from routes import fetch_events
+
+
+def make_event(event_id, day, start="09:00:00", end="17:00:00", town="1", category="Festival"):
+    return {
+        "id": event_id, "title": f"Event {event_id}", "date": day, "start_time": start, "end_time": end,
+        "location": "Plaza", "category": category, "description": "", "image_url": "",
+        "ticket_availability": True, "entrance_fee": 0, "town": town,
+    }
+
+
+EVENTS = [
+    make_event("e5", "2026-05-01", town="2", category="Music"),
+    make_event("e1", "2026-03-01", start="18:00:00", end="22:00:00"),
+    make_event("e2", "2026-03-01", start="08:00:00", end="10:00:00", category="Food"),
+    make_event("e3", "2026-03-15", town="2"),
+    make_event("e4", "2026-04-10"),
+]
+
+
+def calendar():
+    events = EventCalendar()
+    events.replace(EVENTS)
+    return events
+
+
+def ids(events):
+    return [event["id"] for event in events]
+
+
+def test_events_are_in_calendar_order():
+    assert ids(calendar().between()) == ["e2", "e1", "e3", "e4", "e5"]
+
+
+def test_date_range_is_inclusive_and_accepts_dates():
+    events = calendar()
+    assert ids(events.between("2026-03-01", "2026-03-15")) == ["e2", "e1", "e3"]
+    assert ids(events.between(date(2026, 3, 2), date(2026, 4, 10))) == ["e3", "e4"]
+    assert ids(events.between(start="2026-04-11")) == ["e5"]
+    assert events.between("2026-06-01") == []
+
+
+def test_town_and_category_filters():
+    events = calendar()
+    assert ids(events.between(town="2")) == ["e3", "e5"]
+    assert ids(events.between(end="2026-04-30", town=1)) == ["e2", "e1", "e4"]
+    assert ids(events.between(category="food")) == ["e2"]
+    assert events.between(town="9") == []
+
+
+def test_upcoming_skips_events_that_already_ended():
+    events = calendar()
+    now = datetime(2026, 3, 1, 12, 0)
+    assert ids(events.upcoming(3, now=now)) == ["e1", "e3", "e4"]
+    assert ids(events.upcoming(5, now=now, town="2")) == ["e3", "e5"]
+
+
+def test_endpoints_load_the_calendar_once(fake_supabase):
+    fake_supabase.tables["events"] = [dict(event) for event in EVENTS]
+
+    async def main():
+        ranged = await fetch_events.fetch_events(from_date=date(2026, 3, 10), to_date=date(2026, 4, 30))
+        upcoming = await fetch_events.fetch_upcoming_events(limit=100)
+        return ranged, upcoming
+
+    ranged, upcoming = asyncio.run(main())
+
+    assert ids(ranged) == ["e3", "e4"]
+    assert ids(upcoming) == ids(calendar().upcoming(100))
+    assert len(fake_supabase.calls_to("events")) == 1
+
+
+def test_router_is_mounted_with_from_and_to_aliases(fake_supabase):
+    fake_supabase.tables["events"] = [dict(event) for event in EVENTS]
+    app = FastAPI()
+    app.include_router(fetch_events.router, prefix="/events")
+    client = TestClient(app)
+
+    response = client.get("/events/fetch_events", params={"from": "2026-03-01", "to": "2026-03-01"})
+    assert response.status_code == 200
+    assert ids(response.json()) == ["e2", "e1"]
+
+    assert client.get("/events/fetch_events", params={"from": "2026-04-01", "to": "2026-03-01"}).status_code == 400
+
+
+def test_inverted_range_is_rejected(fake_supabase):
+    with pytest.raises(HTTPException) as error:
+        asyncio.run(fetch_events.fetch_events(from_date=date(2026, 4, 1), to_date=date(2026, 3, 1)))
+    assert error.value.status_code == 400
+
+
+HIGHLIGHTS = [
+    {"id": "h1", "event_id": "e1", "title": "Parade", "description": "", "icon": "flag"},
+    {"id": "h2", "event_id": "e1", "title": "Fireworks", "description": "", "icon": "star"},
+    {"id": "h3", "event_id": "e3", "title": "Cook-off", "description": "", "icon": "food"},
+]
+
+
+def test_highlights_come_from_the_map_refreshed_with_the_calendar(fake_supabase):
+    fake_supabase.tables["events"] = [dict(event) for event in EVENTS]
+    fake_supabase.tables["festival_highlights"] = [dict(highlight) for highlight in HIGHLIGHTS]
+
+    events = asyncio.run(fetch_events.fetch_events(to_date=date(2026, 3, 31), include="highlights"))
+
+    assert {event["id"]: [h["id"] for h in event["highlights"]] for event in events} == {
+        "e2": [], "e1": ["h1", "h2"], "e3": ["h3"],
+    }
+    # One scan of each table on load, nothing per event afterwards
+    assert len(fake_supabase.calls_to("festival_highlights")) == 1
+    assert "highlights" not in asyncio.run(fetch_events.fetch_events())[0]
+
+
+def test_events_added_since_refresh_are_batched_into_one_query(fake_supabase):
+    fake_supabase.tables["events"] = [dict(event) for event in EVENTS]
+    fake_supabase.tables["festival_highlights"] = [dict(highlight) for highlight in HIGHLIGHTS]
+    ensure_event_calendar()
+    fake_supabase.calls.clear()
+
+    fresh = [make_event("e8", "2026-06-01"), make_event("e9", "2026-06-02")]
+    fake_supabase.tables["festival_highlights"].append(
+        {"id": "h9", "event_id": "e9", "title": "Concert", "description": "", "icon": "music"}
+    )
+    events = attach_highlights(fresh + [make_event("e1", "2026-03-01")])
+
+    assert [[h["id"] for h in event["highlights"]] for event in events] == [[], ["h9"], ["h1", "h2"]]
+    assert fake_supabase.calls == [("festival_highlights", "select")]
+
+
+def test_upcoming_uses_the_calendar_timezone():
+    from datetime import timezone
+
+    events = calendar()
+    # e1 runs 18:00-22:00 Manila time, i.e. until 14:00 UTC
+    assert "e1" in ids(events.upcoming(5, now=datetime(2026, 3, 1, 13, 30, tzinfo=timezone.utc)))
+    assert "e1" not in ids(events.upcoming(5, now=datetime(2026, 3, 1, 14, 30, tzinfo=timezone.utc)))
+
+
+def test_inverted_range_is_rejected_for_a_municipality(fake_supabase):
+    with pytest.raises(HTTPException) as error:
+        asyncio.run(fetch_events.fetch_events_by_municipality("1", from_date=date(2026, 4, 1), to_date=date(2026, 3, 1)))
+    assert error.value.status_code == 400
@@ -0,0 +1,102 @@
+# tests/test_fetch_products.py
+import asyncio
+import json
+
+import pytest
+from fastapi import Response
+from pydantic import ValidationError
+
+from core.ratings import rebuild_rating_summary
+from routes import fetch_products
+from schemas.product import ProductBatchRequest
+
+
+def make_catalog(fake, size):
+    fake.tables["products"] = [
+        {"id": i, "name": "Basi" if i % 2 else f"Product {i}", "town": "agoo", "store_id": "s1", "views": 0,
+         "stores": {"name": "Store", "store_id": "s1"}}
+        for i in range(1, size + 1)
+    ]
+    fake.tables["reviews"] = [
+        {"id": 2 * i + offset, "product_id": i, "rating": rating}
+        for i in range(1, size + 1)
+        for offset, rating in enumerate((4, 5))
+    ]
+
+
+def build_summary(fake):
+    asyncio.run(rebuild_rating_summary())
+    fake.calls.clear()
+
+
+@pytest.mark.parametrize("size", [3, 10, 200])
+@pytest.mark.parametrize("endpoint, args", [
+    (fetch_products.fetch_products, (Response(),)),
+    (fetch_products.search_products_by_name, ("basi",)),
+    (fetch_products.fetch_products_by_municipality, ("agoo",)),
+    (fetch_products.fetch_similar_products, ("1",)),
+    (fetch_products.fetch_popular_products, ()),
+])
+def test_list_endpoints_make_one_rating_lookup(fake_supabase, endpoint, args, size):
+    make_catalog(fake_supabase, size)
+    build_summary(fake_supabase)
+
+    asyncio.run(endpoint(*args))
+
+    assert len(fake_supabase.calls_to("reviews")) == 0
+    assert len(fake_supabase.calls_to("product_rating_summary")) == 1
+    assert len(fake_supabase.calls) <= 3
+
+
+def test_ratings_are_merged_per_product(fake_supabase):
+    make_catalog(fake_supabase, 3)
+    fake_supabase.tables["reviews"].append({"id": 1000, "product_id": 2, "rating": 1})
+    build_summary(fake_supabase)
+
+    products = asyncio.run(fetch_products.fetch_products(Response()))["products"]
+
+    by_id = {product["id"]: product for product in products}
+    assert by_id[1]["average_rating"] == "4.5"
+    assert by_id[1]["total_reviews"] == 2
+    assert by_id[2]["average_rating"] == "3.3"
+    assert by_id[2]["total_reviews"] == 3
+
+
+def test_ndjson_export_streams_every_product_page_by_page(fake_supabase, monkeypatch):
+    monkeypatch.setattr(fetch_products, "EXPORT_PAGE_SIZE", 4)
+    make_catalog(fake_supabase, 10)
+    build_summary(fake_supabase)
+
+    response = asyncio.run(fetch_products.fetch_products(Response(), format="ndjson"))
+    assert response.media_type == "application/x-ndjson"
+    assert fake_supabase.calls == []
+
+    async def consume():
+        return b"".join([chunk async for chunk in response.body_iterator])
+
+    products = [json.loads(line) for line in asyncio.run(consume()).splitlines()]
+
+    assert [product["id"] for product in products] == list(range(1, 11))
+    assert products[0]["average_rating"] == "4.5"
+    assert len(fake_supabase.calls_to("products")) == 3
+    assert len(fake_supabase.calls_to("product_rating_summary")) == 3
+
+
+def test_batch_keeps_requested_order_and_reports_missing(fake_supabase):
+    make_catalog(fake_supabase, 10)
+    build_summary(fake_supabase)
+
+    batch = ProductBatchRequest(ids=[7, 404, 2, 7, 9])
+    result = asyncio.run(fetch_products.fetch_products_batch(batch))
+
+    assert [product["id"] for product in result["products"]] == [7, 2, 9]
+    assert result["missing"] == [404]
+    assert result["products"][0]["average_rating"] == "4.5"
+    assert fake_supabase.calls == [("products", "select"), ("product_rating_summary", "select")]
+
+
+def test_batch_size_is_bounded():
+    with pytest.raises(ValidationError):
+        ProductBatchRequest(ids=list(range(301)))
+    with pytest.raises(ValidationError):
+        ProductBatchRequest(ids=[])
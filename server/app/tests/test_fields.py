@@ -0,0 +1,104 @@
+# tests/test_fields.py
+import asyncio
+
+import pytest
+from fastapi import HTTPException, Response
+
+from core.fields import PRODUCT_FIELDS, STORE_FIELDS
+from routes import fetch_products, fetch_stores
+
+
+class RecordingFake:
+    """Wraps the fake client to capture the select() projection of each query."""
+
+    def __init__(self, fake):
+        self.fake = fake
+        self.selects = []
+
+    def table(self, name):
+        query = self.fake.table(name)
+        original = query.select
+
+        def select(*columns, **kwargs):
+            self.selects.append((name, ",".join(columns)))
+            return original(*columns, **kwargs)
+
+        query.select = select
+        return query
+
+
+@pytest.fixture
+def catalog(fake_supabase, monkeypatch):
+    fake_supabase.tables["products"] = [
+        {"id": i, "name": f"Product {i}", "description": "Long text", "image_urls": [f"{i}a.jpg", f"{i}b.jpg"],
+         "price_min": 10, "price_max": 20, "town": "agoo", "stores": {"name": "Store"}}
+        for i in range(1, 4)
+    ]
+    fake_supabase.tables["stores"] = [
+        {"store_id": f"s{i}", "name": f"Store {i}", "description": "About", "rating": 4.0, "type": "Craft", "town": "agoo"}
+        for i in range(3)
+    ]
+    recorder = RecordingFake(fake_supabase)
+    monkeypatch.setattr(fetch_products, "supabase_client", recorder)
+    monkeypatch.setattr(fetch_stores, "supabase_client", recorder)
+    return recorder
+
+
+def test_presets_and_fields_can_be_mixed():
+    requested = PRODUCT_FIELDS.resolve("card,description")
+    assert {"thumbnail", "average_rating", "description", "id"} <= requested
+
+
+def test_unknown_field_is_rejected():
+    with pytest.raises(HTTPException) as error:
+        PRODUCT_FIELDS.resolve("name,secret_column")
+    assert error.value.status_code == 400
+
+
+def test_computed_fields_select_their_source_columns():
+    assert PRODUCT_FIELDS.select(frozenset({"id", "thumbnail"}), "*") == "id, image_urls"
+    assert PRODUCT_FIELDS.select(None, "default") == "default"
+
+
+def test_card_preset_pushes_projection_down_and_derives_thumbnail(catalog):
+    result = asyncio.run(fetch_products.fetch_products(Response(), fields="card"))
+
+    assert catalog.selects[0] == ("products", "id, name, price_min, price_max, image_urls")
+    product = result["products"][0]
+    assert product == {"id": 1, "name": "Product 1", "thumbnail": "1a.jpg", "price_min": 10, "price_max": 20,
+                       "average_rating": "0", "total_reviews": 0}
+
+
+def test_ratings_are_skipped_when_not_requested(catalog):
+    result = asyncio.run(fetch_products.fetch_products_by_municipality("agoo", fields="name"))
+
+    assert result["products"][0] == {"id": 1, "name": "Product 1"}
+    assert catalog.fake.calls_to("product_rating_summary") == []
+
+
+def test_default_response_is_unchanged(catalog):
+    product = asyncio.run(fetch_products.fetch_product("2"))["product"]
+
+    assert product["description"] == "Long text"
+    assert product["image_urls"] == ["2a.jpg", "2b.jpg"]
+    assert "thumbnail" not in product
+
+
+def test_enrichment_does_not_touch_shared_rows(catalog):
+    # Rows from a coalesced query or a cache entry are shared with other requests
+    shared = [dict(row) for row in catalog.fake.tables["products"]]
+
+    enriched = fetch_products.enrich_products(shared, PRODUCT_FIELDS.resolve("detail,thumbnail"))
+
+    assert enriched[0]["thumbnail"] == "1a.jpg"
+    assert all("thumbnail" not in row and "average_rating" not in row for row in shared)
+
+
+def test_store_fields(catalog):
+    asyncio.run(fetch_stores.fetch_stores(Response(), fields="name,rating"))
+
+    assert catalog.selects[0] == ("stores", "store_id, name, rating")
+
+    found = asyncio.run(fetch_stores.search_stores_by_name("Store 1", fields="card"))
+    assert "match_type" in found["stores"][0]
+    assert set(found["stores"][0]) - {"match_type", "score"} <= set(STORE_FIELDS.presets["card"])
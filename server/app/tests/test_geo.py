@@ -0,0 +1,100 @@
+# tests/test_geo.py
+import asyncio
+import random
+
+import pytest
+from fastapi import HTTPException
+
+from core.geo import StoreLocator, haversine_km
+from routes import fetch_stores
+
+TYPES = ("Pasalubong", "Restaurant", "Craft")
+
+
+def make_stores(count, seed=7):
+    rng = random.Random(seed)
+    return [
+        {
+            "store_id": f"s{i}",
+            "name": f"Store {i}",
+            "latitude": 16.3 + rng.random() * 0.8,
+            "longitude": 120.2 + rng.random() * 0.4,
+            "type": TYPES[i % 3],
+            "town": str(i % 5),
+        }
+        for i in range(count)
+    ]
+
+
+def brute_force(stores, lat, lon, radius, store_type=None):
+    hits = [
+        (haversine_km(lat, lon, store["latitude"], store["longitude"]), store["store_id"])
+        for store in stores
+        if store_type is None or store["type"] == store_type
+    ]
+    return [store_id for distance, store_id in sorted(hits) if distance <= radius]
+
+
+def test_haversine_matches_known_distance():
+    # San Fernando, La Union to Vigan, about 107 km apart
+    assert 106 < haversine_km(16.6159, 120.3209, 17.5747, 120.3869) < 108
+
+
+@pytest.mark.parametrize("radius", [0.5, 3, 12, 60])
+def test_nearby_matches_brute_force(radius):
+    stores = make_stores(500)
+    locator = StoreLocator()
+    locator.replace(stores)
+
+    found = [store["store_id"] for store, _ in locator.nearby(16.6, 120.35, radius, 500)]
+    assert found == brute_force(stores, 16.6, 120.35, radius)
+
+    craft = [store["store_id"] for store, _ in locator.nearby(16.6, 120.35, radius, 500, store_type="craft")]
+    assert craft == brute_force(stores, 16.6, 120.35, radius, "Craft")
+
+
+def test_in_bbox_filters_and_sorts_by_distance():
+    stores = make_stores(300)
+    stores.append({"store_id": "nowhere", "latitude": None, "longitude": None})
+    locator = StoreLocator()
+    locator.replace(stores)
+
+    matches = locator.in_bbox(16.4, 120.25, 16.7, 120.45, 300, town="2")
+    inside = {
+        store["store_id"] for store in stores[:-1]
+        if 16.4 <= store["latitude"] <= 16.7 and 120.25 <= store["longitude"] <= 120.45 and store["town"] == "2"
+    }
+    assert {store["store_id"] for store, _ in matches} == inside
+    distances = [distance for _, distance in matches]
+    assert distances == sorted(distances)
+
+
+def test_replace_reports_changes():
+    locator = StoreLocator()
+    stores = make_stores(5)
+    assert locator.replace(stores) is True
+    assert locator.replace([dict(store) for store in stores]) is False
+    stores[0] = dict(stores[0], latitude=16.0)
+    assert locator.replace(stores) is True
+
+
+def test_nearby_endpoint_loads_the_index_once(fake_supabase):
+    fake_supabase.tables["stores"] = make_stores(50)
+
+    async def main():
+        first = await fetch_stores.fetch_nearby_stores(lat=16.6, lon=120.35, radius=50, limit=5, fields="card")
+        second = await fetch_stores.fetch_nearby_stores(lat=16.6, lon=120.35, radius=50, limit=5, type="Craft")
+        return first, second
+
+    first, second = asyncio.run(main())
+
+    assert len(fake_supabase.calls_to("stores")) == 1
+    assert len(first["stores"]) == 5
+    assert "distance_km" in first["stores"][0] and "latitude" not in first["stores"][0]
+    assert all(store["type"] == "Craft" for store in second["stores"])
+
+
+def test_in_bbox_rejects_inverted_box(fake_supabase):
+    with pytest.raises(HTTPException) as error:
+        asyncio.run(fetch_stores.fetch_stores_in_bbox(min_lat=17, min_lon=120, max_lat=16, max_lon=121))
+    assert error.value.status_code == 400
@@ -0,0 +1,108 @@
+# tests/test_identity.py
+import asyncio
+import time
+from datetime import timedelta
+from types import SimpleNamespace
+
+import jwt
+import pytest
+from fastapi import HTTPException
+
+from auth.auth_handler import get_current_user
+from core.config import settings
+from core.identity import IdentityCache
+from core.security import create_access_token
+
+SECRET = "local-test-secret-that-is-long-enough"
+SUPABASE_SECRET = "supabase-test-secret-that-is-long-enough"
+
+
+@pytest.fixture
+def users(fake_supabase, monkeypatch):
+    monkeypatch.setattr(settings, "SECRET_KEY", SECRET)
+    fake_supabase.tables["users"] = [{"id": "u1", "email": "ana@example.com"}]
+    return fake_supabase
+
+
+def supabase_auth(fake_supabase, email="ana@example.com", metadata=None):
+    calls = []
+
+    def get_user(token):
+        calls.append(token)
+        jwt.decode(token, SUPABASE_SECRET, algorithms=["HS256"])
+        return SimpleNamespace(user=SimpleNamespace(email=email, user_metadata=metadata or {}))
+
+    fake_supabase.auth = SimpleNamespace(get_user=get_user)
+    return calls
+
+
+def supabase_token(expires_in=3600):
+    return jwt.encode({"sub": "supabase-uuid", "exp": int(time.time()) + expires_in}, SUPABASE_SECRET, algorithm="HS256")
+
+
+def test_local_token_needs_no_supabase_auth_call(users):
+    calls = supabase_auth(users)
+    token = create_access_token({"sub": "ana@example.com"})
+
+    assert asyncio.run(get_current_user(token)) == {"id": "u1"}
+    assert asyncio.run(get_current_user(token)) == {"id": "u1"}
+
+    assert calls == []
+    assert len(users.calls_to("users")) == 1
+
+
+def test_expired_local_token_is_rejected_locally(users):
+    calls = supabase_auth(users)
+    token = create_access_token({"sub": "ana@example.com"}, expires_delta=timedelta(minutes=-1))
+
+    with pytest.raises(HTTPException) as error:
+        asyncio.run(get_current_user(token))
+
+    assert error.value.status_code == 401
+    assert calls == [] and users.calls == []
+
+
+def test_supabase_token_is_verified_once_until_expiry(users):
+    calls = supabase_auth(users)
+    token = supabase_token()
+
+    assert asyncio.run(get_current_user(token)) == {"id": "u1"}
+    assert asyncio.run(get_current_user(token)) == {"id": "u1"}
+
+    assert len(calls) == 1
+    assert len(users.calls_to("users")) == 1
+
+
+def test_forged_token_is_rejected(users):
+    supabase_auth(users)
+    forged = jwt.encode({"sub": "ana@example.com", "exp": int(time.time()) + 60}, "someone-elses-secret-key-value!!", algorithm="HS256")
+
+    with pytest.raises(HTTPException) as error:
+        asyncio.run(get_current_user(forged))
+    assert error.value.status_code == 401
+
+
+def test_first_supabase_sign_in_creates_user(users):
+    supabase_auth(users, email="new@example.com", metadata={"full_name": "Nora Santos"})
+
+    user = asyncio.run(get_current_user(supabase_token()))
+
+    created = users.tables["users"][-1]
+    assert created["email"] == "new@example.com"
+    assert (created["first_name"], created["last_name"]) == ("Nora", "Santos")
+    assert user == {"id": created.get("id")}
+
+
+def test_cache_entries_expire():
+    now = [1000.0]
+    cache = IdentityCache(user_id_ttl=10, clock=lambda: now[0])
+    cache.remember_user_id("ana@example.com", "u1")
+    token = jwt.encode({"exp": 1005}, SUPABASE_SECRET, algorithm="HS256")
+    cache.remember_token(token, "ana@example.com")
+
+    assert cache.user_id("ana@example.com") == "u1"
+    assert cache.token_email(token) == "ana@example.com"
+    now[0] = 1006.0
+    assert cache.token_email(token) is None
+    now[0] = 1011.0
+    assert cache.user_id("ana@example.com") is None
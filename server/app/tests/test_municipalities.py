@@ -0,0 +1,64 @@
+# tests/test_municipalities.py
+import asyncio
+
+import pytest
+from fastapi import HTTPException
+
+from core.municipalities import MunicipalityRegistry, ensure_municipalities, municipality_registry
+from routes import fetch_events, fetch_municipalities
+
+TOWNS = [
+    {"id": "1", "name": "San Fernando", "description": "", "image_url": ""},
+    {"id": "2", "name": "Bacnotan", "description": "", "image_url": ""},
+]
+
+
+@pytest.fixture
+def towns(fake_supabase):
+    fake_supabase.tables["municipalities"] = [dict(town) for town in TOWNS]
+    fake_supabase.tables["events"] = [{"id": "e1", "title": "Fiesta", "town": "1"}]
+    return fake_supabase
+
+
+def test_registry_resolves_ids_and_normalised_names():
+    registry = MunicipalityRegistry()
+    assert registry.replace(TOWNS) is True
+
+    assert registry.get(2)["name"] == "Bacnotan"
+    assert registry.resolve("san  FERNANDO.") == "1"
+    assert registry.resolve("Agoo") is None
+    assert registry.replace([dict(town) for town in TOWNS]) is False
+
+
+def test_registry_reloads_only_when_stale():
+    now = [0.0]
+    registry = MunicipalityRegistry(clock=lambda: now[0])
+    assert registry.is_stale()
+    registry.replace(TOWNS)
+    now[0] = 100
+    assert not registry.is_stale(max_age=3600)
+    now[0] = 4000
+    assert registry.is_stale(max_age=3600)
+
+
+def test_lookups_share_one_registry_load(towns):
+    async def main():
+        town = await fetch_municipalities.fetch_municipality("2")
+        events = await fetch_events.fetch_events_by_municipality("1")
+        return town, events
+
+    town, events = asyncio.run(main())
+    ensure_municipalities()
+
+    assert town["name"] == "Bacnotan"
+    assert [event["id"] for event in events] == ["e1"]
+    assert len(towns.calls_to("municipalities")) == 1
+    assert municipality_registry.resolve("bacnotan") == "2"
+
+
+@pytest.mark.parametrize("endpoint", [fetch_municipalities.fetch_municipality, fetch_events.fetch_events_by_municipality])
+def test_unknown_municipality_is_404(towns, endpoint):
+    with pytest.raises(HTTPException) as error:
+        asyncio.run(endpoint("99"))
+    assert error.value.status_code == 404
+    assert towns.calls_to("events") == []
@@ -0,0 +1,111 @@
+# tests/test_pagination.py
+import asyncio
+
+import pytest
+from fastapi import HTTPException, Response
+
+from core.pagination import DEFAULT_PAGE_SIZE, NEXT_CURSOR_HEADER, decode_cursor, encode_cursor, fetch_all
+from routes import fetch_municipalities, fetch_products, fetch_stores
+
+
+def test_cursor_round_trip():
+    assert decode_cursor(encode_cursor(42)) == 42
+    assert decode_cursor(encode_cursor("c0ffee-uuid")) == "c0ffee-uuid"
+    assert decode_cursor(None) is None
+
+
+def test_invalid_cursor_is_rejected():
+    with pytest.raises(HTTPException) as error:
+        decode_cursor("not-a-cursor")
+    assert error.value.status_code == 400
+
+
+def test_fetch_products_walks_every_page(fake_supabase):
+    fake_supabase.tables["products"] = [{"id": i, "name": f"Product {i}"} for i in range(1, 8)]
+
+    seen, cursor, pages = [], None, 0
+    while True:
+        page = asyncio.run(fetch_products.fetch_products(Response(), limit=3, cursor=cursor))
+        seen += [product["id"] for product in page["products"]]
+        pages += 1
+        cursor = page["next_cursor"]
+        if cursor is None:
+            break
+
+    assert seen == list(range(1, 8))
+    assert pages == 3
+
+
+def test_exact_last_page_has_no_next_cursor(fake_supabase):
+    fake_supabase.tables["products"] = [{"id": i, "name": f"Product {i}"} for i in range(1, 4)]
+
+    page = asyncio.run(fetch_products.fetch_products(Response(), limit=3))
+
+    assert len(page["products"]) == 3
+    assert page["next_cursor"] is None
+
+
+def test_fetch_stores_returns_cursor_in_header(fake_supabase):
+    fake_supabase.tables["stores"] = [{"store_id": f"s{i}", "name": f"Store {i}"} for i in range(5)]
+
+    response = Response()
+    first = asyncio.run(fetch_stores.fetch_stores(response, limit=4))
+    assert [store["store_id"] for store in first] == ["s0", "s1", "s2", "s3"]
+
+    rest = asyncio.run(fetch_stores.fetch_stores(Response(), limit=4, cursor=response.headers[NEXT_CURSOR_HEADER]))
+    assert [store["store_id"] for store in rest] == ["s4"]
+
+
+def test_fetch_municipalities_last_page_sets_no_header(fake_supabase):
+    fake_supabase.tables["municipalities"] = [{"id": str(i), "name": f"Town {i}"} for i in range(3)]
+
+    response = Response()
+    towns = asyncio.run(fetch_municipalities.fetch_municipalities(response, limit=10))
+
+    assert len(towns) == 3
+    assert NEXT_CURSOR_HEADER.lower() not in response.headers
+
+
+def test_unpaged_requests_return_every_row(fake_supabase):
+    fake_supabase.tables["stores"] = [{"store_id": f"s{i:03d}", "name": f"Store {i}"} for i in range(DEFAULT_PAGE_SIZE + 50)]
+    fake_supabase.tables["municipalities"] = [{"id": f"{i:03d}", "name": f"Town {i}"} for i in range(DEFAULT_PAGE_SIZE + 5)]
+
+    fake_supabase.tables["products"] = [{"id": i, "name": f"Product {i}"} for i in range(1, DEFAULT_PAGE_SIZE + 21)]
+
+    response = Response()
+    products = asyncio.run(fetch_products.fetch_products(Response()))
+    stores = asyncio.run(fetch_stores.fetch_stores(response))
+    towns = asyncio.run(fetch_municipalities.fetch_municipalities(Response()))
+
+    assert len(products["products"]) == DEFAULT_PAGE_SIZE + 20
+    assert products["next_cursor"] is None
+    assert len(stores) == DEFAULT_PAGE_SIZE + 50
+    assert len(towns) == DEFAULT_PAGE_SIZE + 5
+    assert NEXT_CURSOR_HEADER.lower() not in response.headers
+
+
+def test_fetch_all_is_not_cut_off_by_the_row_cap(fake_supabase):
+    fake_supabase.tables["products"] = [{"id": i, "name": f"Product {i}"} for i in range(1, 2501)]
+
+    rows = fetch_all(lambda: fake_supabase.table("products").select("id, name"), "id", 1000)
+
+    assert [row["id"] for row in rows] == list(range(1, 2501))
+
+
+def test_full_page_request_still_reports_the_next_page(fake_supabase):
+    fake_supabase.tables["products"] = [{"id": i, "name": f"Product {i}"} for i in range(1, 1501)]
+
+    page = asyncio.run(fetch_products.fetch_products(Response(), limit=1000))
+
+    assert page["next_cursor"] is not None
+    assert page["products"][-1]["id"] == len(page["products"])
+
+
+@pytest.mark.parametrize("after", [[1, 2], {"id": 1}, None, True])
+def test_non_scalar_cursor_is_rejected(fake_supabase, after):
+    fake_supabase.tables["products"] = [{"id": 1, "name": "Product 1"}]
+
+    with pytest.raises(HTTPException) as error:
+        asyncio.run(fetch_products.fetch_products(Response(), limit=1, cursor=encode_cursor(after)))
+    assert error.value.status_code == 400
+    assert decode_cursor(encode_cursor([1, "a"]), compound=True) == [1, "a"]
@@ -0,0 +1,57 @@
+# tests/test_popularity.py
+import asyncio
+
+from core.popularity import bayesian_rating, compute_popularity, popular_ranking
+from routes import fetch_products
+
+
+def add_summary(fake, product_id, ratings):
+    fake.tables.setdefault("product_rating_summary", []).append(
+        {"product_id": product_id, "rating_sum": float(sum(ratings)), "rating_count": len(ratings)}
+    )
+
+
+def test_bayesian_rating_shrinks_small_samples_towards_the_mean():
+    assert bayesian_rating(5.0, 1, prior_mean=4.0) < bayesian_rating(49.0, 10, prior_mean=4.0)
+    assert bayesian_rating(0.0, 0, prior_mean=4.2) == 4.2
+
+
+def test_many_good_reviews_outrank_a_single_perfect_one(fake_supabase):
+    fake_supabase.tables["products"] = [
+        {"id": 1, "name": "One-hit", "views": 0, "town": "agoo", "category": "Food"},
+        {"id": 2, "name": "Crowd favourite", "views": 0, "town": "agoo", "category": "Food"},
+        {"id": 3, "name": "Unrated", "views": 0, "town": "bauang", "category": "Craft"},
+    ]
+    add_summary(fake_supabase, 1, [5])
+    add_summary(fake_supabase, 2, [5] * 9 + [4])
+
+    result = asyncio.run(fetch_products.fetch_popular_products(k=3))
+
+    assert [product["id"] for product in result["products"]] == [2, 1, 3]
+    assert result["products"][0]["average_rating"] == "4.9"
+
+
+def test_views_break_ties_between_unrated_products(fake_supabase):
+    fake_supabase.tables["products"] = [
+        {"id": 1, "name": "Quiet", "views": 2},
+        {"id": 2, "name": "Busy", "views": 500},
+    ]
+
+    compute_popularity()
+
+    assert [product["id"] for product in popular_ranking.top(2)] == [2, 1]
+
+
+def test_filters_and_k_are_applied_to_the_precomputed_ranking(fake_supabase):
+    fake_supabase.tables["products"] = [
+        {"id": i, "name": f"P{i}", "views": i, "town": "agoo" if i % 2 else "bauang", "category": "Food"}
+        for i in range(1, 11)
+    ]
+
+    first = asyncio.run(fetch_products.fetch_popular_products(k=2, town="agoo"))
+    fake_supabase.calls.clear()
+    second = asyncio.run(fetch_products.fetch_popular_products(k=3, category="food"))
+
+    assert [product["id"] for product in first["products"]] == [9, 7]
+    assert [product["id"] for product in second["products"]] == [10, 9, 8]
+    assert fake_supabase.calls == []
@@ -0,0 +1,74 @@
+# tests/test_ratings.py
+import asyncio
+
+from core import ratings
+from routes import reviews
+from schemas.review import ReviewCreate
+
+
+def record_product_rating(fake, p_product_id, p_rating):
+    rows = fake.tables.setdefault("product_rating_summary", [])
+    summary = next((row for row in rows if row["product_id"] == p_product_id), None)
+    if summary is None:
+        summary = {"product_id": p_product_id, **ratings.empty_summary()}
+        rows.append(summary)
+    summary["rating_sum"] += p_rating
+    summary["rating_count"] += 1
+    summary[ratings.star_column(p_rating)] += 1
+
+
+def summary_for(fake, product_id):
+    return next(row for row in fake.tables["product_rating_summary"] if row["product_id"] == product_id)
+
+
+def test_star_column_rounds_half_stars_up():
+    assert ratings.star_column(1) == "star_1"
+    assert ratings.star_column(3.4) == "star_3"
+    assert ratings.star_column(4.5) == "star_5"
+    assert ratings.star_column(5) == "star_5"
+
+
+def test_rebuild_runs_per_product_range(fake_supabase, monkeypatch):
+    monkeypatch.setattr(ratings, "REBUILD_CHUNK", 2)
+    fake_supabase.tables["products"] = [{"id": i} for i in range(1, 6)]
+    fake_supabase.tables["reviews"] = [
+        {"id": i, "product_id": 1 + i % 5, "rating": 1 + i % 5} for i in range(1, 16)
+    ]
+
+    asyncio.run(ratings.rebuild_rating_summary())
+
+    # Three ranges ([1, 2], [3, 4], [5]), each its own database call; no reviews pass through the client
+    assert len(fake_supabase.calls_to("rebuild_product_rating_summary")) == 3
+    assert fake_supabase.calls_to("reviews") == []
+    assert sum(row["rating_count"] for row in fake_supabase.tables["product_rating_summary"]) == 15
+    summary = summary_for(fake_supabase, 1)
+    assert summary["rating_count"] == 3
+    assert summary["rating_sum"] == 3.0
+    assert summary["star_1"] == 3
+
+
+def test_rebuild_zeroes_products_without_reviews(fake_supabase):
+    fake_supabase.tables["products"] = [{"id": 7}]
+    fake_supabase.tables["product_rating_summary"] = [
+        {"product_id": 7, **ratings.empty_summary(), "rating_sum": 9.0, "rating_count": 2, "star_5": 1, "star_4": 1}
+    ]
+    fake_supabase.tables["reviews"] = []
+
+    asyncio.run(ratings.rebuild_rating_summary())
+
+    summary = summary_for(fake_supabase, 7)
+    assert summary["rating_count"] == 0
+    assert summary["star_5"] == 0
+    assert len(fake_supabase.tables["product_rating_summary"]) == 1
+
+
+def test_create_review_updates_summary(fake_supabase):
+    fake_supabase.functions["record_product_rating"] = record_product_rating
+
+    review = ReviewCreate(product_id=3, rating=4, review_text="Masarap")
+    asyncio.run(reviews.create_review(review, user={"id": "u1"}))
+    asyncio.run(reviews.create_review(review, user={"id": "u2"}))
+
+    summary = summary_for(fake_supabase, 3)
+    assert (summary["rating_sum"], summary["rating_count"], summary["star_4"]) == (8, 2, 2)
+    assert ratings.fetch_rating_totals([3]) == {3: (8.0, 2)}
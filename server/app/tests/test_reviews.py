@@ -0,0 +1,140 @@
+# tests/test_reviews.py
+import asyncio
+
+import pytest
+from fastapi import HTTPException, Response
+
+from core.pagination import NEXT_CURSOR_HEADER, encode_cursor, keyset_filter
+from core.reviewers import reviewer_names
+from routes import auth, reviews
+from schemas.user import UserProfileUpdate
+
+
+def seed(fake_supabase):
+    fake_supabase.tables["users"] = [
+        {"id": "u1", "email": "ana@example.com", "first_name": "Ana", "last_name": "Cruz"},
+        {"id": "u2", "email": "ben@example.com", "first_name": "Ben", "last_name": "Reyes"},
+    ]
+    # Two reviews share a timestamp so the id tie-break is exercised
+    fake_supabase.tables["reviews"] = [
+        {"id": i, "product_id": 1, "user_id": "u1" if i % 2 else "u2", "rating": float(i % 5 + 1),
+         "review_text": f"Review {i}", "created_at": f"2024-05-{min(i, 6):02d}T10:00:00+00:00"}
+        for i in range(1, 8)
+    ] + [{"id": 99, "product_id": 2, "user_id": "u1", "rating": 5.0, "review_text": "Other",
+          "created_at": "2024-05-01T10:00:00+00:00"}]
+
+
+def walk(limit, **params):
+    seen, cursor, pages = [], None, 0
+    while True:
+        response = Response()
+        page = asyncio.run(reviews.get_reviews(1, response, limit=limit, cursor=cursor, **params))
+        seen += page
+        pages += 1
+        cursor = response.headers.get(NEXT_CURSOR_HEADER)
+        if cursor is None:
+            return seen, pages
+
+
+def test_keyset_filter_expression():
+    order = [("created_at", True), ("id", True)]
+    assert keyset_filter(order, ["2024-05-01", 3]) == 'created_at.lt."2024-05-01",and(created_at.eq."2024-05-01",id.lt."3")'
+
+
+def test_keyset_page_bounds_the_leading_column(fake_supabase):
+    seed(fake_supabase)
+    first = Response()
+    asyncio.run(reviews.get_reviews(1, first, limit=2, sort="highest"))
+
+    captured = []
+    original = fake_supabase.table
+
+    def spy(name):
+        query = original(name)
+        query.lte = lambda column, value, _lte=query.lte: captured.append((column, value)) or _lte(column, value)
+        return query
+
+    fake_supabase.table = spy
+    asyncio.run(reviews.get_reviews(1, Response(), limit=2, sort="highest", cursor=first.headers[NEXT_CURSOR_HEADER]))
+
+    assert captured and captured[0][0] == "rating"
+
+
+def test_newest_first_across_pages(fake_supabase):
+    seed(fake_supabase)
+
+    seen, pages = walk(3)
+
+    assert [review["id"] for review in seen] == [7, 6, 5, 4, 3, 2, 1]
+    assert pages == 3
+    assert seen[0]["full_name"] == "Ana Cruz"
+    assert seen[1]["full_name"] == "Ben Reyes"
+
+
+def test_sort_by_rating_and_filter(fake_supabase):
+    seed(fake_supabase)
+
+    highest, _ = walk(2, sort="highest")
+    assert [review["rating"] for review in highest] == sorted((r["rating"] for r in highest), reverse=True)
+    assert len(highest) == 7
+
+    lowest, _ = walk(2, sort="lowest")
+    assert lowest[0]["rating"] == 1.0
+
+    filtered, _ = walk(5, rating=3.0)
+    assert [review["id"] for review in filtered] == [7, 2]
+
+
+def test_reviewer_names_are_cached_across_pages(fake_supabase):
+    seed(fake_supabase)
+
+    walk(2)
+    walk(2)
+
+    assert len(fake_supabase.calls_to("users")) == 1
+    assert reviewer_names.stats()["misses"] == 2
+
+
+def test_profile_update_drops_cached_name(fake_supabase):
+    seed(fake_supabase)
+    walk(10)
+
+    asyncio.run(auth.update_user_profile(UserProfileUpdate(first_name="Anna", last_name="Cruz"),
+                                         current_user={"sub": "ana@example.com"}))
+
+    page = asyncio.run(reviews.get_reviews(1, Response(), limit=1, cursor=None))
+    assert page[0]["full_name"] == "Anna Cruz"
+
+
+def test_mismatched_cursor_is_rejected(fake_supabase):
+    seed(fake_supabase)
+
+    with pytest.raises(HTTPException) as error:
+        asyncio.run(reviews.get_reviews(1, Response(), limit=2, cursor=encode_cursor(5)))
+    assert error.value.status_code == 400
+
+
+def test_unpaged_request_returns_every_review(fake_supabase):
+    seed(fake_supabase)
+
+    response = Response()
+    page = asyncio.run(reviews.get_reviews(1, response))
+
+    assert [review["id"] for review in page] == [7, 6, 5, 4, 3, 2, 1]
+    assert NEXT_CURSOR_HEADER.lower() not in response.headers
+
+
+def test_many_reviewers_are_looked_up_in_chunks(fake_supabase):
+    count = 250
+    fake_supabase.tables["users"] = [{"id": f"u{i:03d}", "first_name": f"User{i}", "last_name": "X"} for i in range(count)]
+    fake_supabase.tables["reviews"] = [
+        {"id": i, "product_id": 1, "user_id": f"u{i:03d}", "rating": 5.0, "review_text": "",
+         "created_at": f"2024-05-01T10:{i // 60:02d}:{i % 60:02d}+00:00"}
+        for i in range(count)
+    ]
+
+    page = asyncio.run(reviews.get_reviews(1, Response()))
+
+    assert len(page) == count
+    assert all(review["full_name"] for review in page)
+    assert len(fake_supabase.calls_to("users")) == 3
@@ -0,0 +1,75 @@
+# tests/test_search.py
+import asyncio
+
+from core.search import ProductSearchIndex, product_index, tokenize, trigrams
+from routes import fetch_products
+
+CATALOG = [
+    {"id": 1, "name": "Basi Wine", "category": "Beverage", "description": "Sugarcane wine aged in burnay jars",
+     "stores": {"name": "Ilocos Basi House"}},
+    {"id": 2, "name": "Burnay Jar", "category": "Pottery", "description": "Hand-thrown clay jar for storing basi",
+     "stores": {"name": "Vigan Pottery"}},
+    {"id": 3, "name": "Inabel Blanket", "category": "Textile", "description": "Handwoven cotton blanket",
+     "stores": {"name": "Abel Iloko Weavers"}},
+    {"id": 4, "name": "Chichacorn", "category": "Snack", "description": "Crunchy garlic corn",
+     "stores": {"name": "Paoay Treats"}},
+]
+
+
+def build_index():
+    index = ProductSearchIndex()
+    index.sync([dict(product) for product in CATALOG])
+    return index
+
+
+def test_tokenize_strips_accents_and_punctuation():
+    assert tokenize("Piña-Cloth (Handwoven)") == ["pina", "cloth", "handwoven"]
+    assert "  b" in trigrams("basi")
+
+
+def test_name_matches_outrank_description_matches():
+    ranked = build_index().search("basi")
+    assert [product_id for product_id, _ in ranked] == [1, 2]
+
+
+def test_category_and_store_name_are_searchable():
+    index = build_index()
+    assert index.search("pottery")[0][0] == 2
+    assert index.search("weavers")[0][0] == 3
+
+
+def test_typos_match_through_trigrams():
+    index = build_index()
+    assert index.search("chichacron")[0][0] == 4
+    assert index.search("inabell")[0][0] == 3
+
+
+def test_last_word_matches_as_prefix():
+    assert build_index().search("chich")[0][0] == 4
+
+
+def test_limit_caps_results():
+    assert len(build_index().search("jar basi wine", limit=1)) == 1
+
+
+def test_sync_only_reindexes_changed_products():
+    index = build_index()
+    renamed = [dict(product) for product in CATALOG[:3]]
+    renamed[2]["name"] = "Binakol Blanket"
+
+    assert index.sync(renamed) == 2
+    assert index.search("chichacorn") == []
+    assert index.search("binakol")[0][0] == 3
+    assert index.search("inabel") == []
+
+
+def test_search_endpoint_ranks_and_skips_table_scan_once_loaded(fake_supabase):
+    fake_supabase.tables["products"] = [dict(product) for product in CATALOG]
+
+    asyncio.run(fetch_products.search_products_by_name("basi"))
+    fake_supabase.calls.clear()
+    result = asyncio.run(fetch_products.search_products_by_name("burnay", limit=5))
+
+    assert [product["id"] for product in result["products"]] == [2, 1]
+    assert fake_supabase.calls_to("products") == []
+    assert "average_rating" not in product_index.docs[2]
@@ -0,0 +1,61 @@
+# tests/test_security.py
+import asyncio
+
+import pytest
+from fastapi import HTTPException
+
+from core import security
+from core.config import settings
+from routes import auth
+from schemas.user import UserLogin
+
+
+@pytest.fixture
+def fast_rounds(monkeypatch):
+    monkeypatch.setattr(settings, "BCRYPT_ROUNDS", 5)
+    monkeypatch.setattr(settings, "SECRET_KEY", "test-secret")
+
+
+def test_hash_uses_configured_cost(fast_rounds):
+    password_hash = security.hash_password("s3cret")
+
+    assert security.hash_rounds(password_hash) == 5
+    assert security.check_password("s3cret", password_hash)
+    assert not security.check_password("wrong", password_hash)
+    assert not security.check_password("s3cret", "not-a-bcrypt-hash")
+
+
+def test_needs_rehash_only_for_lower_cost(fast_rounds):
+    assert security.needs_rehash(security.hash_password("pw", rounds=4))
+    assert not security.needs_rehash(security.hash_password("pw"))
+    assert not security.needs_rehash("garbage")
+
+
+def test_pool_helpers_round_trip(fast_rounds):
+    password_hash = asyncio.run(security.hash_password_async("pw"))
+
+    assert asyncio.run(security.check_password_async("pw", password_hash))
+
+
+def test_login_upgrades_outdated_hash(fake_supabase, fast_rounds):
+    old_hash = security.hash_password("s3cret", rounds=4)
+    fake_supabase.tables["users"] = [{"id": "u1", "email": "ana@example.com", "password_hash": old_hash, "is_verified": True}]
+
+    result = asyncio.run(auth.login_user(UserLogin(email="ana@example.com", password="s3cret")))
+
+    assert result["access_token"]
+    new_hash = fake_supabase.tables["users"][0]["password_hash"]
+    assert security.hash_rounds(new_hash) == 5
+    assert security.check_password("s3cret", new_hash)
+
+
+def test_login_keeps_current_hash_and_rejects_wrong_password(fake_supabase, fast_rounds):
+    current_hash = security.hash_password("s3cret")
+    fake_supabase.tables["users"] = [{"id": "u1", "email": "ana@example.com", "password_hash": current_hash, "is_verified": True}]
+
+    asyncio.run(auth.login_user(UserLogin(email="ana@example.com", password="s3cret")))
+    assert fake_supabase.tables["users"][0]["password_hash"] == current_hash
+
+    with pytest.raises(HTTPException) as error:
+        asyncio.run(auth.login_user(UserLogin(email="ana@example.com", password="nope")))
+    assert error.value.status_code == 400
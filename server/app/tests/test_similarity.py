@@ -0,0 +1,76 @@
+# tests/test_similarity.py
+import asyncio
+
+import numpy as np
+import pytest
+from fastapi import HTTPException
+
+from core.similarity import name_groups, nearest_neighbors, price_band, vectorize
+from routes import fetch_products
+
+CATALOG = [
+    {"id": 1, "name": "Basi Wine", "category": "Beverage", "description": "Sugarcane wine", "price_min": 250, "price_max": 300, "town": "agoo"},
+    {"id": 2, "name": "Basi Wine", "category": "Beverage", "description": "Aged sugarcane wine", "price_min": 280, "price_max": 320, "town": "bauang"},
+    {"id": 3, "name": "Sukang Iloko", "category": "Beverage", "description": "Sugarcane vinegar", "price_min": 80, "price_max": 120, "town": "agoo"},
+    {"id": 4, "name": "Inabel Blanket", "category": "Textile", "description": "Handwoven cotton", "price_min": 1500, "price_max": 2500, "town": "bangar"},
+    {"id": 5, "name": "Inabel Runner", "category": "Textile", "description": "Handwoven table runner", "price_min": 900, "price_max": 1200, "town": "bangar"},
+]
+
+
+def test_price_band_groups_nearby_prices():
+    assert price_band({"price_min": 90, "price_max": 110}) == price_band({"price_min": 100, "price_max": 120})
+    assert price_band({"price_min": 100, "price_max": 100}) != price_band({"price_min": 1000, "price_max": 1000})
+    assert price_band({}) is None
+
+
+def test_vectors_are_unit_length():
+    matrix = vectorize(CATALOG)
+    assert np.allclose(np.linalg.norm(matrix, axis=1), 1.0)
+
+
+def test_neighbors_exclude_self_and_rank_by_similarity(monkeypatch):
+    monkeypatch.setattr("core.similarity.BLOCK_SIZE", 2)
+    indices, scores = nearest_neighbors(vectorize(CATALOG), 2)
+
+    assert indices.shape == (5, 2)
+    assert all(row not in indices[row] for row in range(5))
+    assert indices[0][0] == 1
+    assert indices[3][0] == 4
+    assert (scores[:, 0] >= scores[:, 1]).all()
+
+
+def test_same_name_listing_ranks_first():
+    products = [
+        {"id": 1, "name": "Basi", "category": "Beverage", "description": "sweet sugarcane wine in clay jar", "price_min": 250, "price_max": 300, "town": "agoo"},
+        {"id": 2, "name": "Tapuey", "category": "Beverage", "description": "sweet sugarcane wine in clay jar", "price_min": 250, "price_max": 300, "town": "agoo"},
+        {"id": 3, "name": "BASI!", "category": "Souvenir", "description": "gift box", "price_min": 2000, "price_max": 2500, "town": "bangar"},
+    ]
+    matrix = vectorize(products)
+
+    # Name tokens alone are outweighed here
+    assert nearest_neighbors(matrix, 2)[0][0][0] == 1
+
+    indices, scores = nearest_neighbors(matrix, 2, name_groups(products))
+    assert list(indices[0]) == [2, 1]
+    assert scores[0][0] <= 1.0
+
+
+def test_endpoint_serves_from_neighbor_table(fake_supabase):
+    fake_supabase.tables["products"] = [dict(product) for product in CATALOG]
+
+    asyncio.run(fetch_products.fetch_similar_products("4"))
+    fake_supabase.calls.clear()
+    result = asyncio.run(fetch_products.fetch_similar_products("1", limit=2))
+
+    assert [product["id"] for product in result["similar_products"]] == [2, 3]
+    assert result["similar_products"][0]["similarity"] > result["similar_products"][1]["similarity"]
+    assert fake_supabase.calls_to("products") == []
+    assert len(fake_supabase.calls) == 1
+
+
+def test_unknown_product_is_not_found(fake_supabase):
+    fake_supabase.tables["products"] = [dict(product) for product in CATALOG]
+
+    with pytest.raises(HTTPException) as error:
+        asyncio.run(fetch_products.fetch_similar_products("99"))
+    assert error.value.status_code == 404
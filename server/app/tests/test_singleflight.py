@@ -0,0 +1,128 @@
+# tests/test_singleflight.py
+import asyncio
+import threading
+import time
+
+import pytest
+from fastapi import Response
+
+from conftest import FakeQuery
+from core import popularity
+from core.cache import catalog_cache
+from core.singleflight import SingleFlight, query_key
+from db.database import supabase_client
+from routes import fetch_municipalities, fetch_products
+
+
+def run_together(count, target):
+    results = [None] * count
+
+    def worker(i):
+        results[i] = target()
+
+    threads = [threading.Thread(target=worker, args=(i,)) for i in range(count)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return results
+
+
+def test_concurrent_calls_share_one_execution():
+    flights = SingleFlight()
+    release = threading.Event()
+    calls = []
+
+    def load():
+        calls.append(1)
+        release.wait(timeout=2)
+        return {"rows": [1, 2, 3]}
+
+    def call():
+        return flights.do("popular", load)
+
+    threading.Timer(0.1, release.set).start()
+    results = run_together(6, call)
+
+    assert len(calls) == 1
+    assert all(result is results[0] for result in results)
+    assert flights.stats() == {"executions": 1, "coalesced": 5, "in_flight": 0, "coalesced_rate": 0.8333}
+
+
+def test_waiters_see_the_leaders_error_and_nothing_is_remembered():
+    flights = SingleFlight()
+    release = threading.Event()
+
+    def fail():
+        release.wait(timeout=2)
+        raise RuntimeError("upstream down")
+
+    def call():
+        try:
+            flights.do("key", fail)
+        except RuntimeError as e:
+            return str(e)
+
+    threading.Timer(0.1, release.set).start()
+    assert run_together(3, call) == ["upstream down"] * 3
+    assert flights.do("key", lambda: "recovered") == "recovered"
+
+
+def test_query_key_normalises_postgrest_reads():
+    def products():
+        return supabase_client.table("products").select("id, name")
+
+    assert query_key(products().eq("town", "1").eq("category", "Food")) == query_key(
+        products().eq("category", "Food").eq("town", "1")
+    )
+    assert query_key(products().eq("town", "1")) != query_key(products().eq("town", "2"))
+    assert query_key(products().eq("id", 1)) != query_key(products().eq("id", 1).single())
+    assert query_key(supabase_client.table("products").insert({"name": "x"})) is None
+    assert query_key(FakeQuery(None, "products")) is None
+
+
+def test_query_key_ignores_duck_typed_builders():
+    class AnythingGoes:
+        def __getattr__(self, name):
+            return lambda *args, **kwargs: self
+
+    assert query_key(AnythingGoes()) is None
+
+
+def test_identical_concurrent_requests_make_one_upstream_call(fake_supabase, monkeypatch):
+    fake_supabase.tables["municipalities"] = [{"id": str(i), "name": f"Town {i}"} for i in range(1, 4)]
+    original = FakeQuery.execute
+
+    def execute_slowly(self):
+        time.sleep(0.05)
+        return original(self)
+
+    monkeypatch.setattr(FakeQuery, "execute", execute_slowly)
+    before = catalog_cache.flights.coalesced
+
+    async def main():
+        return await asyncio.gather(*(fetch_municipalities.fetch_municipalities(Response()) for _ in range(8)))
+
+    results = asyncio.run(main())
+
+    assert all(result == results[0] for result in results)
+    assert len(fake_supabase.calls_to("municipalities")) == 1
+    assert catalog_cache.flights.coalesced - before == 7
+
+
+def test_popularity_cold_start_is_computed_once(fake_supabase, monkeypatch):
+    computed = []
+
+    def compute():
+        computed.append(1)
+        time.sleep(0.05)
+        popularity.popular_ranking.replace([{"id": 1, "popularity_score": 1.0, "total_reviews": 0}])
+
+    monkeypatch.setattr(popularity, "compute_popularity", compute)
+
+    async def main():
+        return await asyncio.gather(*(fetch_products.fetch_popular_products() for _ in range(5)))
+
+    results = asyncio.run(main())
+    assert len(computed) == 1
+    assert all(result["products"][0]["id"] == 1 for result in results)
@@ -0,0 +1,40 @@
+# tests/test_store_directory.py
+import asyncio
+
+from routes import fetch_stores
+
+
+def make_store(store_id, town):
+    return {
+        "store_id": store_id, "name": f"Store {store_id}", "description": "", "latitude": 16.6, "longitude": 120.3,
+        "rating": 4.0, "store_image": f"{store_id}.jpg", "type": "Pasalubong", "operating_hours": "8-5",
+        "phone": "", "town": town,
+    }
+
+
+def test_directory_merges_rollup_in_one_lookup(fake_supabase):
+    fake_supabase.tables["stores"] = [make_store(f"s{i}", "agoo" if i < 4 else "bauang") for i in range(1, 6)]
+    fake_supabase.tables["store_product_summary"] = [
+        {"store_id": "s1", "product_count": 5, "in_stock_count": 3, "price_min": 50, "price_max": 900,
+         "rating_sum": 27.0, "rating_count": 6},
+        {"store_id": "s2", "product_count": 1, "in_stock_count": 0, "price_min": 120, "price_max": 120,
+         "rating_sum": 0, "rating_count": 0},
+        {"store_id": "s4", "product_count": 9, "in_stock_count": 9, "price_min": 1, "price_max": 2,
+         "rating_sum": 5.0, "rating_count": 1},
+    ]
+
+    stores = asyncio.run(fetch_stores.fetch_store_directory("agoo"))["stores"]
+
+    assert [store["id"] for store in stores] == ["s1", "s2", "s3"]
+    assert stores[0]["product_count"] == 5 and stores[0]["in_stock_count"] == 3
+    assert (stores[0]["price_min"], stores[0]["price_max"]) == (50, 900)
+    assert stores[0]["average_rating"] == "4.5" and stores[0]["total_reviews"] == 6
+    assert stores[1]["average_rating"] == "0"
+    # A store with no products still gets zeroed figures
+    assert stores[2]["product_count"] == 0 and stores[2]["price_min"] is None
+    assert fake_supabase.calls == [("stores", "select"), ("store_product_summary", "select")]
+
+
+def test_empty_town_skips_the_rollup(fake_supabase):
+    assert asyncio.run(fetch_stores.fetch_store_directory("nowhere")) == {"stores": []}
+    assert fake_supabase.calls_to("store_product_summary") == []
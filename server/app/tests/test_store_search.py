@@ -0,0 +1,61 @@
+# tests/test_store_search.py
+import asyncio
+
+from core.search import StoreNameIndex
+from routes import fetch_stores
+
+STORES = [
+    {"store_id": "s1", "name": "Tindahan ni Aling Nena", "town": "1"},
+    {"store_id": "s2", "name": "Tindahan (Main Branch)", "town": "1"},
+    {"store_id": "s3", "name": "Basi Wine Center", "town": "2"},
+    {"store_id": "s4", "name": "Aling Nena's Burnay", "town": "2"},
+    {"store_id": "s5", "name": "Tindahan", "town": "3"},
+    {"store_id": "s6", "name": None, "town": "3"},
+]
+
+
+def index():
+    store_index = StoreNameIndex()
+    store_index.replace(STORES)
+    return store_index
+
+
+def ranked(query):
+    return [(store["store_id"], match_type) for store, match_type, _ in index().search(query)]
+
+
+def test_match_types_are_ranked_best_first():
+    assert ranked("tindahan") == [("s5", "exact"), ("s2", "prefix"), ("s1", "prefix")]
+
+
+def test_parentheses_and_case_are_ignored():
+    assert ranked("TINDAHAN (main")[0] == ("s2", "prefix")
+
+
+def test_every_query_word_must_match_for_token_matches():
+    # Equal coverage, so ties fall back to name order
+    assert ranked("nena aling") == [("s4", "token"), ("s1", "token")]
+    assert ranked("aling ne") == [("s4", "prefix"), ("s1", "token")]
+
+
+def test_misspellings_fall_back_to_fuzzy_matches():
+    results = index().search("basi wien")
+    assert results[0][0]["store_id"] == "s3"
+    assert results[0][1] == "fuzzy"
+    assert index().search("zzz") == []
+
+
+def test_search_endpoint_makes_no_upstream_calls_once_loaded(fake_supabase):
+    fake_supabase.tables["stores"] = [dict(store) for store in STORES]
+
+    async def main():
+        first = await fetch_stores.search_stores_by_name("tindahan")
+        second = await fetch_stores.search_stores_by_name("basi")
+        return first, second
+
+    first, second = asyncio.run(main())
+
+    assert len(fake_supabase.calls_to("stores")) == 1
+    assert first["stores"][0]["store_id"] == "s5"
+    assert first["stores"][0]["match_type"] == "exact" and first["stores"][0]["score"] == 1.0
+    assert [store["store_id"] for store in second["stores"]] == ["s3"]
@@ -0,0 +1,42 @@
+# tests/test_transport.py
+import asyncio
+import threading
+
+import httpx
+
+from core.config import settings
+from db import database, transport
+
+
+def test_client_uses_configured_limits_and_counts_requests(monkeypatch):
+    monkeypatch.setattr(settings, "SUPABASE_POOL_SIZE", 7)
+    monkeypatch.setattr(settings, "SUPABASE_MAX_KEEPALIVE", 3)
+    monkeypatch.setattr(settings, "SUPABASE_READ_TIMEOUT", 12.0)
+    monkeypatch.setattr(settings, "SUPABASE_CONNECT_TIMEOUT", 2.0)
+    client = transport.build_http_client()
+
+    assert client.timeout.read == 12.0 and client.timeout.connect == 2.0
+    before = transport.transport_stats.requests
+    # Swap in a mock transport; the event hooks still fire
+    client._transport = httpx.MockTransport(lambda request: httpx.Response(200))
+    client.get("http://upstream.test/rest/v1/")
+    assert transport.transport_stats.requests == before + 1
+
+    stats = transport.pool_stats(client)
+    assert stats["max_connections"] == 7 and stats["max_keepalive_connections"] == 3
+    assert stats["connections"] == 0
+
+
+def test_http2_falls_back_without_h2(monkeypatch):
+    monkeypatch.setattr(settings, "SUPABASE_HTTP2", True)
+    monkeypatch.setattr(transport, "h2", None)
+    assert transport.http2_enabled() is False
+
+
+def test_warm_up_opens_connections_concurrently(monkeypatch):
+    barrier = threading.Barrier(3, timeout=2)
+    monkeypatch.setattr(database, "ping_rest", barrier.wait)
+
+    # Every ping must be in flight at once for the barrier to release
+    asyncio.run(database.warm_connections(3))
+    assert barrier.broken is False
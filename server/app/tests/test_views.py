@@ -0,0 +1,141 @@
+# tests/test_views.py
+import threading
+
+import pytest
+from fastapi import HTTPException
+
+from core.search import load_product_index
+from core.views import ViewCounter, view_counter
+from routes import fetch_products
+
+
+def increment_product_views(fake, p_views):
+    for row in fake.tables["products"]:
+        for update in p_views:
+            if row["id"] == update["product_id"]:
+                row["views"] += update["views"]
+
+
+@pytest.fixture
+def catalog(fake_supabase):
+    fake_supabase.tables["products"] = [{"id": i, "views": 0} for i in range(1, 4)]
+    fake_supabase.functions["increment_product_views"] = increment_product_views
+    return fake_supabase
+
+
+def views(fake):
+    return {row["id"]: row["views"] for row in fake.tables["products"]}
+
+
+def test_concurrent_hits_are_flushed_in_one_batch(catalog):
+    counter = ViewCounter(flush_every=10 ** 6)
+
+    def viewer(product_id):
+        for _ in range(250):
+            counter.hit(product_id)
+
+    threads = [threading.Thread(target=viewer, args=(1 + i % 3,)) for i in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert catalog.calls == []
+    assert counter.flush() == 2000
+    assert views(catalog) == {1: 750, 2: 750, 3: 500}
+    assert catalog.calls == [("increment_product_views", "rpc")]
+    assert counter.pending == 0
+
+
+def test_failed_flush_keeps_hits_for_the_next_attempt(catalog):
+    counter = ViewCounter(flush_every=10 ** 6)
+    counter.hit(1)
+    counter.hit(1)
+
+    def broken(fake, p_views):
+        raise RuntimeError("upstream down")
+
+    catalog.functions["increment_product_views"] = broken
+    assert counter.flush() == 0
+    assert counter.pending == 2
+
+    catalog.functions["increment_product_views"] = increment_product_views
+    assert counter.flush() == 2
+    assert views(catalog)[1] == 2
+
+
+def test_reaching_the_hit_threshold_triggers_a_flush(catalog):
+    counter = ViewCounter(flush_every=3)
+    for _ in range(3):
+        counter.hit(2)
+
+    for thread in threading.enumerate():
+        if thread is not threading.current_thread() and thread.daemon:
+            thread.join(timeout=1)
+
+    assert views(catalog)[2] == 3
+
+
+def test_endpoint_records_view_without_upstream_calls(catalog):
+    load_product_index()
+    catalog.calls.clear()
+
+    result = fetch_products.increment_views("2")
+
+    assert result == {"message": "View recorded"}
+    assert catalog.calls == []
+    view_counter.flush()
+    assert views(catalog)[2] == 1
+
+
+def test_unknown_product_is_not_found(catalog):
+    load_product_index()
+
+    with pytest.raises(HTTPException) as error:
+        fetch_products.increment_views("99")
+    assert error.value.status_code == 404
+    assert view_counter.pending == 0
+
+
+def test_product_added_since_the_index_refresh_is_counted(catalog):
+    load_product_index()
+    catalog.tables["products"].append({"id": 4, "views": 0})
+
+    assert fetch_products.increment_views("4") == {"message": "View recorded"}
+    view_counter.flush()
+    assert views(catalog)[4] == 1
+
+
+def test_non_numeric_product_id_is_not_found(catalog):
+    with pytest.raises(HTTPException) as error:
+        fetch_products.increment_views("abc")
+    assert error.value.status_code == 404
+
+
+def test_shutdown_flush_waits_for_a_running_flush(catalog):
+    counter = ViewCounter(flush_every=10 ** 6)
+    in_rpc, release = threading.Event(), threading.Event()
+
+    def slow(fake, p_views):
+        in_rpc.set()
+        release.wait(timeout=5)
+        increment_product_views(fake, p_views)
+
+    catalog.functions["increment_product_views"] = slow
+    counter.hit(1)
+    scheduled = threading.Thread(target=counter.flush)
+    scheduled.start()
+    in_rpc.wait(timeout=5)
+
+    counter.hit(2)
+    assert counter.flush() == 0  # a regular flush skips while one is running
+
+    final = []
+    shutdown = threading.Thread(target=lambda: final.append(counter.flush(wait=True)))
+    shutdown.start()
+    release.set()
+    scheduled.join()
+    shutdown.join()
+
+    assert final == [1]
+    assert views(catalog) == {1: 1, 2: 1, 3: 0}
@@ -15,6 +15,7 @@ if server_dir not in sys.path:
 try:
     from app.db.database import supabase_client
     from app.core.config import settings
+    from app.core.municipalities import ensure_municipalities
     print(f"Successfully imported Supabase client with URL: {settings.SUPABASE_URL}")
 except ImportError as e:
     print(f"Error importing Supabase client: {e}")
@@ -30,15 +31,12 @@ class DatabaseConnector:
         Get all municipalities from the database.
         """
         try:
-            print("Attempting to fetch municipalities from Supabase...")
+            print("Attempting to fetch municipalities from the registry...")
             loop = asyncio.get_event_loop()
-            response = await loop.run_in_executor(
-                None,
-                lambda: supabase_client.table("municipalities").select("*").execute()
-            )
-            print(f"Municipalities response: {response}")
-            if response.data:
-                municipalities = {item["name"]: item for item in response.data}
+            # Reloaded from Supabase only when the registry is empty or stale
+            registry = await loop.run_in_executor(None, ensure_municipalities)
+            if len(registry):
+                municipalities = {item["name"]: item for item in registry.all()}
                 print(f"Found {len(municipalities)} municipalities")
                 return municipalities
             print("No municipalities found in database")
@@ -133,14 +131,11 @@ class DatabaseConnector:
         try:
             print(f"Fetching stores for municipality: {municipality}")
             loop = asyncio.get_event_loop()
-            municipality_response = await loop.run_in_executor(
-                None,
-                lambda: supabase_client.table("municipalities").select("id").eq("name", municipality).execute()
-            )
-            if not municipality_response.data:
+            registry = await loop.run_in_executor(None, ensure_municipalities)
+            municipality_id = registry.resolve(municipality)
+            if municipality_id is None:
                 print(f"No municipality found for: {municipality}")
                 return []
-            municipality_id = municipality_response.data[0]["id"]
 
             response = await loop.run_in_executor(
                 None,
@@ -178,14 +173,11 @@ class DatabaseConnector:
         try:
             print(f"Fetching products for municipality: {municipality}")
             loop = asyncio.get_event_loop()
-            municipality_response = await loop.run_in_executor(
-                None,
-                lambda: supabase_client.table("municipalities").select("id").eq("name", municipality).execute()
-            )
-            if not municipality_response.data:
+            registry = await loop.run_in_executor(None, ensure_municipalities)
+            municipality_id = registry.resolve(municipality)
+            if municipality_id is None:
                 print(f"No municipality found for: {municipality}")
                 return []
-            municipality_id = municipality_response.data[0]["id"]
             print(f"Resolved {municipality} to ID: {municipality_id}")
 
             response = await loop.run_in_executor(